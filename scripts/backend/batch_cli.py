@@ -0,0 +1,310 @@
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import multiprocessing
+import concurrent.futures
+from pathlib import Path
+
+# Insert project root so `scripts` package can be imported
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+MEDIA_EXTS = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.mp3', '.wav', '.m4a', '.flac', '.ogg')
+VIDEO_EXTS = ('.mp4', '.mkv', '.avi', '.mov', '.webm')
+MODES = {'A': "A - Full Ultra", 'B': "B - Balanced", 'C': "C - Basic"}
+SESSION_ID = "batch-cli"
+
+
+def collect_inputs(source, recursive=False):
+    """
+    Media files to dub as a list of (path, relative output dir, per-file overrides).
+
+    ``source`` is a directory, a single media file, a ``.txt`` manifest (one path per
+    line, ``#`` comments) or a ``.csv`` manifest with a ``path`` column and optional
+    ``target``/``voice``/``gender``/``mode`` override columns. Relative manifest paths
+    are resolved against the manifest's directory.
+    """
+    source = os.path.abspath(source)
+    items = []
+    if os.path.isdir(source):
+        pattern = "**/*" if recursive else "*"
+        for path in sorted(Path(source).glob(pattern)):
+            if path.is_file() and path.suffix.lower() in MEDIA_EXTS:
+                items.append((str(path), os.path.relpath(str(path.parent), source), {}))
+        return items
+
+    ext = os.path.splitext(source)[1].lower()
+    base = os.path.dirname(source)
+    if ext == '.txt':
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    items.append((os.path.join(base, line), '.', {}))
+    elif ext == '.csv':
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                path = (row.pop('path', None) or '').strip()
+                if path:
+                    overrides = {k: v.strip() for k, v in row.items() if k and v and v.strip()}
+                    items.append((os.path.join(base, path), '.', overrides))
+    elif ext in MEDIA_EXTS:
+        items.append((source, '.', {}))
+    else:
+        raise ValueError(f"Unsupported input '{source}': expected a directory, media file, .txt or .csv manifest")
+    return items
+
+
+def build_params(input_path, args, overrides):
+    """
+    process_media keyword arguments for one file (CLI options + manifest overrides).
+    Several comma-separated targets give process_media_multi arguments, with a
+    ``targets`` list in place of the single-target keys.
+    """
+    from scripts.backend.ultraaudio.config import (
+        LANG_OPTIONS, LANG_CODE_NAME_MAP, TTS_VOICE_MAP_FEMALE, TTS_VOICE_MAP_MALE
+    )
+
+    target_codes = [code.strip() for code in overrides.get('target', args.target).split(',') if code.strip()]
+    gender = overrides.get('gender', args.gender)
+    mode = MODES[overrides.get('mode', args.mode).upper()[:1]]
+    voice_map = TTS_VOICE_MAP_MALE if gender.lower() == "male" else TTS_VOICE_MAP_FEMALE
+    targets = []
+    for code in target_codes:
+        # An explicit voice only makes sense for a single target language
+        voice = (overrides.get('voice') or args.voice) if len(target_codes) == 1 else None
+        voice = voice or voice_map.get(code)
+        if not voice:
+            raise ValueError(f"No voice for target language '{code}'; pass --voice")
+        targets.append({
+            'target_lang_code': code,
+            'target_lang_name': LANG_CODE_NAME_MAP.get(code, code),
+            'voice_name': voice
+        })
+    if not targets:
+        raise ValueError("No target language given")
+    source_names = {code: name for name, code in LANG_OPTIONS.items()}
+
+    chunk = args.chunk_duration
+    if mode.startswith("C"):
+        # Same as the Batch Studio's Basic pipeline
+        chunk = max(15, chunk // 2)
+    is_video = os.path.splitext(input_path)[1].lower() in VIDEO_EXTS
+    params = {
+        'input_path': input_path,
+        'is_video': is_video,
+        'source_lang_code': args.source,
+        'chunk_duration': chunk,
+        'voice_rate': args.rate,
+        'voice_pitch': args.pitch,
+        'source_lang_name': source_names.get(args.source, args.source),
+        'mode': mode,
+        'mix_original': is_video and args.original_vol > 0,
+        'original_vol': args.original_vol,
+        'recognition_workers': args.recognition_workers,
+        'chunk_strategy': args.chunk_strategy,
+        'tts_workers': args.tts_workers,
+        'tts_batch_sec': args.tts_batch_sec,
+        'max_stretch': args.max_stretch,
+        'stage_timeouts': args.stage_timeouts,
+        'video_mode': args.video_mode,
+        'use_transcript_cache': not args.no_transcript_cache
+    }
+    if len(targets) > 1:
+        params['targets'] = targets
+    else:
+        params.update(targets[0])
+    return params
+
+
+def target_label(params):
+    if 'targets' in params:
+        return ",".join(t['target_lang_code'] for t in params['targets'])
+    return params['target_lang_code']
+
+
+def copy_outputs(result, out_dir, stem):
+    """Copy one language's audio, video and SRT into ``out_dir``; returns the main output path."""
+    output = os.path.join(out_dir, f"{stem}.wav")
+    shutil.copyfile(result['audio_path'], output)
+    with open(os.path.join(out_dir, f"{stem}.srt"), 'w', encoding='utf-8') as f:
+        f.write(result.get('srt') or "")
+    if result.get('video_path'):
+        output = os.path.join(out_dir, f"{stem}.mp4")
+        shutil.copyfile(result['video_path'], output)
+    return output
+
+
+def dub_file(params, out_dir, backend_name=None, multitrack=False, timeout=None):
+    """
+    Worker process: dub one file and copy its audio, video and SRT into ``out_dir``.
+    Several targets share one recognition pass (``process_media_multi``). A file
+    still running after ``timeout`` seconds is stopped and reported as failed.
+    Returns a summary row; failures are reported in the row rather than raised.
+    """
+    from scripts.backend.ultraaudio.pipeline import process_media, process_media_multi
+    from scripts.backend.ultraaudio.backends import get_speech_backend
+    from scripts.backend.ultraaudio.cancellation import CancelToken
+
+    name = os.path.basename(params['input_path'])
+    base = os.path.splitext(name)[0]
+    row = {'file': params['input_path'], 'target': target_label(params), 'status': 'failed',
+           'duration': 0.0, 'wall': 0.0, 'rtf': None, 'output': '', 'error': ''}
+    t_start = time.time()
+    cancel = CancelToken(timeout, name=name)
+    try:
+        backend = get_speech_backend(backend_name)
+        os.makedirs(out_dir, exist_ok=True)
+        if 'targets' in params:
+            multi = process_media_multi(
+                backend=backend, session_id=SESSION_ID, cancel=cancel,
+                multitrack_path=os.path.join(out_dir, f"{base}.multi.mp4") if multitrack else None,
+                on_status=lambda text: print(f"[{name}] {text}"), **params
+            )
+            outputs = [copy_outputs(result, out_dir, f"{base}.{lang}") for lang, result in multi['results'].items()]
+            if multi['multitrack_path']:
+                outputs.append(multi['multitrack_path'])
+            durations = [result.get('duration') or 0.0 for result in multi['results'].values()]
+            row.update(duration=max(durations + [0.0]), output=";".join(outputs))
+            if multi['errors']:
+                row['error'] = "; ".join(f"{lang}: {err}" for lang, err in multi['errors'].items())
+            else:
+                row['status'] = 'done'
+        else:
+            result = process_media(
+                backend=backend, session_id=SESSION_ID, cancel=cancel,
+                on_status=lambda text: print(f"[{name}] {text}"), **params
+            )
+            output = copy_outputs(result, out_dir, f"{base}.{params['target_lang_code']}")
+            row.update(status='done', duration=result.get('duration') or 0.0, output=output)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        row['error'] = str(e)
+    finally:
+        cancel.close()
+    row['wall'] = time.time() - t_start
+    if row['duration']:
+        # Realtime factor: processing seconds per second of media (< 1 is faster than realtime)
+        row['rtf'] = row['wall'] / row['duration']
+    return row
+
+
+def run_batch(items, args):
+    """Dub every item with at most ``args.jobs`` files in flight; returns rows in input order."""
+    rows = [None] * len(items)
+    # Spawned so each file gets a clean interpreter (pipeline threads, SQLite connection)
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs, mp_context=ctx) as pool:
+        futures = {}
+        for i, (path, rel_dir, overrides) in enumerate(items):
+            try:
+                params = build_params(os.path.abspath(path), args, overrides)
+            except Exception as e:
+                rows[i] = {'file': path, 'target': overrides.get('target', args.target), 'status': 'failed',
+                           'duration': 0.0, 'wall': 0.0, 'rtf': None, 'output': '', 'error': str(e)}
+                continue
+            out_dir = os.path.normpath(os.path.join(args.output_dir, rel_dir))
+            futures[pool.submit(dub_file, params, out_dir, args.backend, args.multitrack, args.timeout)] = i
+        for fut in concurrent.futures.as_completed(futures):
+            i = futures[fut]
+            try:
+                rows[i] = fut.result()
+            except Exception as e:
+                # The worker process itself died
+                rows[i] = {'file': items[i][0], 'target': args.target, 'status': 'failed',
+                           'duration': 0.0, 'wall': 0.0, 'rtf': None, 'output': '', 'error': str(e)}
+            print(f"[BatchCLI] {rows[i]['status']}: {rows[i]['file']} ({rows[i]['wall']:.1f}s)")
+    return rows
+
+
+def print_summary(rows, wall_total):
+    name_w = max([len(os.path.basename(r['file'])) for r in rows] + [4])
+    target_w = max([len(r['target']) for r in rows] + [6])
+    line_w = name_w + target_w + 40
+    print()
+    print(f"{'File':<{name_w}}  {'Target':<{target_w}}  {'Status':<6}  {'Media(s)':>8}  {'Wall(s)':>8}  {'RTF':>6}")
+    print("-" * line_w)
+    for r in rows:
+        rtf = f"{r['rtf']:.2f}" if r['rtf'] is not None else "-"
+        print(f"{os.path.basename(r['file']):<{name_w}}  {r['target']:<{target_w}}  {r['status']:<6}  "
+              f"{r['duration']:>8.1f}  {r['wall']:>8.1f}  {rtf:>6}")
+        if r['error']:
+            print(f"    error: {r['error']}")
+    media_total = sum(r['duration'] for r in rows)
+    done = sum(1 for r in rows if r['status'] == 'done')
+    print("-" * line_w)
+    overall = f"{wall_total / media_total:.2f}" if media_total else "-"
+    print(f"{done}/{len(rows)} files dubbed, {media_total:.1f}s of media in {wall_total:.1f}s (overall RTF {overall})")
+
+
+def write_summary_csv(rows, path):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['file', 'target', 'status', 'duration', 'wall', 'rtf', 'output', 'error'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    from scripts.backend.ultraaudio.cancellation import parse_stage_timeouts
+
+    parser = argparse.ArgumentParser(description="Ultra Audio headless batch dubbing")
+    parser.add_argument("input", help="Directory of media files, a single file, or a .txt/.csv manifest")
+    parser.add_argument("-o", "--output-dir", required=True, help="Output tree (mirrors the input directory layout)")
+    parser.add_argument("--source", default="en-US", help="Source recognition language (default: en-US)")
+    parser.add_argument("--target", required=True,
+                        help="Target translation language, e.g. es; several (es,fr,de) share one recognition pass")
+    parser.add_argument("--voice", help="TTS voice (default: the target language's voice for --gender)")
+    parser.add_argument("--multitrack", action="store_true",
+                        help="With several targets, also write one video with an audio track per language")
+    parser.add_argument("--gender", choices=["Female", "Male"], default="Female")
+    parser.add_argument("--mode", choices=sorted(MODES), default="B", help="A = Full Ultra, B = Balanced, C = Basic")
+    parser.add_argument("--chunk-duration", type=int, default=60)
+    parser.add_argument("--rate", default="0%", help="Speaking rate, e.g. 10%%")
+    parser.add_argument("--pitch", default="medium")
+    parser.add_argument("--original-vol", type=float, default=0.0,
+                        help="Keep the original track under the dub of videos at this volume (0 = off)")
+    parser.add_argument("--jobs", type=int, default=2, help="Files processed concurrently (default: 2)")
+    parser.add_argument("--recognition-workers", type=int, default=1)
+    parser.add_argument("--chunk-strategy", choices=["fixed", "vad"], default="fixed")
+    parser.add_argument("--tts-workers", type=int, default=4)
+    parser.add_argument("--tts-batch-sec", type=float, default=6.0,
+                        help="Batch adjacent short segments into one TTS request, up to this much speech (0 = off)")
+    parser.add_argument("--max-stretch", type=float, default=1.25,
+                        help="Speed up clips that overrun their slot by at most this factor (1.0 = off)")
+    parser.add_argument("--video-mode", choices=["copy", "reencode"], default="copy")
+    parser.add_argument("--backend", choices=["azure", "offline"],
+                        help="Speech backend (default: $ULTRAAUDIO_SPEECH_BACKEND or azure)")
+    parser.add_argument("--no-transcript-cache", action="store_true",
+                        help="Always run speech recognition, even for media with a cached transcript")
+    parser.add_argument("--timeout", type=float, help="Stop a file that is still running after this many seconds")
+    parser.add_argument("--stage-timeout", action="append", default=[], metavar="STAGE=SECONDS",
+                        help="Deadline for one stage (extract, denoise, recognize, synthesize, mix, mux); repeatable")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also dub files in subdirectories")
+    args = parser.parse_args(argv)
+    try:
+        args.stage_timeouts = parse_stage_timeouts(args.stage_timeout)
+    except ValueError as e:
+        parser.error(str(e))
+    args.jobs = max(1, args.jobs)
+    args.output_dir = os.path.abspath(args.output_dir)
+
+    items = collect_inputs(args.input, args.recursive)
+    if not items:
+        print(f"No media files found in {args.input}")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"[BatchCLI] Dubbing {len(items)} files, {args.jobs} at a time -> {args.output_dir}")
+
+    t_start = time.time()
+    rows = run_batch(items, args)
+    print_summary(rows, time.time() - t_start)
+    write_summary_csv(rows, os.path.join(args.output_dir, "summary.csv"))
+    return 0 if all(r['status'] == 'done' for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,8 +17,14 @@ class DatabaseManager:
         return cls._instance
 
     def _init_db(self):
-        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        # Background job workers share this file from other processes: wait on locks
+        # instead of failing, and let readers proceed while a writer commits
+        self.conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=30)
         self.cursor = self.conn.cursor()
+        try:
+            self.cursor.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
         self._create_tables()
 
     def _create_tables(self):
@@ -57,7 +63,8 @@ class DatabaseManager:
                 timestamp TEXT,
                 type TEXT,
                 srt_path TEXT,
-                segments TEXT
+                segments TEXT,
+                timings TEXT
             )
         ''')
         
@@ -73,6 +80,12 @@ class DatabaseManager:
         except sqlite3.OperationalError:
             pass # Column likely already exists
 
+        # Migration: Ensure timings column exists (per-stage pipeline instrumentation)
+        try:
+            self.cursor.execute("ALTER TABLE dubbing_history ADD COLUMN timings TEXT")
+        except sqlite3.OperationalError:
+            pass
+
         # Migration: Ensure audio_base64 column exists in messages
         try:
             self.cursor.execute("ALTER TABLE messages ADD COLUMN audio_base64 TEXT")
@@ -98,6 +111,36 @@ class DatabaseManager:
             )
         ''')
         
+        # Background dubbing job queue (see job_worker.py)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS dubbing_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                kind TEXT,
+                status TEXT,
+                progress REAL,
+                message TEXT,
+                params TEXT,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                finished_at TEXT,
+                heartbeat REAL
+            )
+        ''')
+
+        # Liveness of job worker pools
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_workers (
+                worker TEXT PRIMARY KEY,
+                pid INTEGER,
+                workers INTEGER,
+                last_seen REAL
+            )
+        ''')
+
         # Heartbeats for active participants
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS heartbeats (
@@ -156,11 +199,12 @@ class DatabaseManager:
     def add_history_item(self, item, session_id):
         import json
         segments_json = json.dumps(item.get('segments', []))
+        timings_json = json.dumps(item['timings'], default=str) if item.get('timings') else None
         
         with self._lock:
             self.cursor.execute('''
-                INSERT INTO dubbing_history (session_id, video_path, audio_path, source_lang, target_lang, timestamp, type, srt_path, segments)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO dubbing_history (session_id, video_path, audio_path, source_lang, target_lang, timestamp, type, srt_path, segments, timings)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 session_id,
                 item.get('video_path'),
@@ -170,7 +214,8 @@ class DatabaseManager:
                 item.get('timestamp'),
                 item.get('type'),
                 item.get('srt'),
-                segments_json
+                segments_json,
+                timings_json
             ))
             self.conn.commit()
 
@@ -199,7 +244,7 @@ class DatabaseManager:
             
             # RE-IMPLEMENTING get_history with explicit columns to be safe
             self.cursor.execute('''
-                SELECT id, video_path, audio_path, source_lang, target_lang, timestamp, type, srt_path, segments 
+                SELECT id, video_path, audio_path, source_lang, target_lang, timestamp, type, srt_path, segments, timings 
                 FROM dubbing_history 
                 WHERE session_id = ? OR session_id IS NULL 
                 ORDER BY id DESC
@@ -212,6 +257,10 @@ class DatabaseManager:
                     segs = json.loads(row[8]) if row[8] else []
                 except:
                     segs = []
+                try:
+                    timings = json.loads(row[9]) if row[9] else None
+                except:
+                    timings = None
                     
                 history.append({
                     'id': row[0],
@@ -222,7 +271,8 @@ class DatabaseManager:
                     'timestamp': row[5],
                     'type': row[6],
                     'srt': row[7],
-                    'segments': segs
+                    'segments': segs,
+                    'timings': timings
                 })
             return history
 
@@ -288,3 +338,198 @@ class DatabaseManager:
                     'type': row[11]
                 })
             return videos
+
+    # --- Background job queue ---
+    def enqueue_job(self, session_id, params, kind='batch_studio'):
+        """Queue a dubbing job; ``params`` are the keyword arguments for ``process_media``."""
+        import json
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self.cursor.execute('''
+                INSERT INTO dubbing_jobs (session_id, kind, status, progress, message, params, created_at, heartbeat)
+                VALUES (?, ?, 'queued', 0, 'Waiting for a worker...', ?, ?, ?)
+            ''', (session_id, kind, json.dumps(params), timestamp, time.time()))
+            self.conn.commit()
+            return self.cursor.lastrowid
+
+    def claim_next_job(self, worker):
+        """Atomically move the oldest queued job to 'running' for ``worker``; returns it or None."""
+        import json
+        now = time.time()
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs
+                SET status = 'running', worker = ?, started_at = ?, heartbeat = ?, message = 'Starting...'
+                WHERE id = (SELECT id FROM dubbing_jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+                AND status = 'queued'
+            ''', (worker, time.strftime("%Y-%m-%d %H:%M:%S"), now))
+            self.conn.commit()
+            if self.cursor.rowcount == 0:
+                return None
+            self.cursor.execute('''
+                SELECT id, session_id, kind, params FROM dubbing_jobs
+                WHERE worker = ? AND status = 'running' ORDER BY started_at DESC, id DESC LIMIT 1
+            ''', (worker,))
+            row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {'id': row[0], 'session_id': row[1], 'kind': row[2], 'params': json.loads(row[3])}
+
+    def update_job_progress(self, job_id, progress=None, message=None):
+        """Progress/message update that also serves as the job's heartbeat."""
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs
+                SET progress = COALESCE(?, progress), message = COALESCE(?, message), heartbeat = ?
+                WHERE id = ?
+            ''', (progress, message, time.time(), job_id))
+            self.conn.commit()
+
+    def finish_job(self, job_id, result):
+        import json
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs
+                SET status = 'done', progress = 1, message = 'Completed', result = ?, finished_at = ?, heartbeat = ?
+                WHERE id = ?
+            ''', (json.dumps(result, default=str), time.strftime("%Y-%m-%d %H:%M:%S"), time.time(), job_id))
+            self.conn.commit()
+
+    def fail_job(self, job_id, error):
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs
+                SET status = 'failed', message = 'Failed', error = ?, finished_at = ?, heartbeat = ?
+                WHERE id = ?
+            ''', (str(error), time.strftime("%Y-%m-%d %H:%M:%S"), time.time(), job_id))
+            self.conn.commit()
+
+    def cancel_job(self, job_id):
+        """
+        Cancel a job. A queued job is canceled at once; a running one is marked
+        'canceling' and its worker stops it at the next check. Returns True if the
+        job was queued or running.
+        """
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs SET status = 'canceled', message = 'Canceled', finished_at = ?
+                WHERE id = ? AND status = 'queued'
+            ''', (time.strftime("%Y-%m-%d %H:%M:%S"), job_id))
+            canceled = self.cursor.rowcount > 0
+            if not canceled:
+                self.cursor.execute('''
+                    UPDATE dubbing_jobs SET status = 'canceling', message = 'Canceling...'
+                    WHERE id = ? AND status = 'running'
+                ''', (job_id,))
+                canceled = self.cursor.rowcount > 0
+            self.conn.commit()
+            return canceled
+
+    def cancel_requested(self, job_id):
+        """True when a running job was asked to stop (see ``cancel_job``)."""
+        with self._lock:
+            self.cursor.execute("SELECT status FROM dubbing_jobs WHERE id = ?", (job_id,))
+            row = self.cursor.fetchone()
+        return bool(row) and row[0] == 'canceling'
+
+    def mark_job_canceled(self, job_id, message='Canceled'):
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs SET status = 'canceled', message = ?, finished_at = ?, heartbeat = ?
+                WHERE id = ?
+            ''', (message, time.strftime("%Y-%m-%d %H:%M:%S"), time.time(), job_id))
+            self.conn.commit()
+
+    def requeue_stale_jobs(self, stale_after=60):
+        """Put 'running' jobs whose worker stopped heartbeating back in the queue (they resume from checkpoints)."""
+        cutoff = time.time() - stale_after
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE dubbing_jobs SET status = 'queued', worker = NULL, message = 'Requeued after worker loss'
+                WHERE status = 'running' AND heartbeat < ?
+            ''', (cutoff,))
+            requeued = self.cursor.rowcount
+            # Nothing left to stop for a job whose worker died while canceling it
+            self.cursor.execute('''
+                UPDATE dubbing_jobs SET status = 'canceled', message = 'Canceled', finished_at = ?
+                WHERE status = 'canceling' AND heartbeat < ?
+            ''', (time.strftime("%Y-%m-%d %H:%M:%S"), cutoff))
+            self.conn.commit()
+            return requeued
+
+    def referenced_paths(self):
+        """
+        Files the app still points at: history and video library outputs, plus the
+        inputs of queued and running jobs. The workspace manager never evicts these.
+        """
+        import json
+        paths = set()
+        with self._lock:
+            self.cursor.execute("SELECT video_path, audio_path FROM dubbing_history")
+            rows = self.cursor.fetchall()
+            self.cursor.execute("SELECT video_path, audio_path FROM video_outputs")
+            rows += self.cursor.fetchall()
+            self.cursor.execute(
+                "SELECT params FROM dubbing_jobs WHERE status IN ('queued', 'running', 'canceling')"
+            )
+            job_rows = self.cursor.fetchall()
+        for row in rows:
+            paths.update(p for p in row if p)
+        for (params,) in job_rows:
+            try:
+                input_path = json.loads(params).get('input_path')
+            except (TypeError, ValueError):
+                continue
+            if input_path:
+                paths.add(input_path)
+        return paths
+
+    def get_jobs(self, session_id, limit=20):
+        """Most recent jobs of a session, newest first."""
+        with self._lock:
+            self.cursor.execute('''
+                SELECT id, status, progress, message, params, error, created_at, started_at, finished_at
+                FROM dubbing_jobs
+                WHERE session_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (session_id, limit))
+            rows = self.cursor.fetchall()
+        import json
+        jobs = []
+        for row in rows:
+            try:
+                params = json.loads(row[4]) if row[4] else {}
+            except:
+                params = {}
+            jobs.append({
+                'id': row[0],
+                'status': row[1],
+                'progress': row[2] or 0.0,
+                'message': row[3],
+                'params': params,
+                'error': row[5],
+                'created_at': row[6],
+                'started_at': row[7],
+                'finished_at': row[8]
+            })
+        return jobs
+
+    def worker_heartbeat(self, worker, pid, workers):
+        with self._lock:
+            self.cursor.execute('''
+                INSERT OR REPLACE INTO job_workers (worker, pid, workers, last_seen)
+                VALUES (?, ?, ?, ?)
+            ''', (worker, pid, workers, time.time()))
+            self.conn.commit()
+
+    def remove_worker(self, worker):
+        with self._lock:
+            self.cursor.execute("DELETE FROM job_workers WHERE worker = ?", (worker,))
+            self.conn.commit()
+
+    def active_worker_pools(self, active_threshold=15):
+        cutoff = time.time() - active_threshold
+        with self._lock:
+            self.cursor.execute("SELECT worker, pid, workers FROM job_workers WHERE last_seen > ?", (cutoff,))
+            return self.cursor.fetchall()
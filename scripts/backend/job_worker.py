@@ -0,0 +1,252 @@
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+# Insert project root so `scripts` package can be imported
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from scripts.backend.db import DatabaseManager
+
+JOB_WORKERS_ENV = "ULTRAAUDIO_JOB_WORKERS"
+DEFAULT_WORKERS = 2
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 5.0
+# How often a running job checks whether it was canceled from the UI
+CANCEL_POLL_INTERVAL = 1.0
+# A running job whose worker has not heartbeated for this long is requeued
+STALE_AFTER = 60.0
+# How often the pool applies output retention and the workspace disk quota
+SWEEP_INTERVAL = 600.0
+# Grace period for workers to exit on shutdown before they are killed
+SHUTDOWN_TIMEOUT = 10.0
+
+
+def configured_workers():
+    try:
+        return max(1, int(os.getenv(JOB_WORKERS_ENV, DEFAULT_WORKERS)))
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+def record_video_output(db, job, result):
+    """Mirror a finished batch job into the video_outputs table (as the Batch Studio UI used to)."""
+    params = job['params']
+    video_path = result.get('video_path')
+    file_size = 0
+    if video_path and os.path.exists(video_path):
+        file_size = os.path.getsize(video_path)
+    db.add_video_output(
+        session_id=job['session_id'],
+        title=f"Dubbed Video - {params.get('target_lang_name')}",
+        description=f"Dubbed from {params.get('source_lang_name')} to {params.get('target_lang_name')} using {params.get('mode')} mode",
+        video_path=video_path,
+        audio_path=result.get('audio_path'),
+        source_lang=params.get('source_lang_name'),
+        target_lang=params.get('target_lang_name'),
+        quality_mode=params.get('mode'),
+        duration=result.get('duration') or 0.0,
+        file_size=file_size,
+        output_type=job['kind']
+    )
+
+
+def run_job(db, job):
+    """
+    Run one claimed job through the pipeline, reporting progress into its queue row.
+    The job stops when it is canceled in the queue or passes its deadline
+    ($ULTRAAUDIO_JOB_TIMEOUT / $ULTRAAUDIO_STAGE_TIMEOUTS).
+    """
+    from scripts.backend.ultraaudio.pipeline import process_media
+    from scripts.backend.ultraaudio.backends import get_speech_backend
+    from scripts.backend.ultraaudio.cancellation import (
+        CancelToken, JobCancelled, DeadlineExceeded, configured_timeouts
+    )
+
+    job_id = job['id']
+    params = dict(job['params'])
+    backend = get_speech_backend(params.pop('backend', None))
+    last_update = {'t': 0.0, 'progress': 0.0}
+    done = threading.Event()
+    job_timeout, stage_timeouts = configured_timeouts()
+    cancel = CancelToken(job_timeout, name=f"Job {job_id}")
+
+    def heartbeat():
+        # Long stages report no progress for a while; keep the job from looking stale
+        last_beat = time.time()
+        while not done.wait(CANCEL_POLL_INTERVAL):
+            # A transient DB error (e.g. 'database is locked') must not end the heartbeat,
+            # or the job is requeued as stale and runs twice
+            try:
+                if not cancel.cancelled and db.cancel_requested(job_id):
+                    print(f"[JobWorker] Canceling job {job_id}")
+                    cancel.cancel("Canceled by user")
+                if time.time() - last_beat >= HEARTBEAT_INTERVAL:
+                    db.update_job_progress(job_id)
+                    last_beat = time.time()
+            except Exception as e:
+                print(f"[JobWorker] Heartbeat for job {job_id} failed (retrying): {e}")
+
+    def on_progress(fraction, text):
+        now = time.time()
+        last_update['progress'] = fraction
+        if now - last_update['t'] >= 1.0:
+            last_update['t'] = now
+            db.update_job_progress(job_id, progress=min(fraction, 1.0), message=text)
+
+    def on_status(text):
+        db.update_job_progress(job_id, progress=last_update['progress'], message=text)
+
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    t_start = time.time()
+    try:
+        result = process_media(
+            backend=backend, session_id=job['session_id'], cancel=cancel,
+            stage_timeouts=params.pop('stage_timeouts', None) or stage_timeouts,
+            on_progress=on_progress, on_status=on_status, **params
+        )
+        db.finish_job(job_id, result)
+        print(f"[JobWorker] Job {job_id} done in {time.time() - t_start:.1f}s")
+        if job['kind'] == 'batch_studio' and not result.get('reused'):
+            try:
+                record_video_output(db, job, result)
+            except Exception as e:
+                print(f"[JobWorker] Failed to save video output for job {job_id}: {e}")
+    except DeadlineExceeded as e:
+        print(f"[JobWorker] Job {job_id} timed out: {e}")
+        db.fail_job(job_id, e)
+    except JobCancelled as e:
+        print(f"[JobWorker] Job {job_id} canceled: {e}")
+        db.mark_job_canceled(job_id, str(e))
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        db.fail_job(job_id, e)
+    finally:
+        done.set()
+        cancel.close()
+
+
+def worker_loop(worker_name):
+    """One worker process: claim and run jobs until killed."""
+    db = DatabaseManager()
+    parent = multiprocessing.parent_process()
+    print(f"[JobWorker] {worker_name} ready")
+    while True:
+        if parent is not None and not parent.is_alive():
+            # Supervisor is gone; its replacement will start fresh workers
+            return
+        job = db.claim_next_job(worker_name)
+        if job is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+        print(f"[JobWorker] {worker_name} picked job {job['id']}")
+        run_job(db, job)
+
+
+def run_pool(workers):
+    """
+    Supervisor: keeps ``workers`` worker processes alive, heartbeats the pool,
+    requeues jobs orphaned by a dead worker (they resume from their checkpoints) and
+    periodically sweeps the workspace (see ``WorkspaceManager``).
+    """
+    from scripts.backend.ultraaudio.workspace import get_workspace
+
+    # Spawned (not forked) so no worker inherits the parent's SQLite connection
+    ctx = multiprocessing.get_context("spawn")
+    pool_name = f"{socket.gethostname()}:{os.getpid()}"
+    db = DatabaseManager()
+    db.remove_worker(f"{socket.gethostname()}:starting")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    procs = {}
+    last_sweep = 0.0
+    print(f"[JobWorker] Pool {pool_name} starting {workers} workers")
+    try:
+        while True:
+            requeued = db.requeue_stale_jobs(STALE_AFTER)
+            if requeued:
+                print(f"[JobWorker] Requeued {requeued} stale jobs")
+            for i in range(workers):
+                proc = procs.get(i)
+                if proc is None or not proc.is_alive():
+                    if proc is not None:
+                        print(f"[JobWorker] Worker {i} exited ({proc.exitcode}); restarting")
+                    # Not daemonic: jobs start process pools of their own (block-wise denoise),
+                    # which daemonic processes may not do. stop_workers ends them instead.
+                    proc = ctx.Process(target=worker_loop, args=(f"{pool_name}:{i}",))
+                    proc.start()
+                    procs[i] = proc
+            db.worker_heartbeat(pool_name, os.getpid(), workers)
+            if time.time() - last_sweep >= SWEEP_INTERVAL:
+                last_sweep = time.time()
+                try:
+                    get_workspace().sweep()
+                except Exception as e:
+                    print(f"[JobWorker] Workspace sweep failed: {e}")
+            time.sleep(HEARTBEAT_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.remove_worker(pool_name)
+        stop_workers(procs.values())
+
+
+def stop_workers(procs, timeout=SHUTDOWN_TIMEOUT):
+    """Terminate worker processes and wait for them; kill the ones that do not exit in time."""
+    procs = [proc for proc in procs if proc.is_alive()]
+    for proc in procs:
+        proc.terminate()
+    deadline = time.time() + timeout
+    for proc in procs:
+        proc.join(max(0.0, deadline - time.time()))
+        if proc.is_alive():
+            print(f"[JobWorker] Worker pid {proc.pid} did not exit; killing it")
+            proc.kill()
+            proc.join()
+
+
+def ensure_worker_pool(workers=None):
+    """
+    Start a detached worker pool unless one is already heartbeating.
+
+    The pool runs with the caller's working directory (so it shares ``app.db``) and
+    logs to ``job_worker.log`` there. Returns True if a pool was started.
+    """
+    db = DatabaseManager()
+    if db.active_worker_pools(HEARTBEAT_INTERVAL * 3):
+        return False
+    workers = workers or configured_workers()
+    log = open(os.path.join(os.getcwd(), "job_worker.log"), "a")
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    subprocess.Popen(
+        [sys.executable, "-u", os.path.abspath(__file__), "--workers", str(workers)],
+        stdout=log, stderr=subprocess.STDOUT, **kwargs
+    )
+    log.close()
+    # Count the new pool as alive right away so concurrent callers don't start another
+    db.worker_heartbeat(f"{socket.gethostname()}:starting", None, workers)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ultra Audio background dubbing workers")
+    parser.add_argument("--workers", type=int, default=configured_workers(),
+                        help=f"Concurrent jobs (default: ${JOB_WORKERS_ENV} or {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+    run_pool(max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
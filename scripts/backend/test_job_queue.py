@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend import db as db_module
+from scripts.backend.db import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # A fresh database per test instead of the shared app.db singleton
+    monkeypatch.setattr(db_module, 'DB_PATH', str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(DatabaseManager, '_instance', None)
+    manager = DatabaseManager()
+    yield manager
+    manager.conn.close()
+
+
+def job_status(db, job_id):
+    db.cursor.execute("SELECT status, worker FROM dubbing_jobs WHERE id = ?", (job_id,))
+    return db.cursor.fetchone()
+
+
+def age_heartbeat(db, job_id, seconds):
+    db.cursor.execute("UPDATE dubbing_jobs SET heartbeat = ? WHERE id = ?", (time.time() - seconds, job_id))
+    db.conn.commit()
+
+
+def test_claim_returns_each_job_once_in_queue_order(db):
+    first = db.enqueue_job("s1", {'input_path': "a.wav"})
+    second = db.enqueue_job("s1", {'input_path': "b.wav"})
+
+    job = db.claim_next_job("w1")
+    assert job == {'id': first, 'session_id': "s1", 'kind': 'batch_studio', 'params': {'input_path': "a.wav"}}
+    assert db.claim_next_job("w2")['id'] == second
+    assert db.claim_next_job("w3") is None
+    assert job_status(db, first) == ('running', "w1")
+
+
+def test_canceled_job_is_not_claimed(db):
+    job_id = db.enqueue_job("s1", {})
+    assert db.cancel_job(job_id)
+    assert db.claim_next_job("w1") is None
+    assert job_status(db, job_id)[0] == 'canceled'
+
+
+def test_cancel_of_a_running_job_waits_for_its_worker(db):
+    job_id = db.enqueue_job("s1", {})
+    db.claim_next_job("w1")
+    assert db.cancel_job(job_id)
+    assert db.cancel_requested(job_id)
+    db.mark_job_canceled(job_id)
+    assert not db.cancel_requested(job_id)
+    assert not db.cancel_job(job_id)
+
+
+def test_stale_running_job_is_requeued_and_claimed_again(db):
+    job_id = db.enqueue_job("s1", {'input_path': "a.wav"})
+    db.claim_next_job("w1")
+    age_heartbeat(db, job_id, 120)
+
+    assert db.requeue_stale_jobs(stale_after=60) == 1
+    assert job_status(db, job_id) == ('queued', None)
+    assert db.claim_next_job("w2")['id'] == job_id
+
+
+def test_job_with_a_recent_heartbeat_is_not_requeued(db):
+    job_id = db.enqueue_job("s1", {})
+    db.claim_next_job("w1")
+    age_heartbeat(db, job_id, 120)
+    db.update_job_progress(job_id, 0.5, "Translating...")
+
+    assert db.requeue_stale_jobs(stale_after=60) == 0
+    assert job_status(db, job_id) == ('running', "w1")
+
+
+def test_stale_canceling_job_is_canceled_not_requeued(db):
+    job_id = db.enqueue_job("s1", {})
+    db.claim_next_job("w1")
+    db.cancel_job(job_id)
+    age_heartbeat(db, job_id, 120)
+
+    assert db.requeue_stale_jobs(stale_after=60) == 0
+    assert job_status(db, job_id)[0] == 'canceled'
+    assert db.claim_next_job("w2") is None
+
+
+def test_finished_jobs_keep_their_result(db):
+    job_id = db.enqueue_job("s1", {})
+    db.claim_next_job("w1")
+    db.finish_job(job_id, {'video_path': "out.mp4"})
+
+    job = db.get_jobs("s1")[0]
+    assert job['status'] == 'done'
+    assert job['progress'] == 1
+    assert db.requeue_stale_jobs(stale_after=0) == 0
+
+
+def test_referenced_paths_include_pending_job_inputs(db):
+    db.enqueue_job("s1", {'input_path': "running.wav"})
+    done = db.enqueue_job("s1", {'input_path': "done.wav"})
+    db.claim_next_job("w1")
+    db.claim_next_job("w1")
+    db.finish_job(done, {})
+
+    paths = db.referenced_paths()
+    assert "running.wav" in paths
+    assert "done.wav" not in paths
@@ -0,0 +1,130 @@
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.mixer import (
+    fit_clips_to_slots, mix_streaming, mix_timeline, read_wav_samples, resolve_overlap_offsets, wav_duration
+)
+
+SAMPLE_RATE = 16000
+
+
+def write_tone(path, duration_sec, value=0.25, sample_rate=SAMPLE_RATE):
+    pcm = np.full(int(duration_sec * sample_rate), int(value * 32767), dtype='<i2')
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+    return str(path)
+
+
+def test_overlapping_clip_is_pushed_after_the_previous_one(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 1.0)
+    b = write_tone(tmp_path / "b.wav", 0.5)
+    c = write_tone(tmp_path / "c.wav", 0.5)
+
+    placements = resolve_overlap_offsets([(c, 3.0), (a, 0.0), (b, 0.5)], gap_sec=0.05)
+    assert [(p, round(s, 3), round(d, 3)) for p, s, d in placements] == [
+        (a, 0.0, 1.0), (b, 1.05, 0.5), (c, 3.0, 0.5)
+    ]
+
+
+def test_unreadable_clip_is_skipped(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 1.0)
+    placements = resolve_overlap_offsets([(str(tmp_path / "missing.wav"), 0.0), (a, 2.0)])
+    assert placements == [(a, 2.0, 1.0)]
+
+
+def test_mix_timeline_places_and_sums_clips(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 1.0, 0.25)
+    b = write_tone(tmp_path / "b.wav", 1.0, 0.25)
+    out = str(tmp_path / "mix.wav")
+
+    stats = mix_timeline([(a, 0.0, 1.0), (b, 0.5, 1.0)], 2.0, out, SAMPLE_RATE)
+    assert stats['clips'] == 2
+    assert stats['samples'] == 2 * SAMPLE_RATE
+
+    mixed = read_wav_samples(out)
+    at = lambda sec: mixed[int(sec * SAMPLE_RATE)]
+    assert abs(at(0.25) - 0.25) < 1e-3
+    assert abs(at(0.75) - 0.5) < 1e-3
+    assert abs(at(1.25) - 0.25) < 1e-3
+    assert at(1.75) == 0.0
+
+
+def test_mix_timeline_clips_the_sum_and_adds_ambience(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 1.0, 0.75)
+    b = write_tone(tmp_path / "b.wav", 1.0, 0.75)
+    ambience = write_tone(tmp_path / "bgm.wav", 2.0, 0.5, sample_rate=8000)
+    out = str(tmp_path / "mix.wav")
+
+    mix_timeline([(a, 0.0, 1.0), (b, 0.0, 1.0)], 2.0, out, SAMPLE_RATE,
+                 ambience_path=ambience, ambience_gain=0.2)
+    mixed = read_wav_samples(out)
+    assert len(mixed) == 2 * SAMPLE_RATE
+    assert abs(mixed[SAMPLE_RATE // 2] - 1.0) < 1e-3
+    assert abs(mixed[3 * SAMPLE_RATE // 2] - 0.1) < 1e-3
+
+
+def test_overrunning_clip_is_stretched_into_its_slot(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 1.2)
+    b = write_tone(tmp_path / "b.wav", 0.5)
+
+    fitted, stats = fit_clips_to_slots([(b, 1.0), (a, 0.0)], 2.0, max_speedup=1.25)
+    assert fitted[0] == (str(tmp_path / "a_fit.wav"), 0.0)
+    assert fitted[1] == (b, 1.0)
+    assert abs(wav_duration(fitted[0][0]) - 1.0) < 0.05
+    assert stats['stretched'] == 1
+    assert abs(stats['max_factor'] - 1.2) < 1e-9
+    assert stats['residual_overrun_sec'] < 1e-9
+
+
+def test_stretch_is_capped_and_the_rest_reported(tmp_path):
+    a = write_tone(tmp_path / "a.wav", 2.0)
+
+    fitted, stats = fit_clips_to_slots([(a, 0.0)], 1.0, max_speedup=1.25)
+    assert stats['max_factor'] == 1.25
+    assert abs(stats['residual_overrun_sec'] - 0.6) < 1e-9
+    assert abs(wav_duration(fitted[0][0]) - 1.6) < 0.05
+
+
+def test_streaming_mix_matches_the_timeline_mix(tmp_path):
+    clips = [write_tone(tmp_path / f"c{i}.wav", 0.7, 0.1 * (i + 1)) for i in range(4)]
+    placements = [(path, 0.5 * i, 0.7) for i, path in enumerate(clips)]
+    ambience = write_tone(tmp_path / "bgm.wav", 3.0, 0.3)
+    whole = str(tmp_path / "whole.wav")
+    windowed = str(tmp_path / "windowed.wav")
+
+    mix_timeline(placements, 3.0, whole, SAMPLE_RATE, ambience_path=ambience, ambience_gain=0.15)
+    # Windows much shorter than a clip, so clips span several of them
+    stats = mix_streaming(placements, 3.0, windowed, SAMPLE_RATE,
+                          ambience_path=ambience, ambience_gain=0.15, window_sec=0.3)
+    assert stats['clips'] == 4
+    assert stats['windows'] == 10
+    assert np.array_equal(read_wav_samples(whole), read_wav_samples(windowed))
+
+
+def test_canceled_streaming_mix_leaves_no_output(tmp_path):
+    class Canceled(Exception):
+        pass
+
+    class CancelAfter:
+        def __init__(self, windows):
+            self.windows = windows
+
+        def check(self):
+            self.windows -= 1
+            if self.windows < 0:
+                raise Canceled()
+
+    a = write_tone(tmp_path / "a.wav", 1.0)
+    out = str(tmp_path / "mix.wav")
+    with pytest.raises(Canceled):
+        mix_streaming([(a, 0.0, 1.0)], 3.0, out, SAMPLE_RATE, window_sec=0.5, cancel=CancelAfter(2))
+    assert not os.path.exists(out)
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.rate_model import (
+    DEFAULT_CHARS_PER_SEC, RATE_STEP, SpeakingRateModel, format_rate, parse_rate
+)
+
+TEXT = "x" * 30
+
+
+def test_parse_and_format_rate_round_trip():
+    assert parse_rate("+20%") == 20
+    assert parse_rate("-10%") == -10
+    assert parse_rate("fast") == 0
+    assert format_rate(20) == "+20%"
+    assert format_rate(0) == "0%"
+    assert format_rate(-5) == "-5%"
+
+
+def test_unknown_voice_uses_the_prior(tmp_path):
+    model = SpeakingRateModel(str(tmp_path / "rates.json"))
+    assert model.chars_per_sec("azure", "v") == DEFAULT_CHARS_PER_SEC
+    assert model.predict_duration("azure", "v", TEXT) == 2.0
+    assert model.predict_duration("azure", "v", TEXT, "+100%") == 1.0
+
+
+def test_observations_are_normalized_to_rate_zero(tmp_path):
+    model = SpeakingRateModel(str(tmp_path / "rates.json"))
+    # 30 chars in 2s at +50% is 30 chars in 3s at 0%
+    model.observe("azure", "v", TEXT, "+50%", 2.0)
+    chars_per_sec = (30 + DEFAULT_CHARS_PER_SEC * 5.0) / (3.0 + 5.0)
+    assert abs(model.chars_per_sec("azure", "v") - chars_per_sec) < 1e-9
+
+
+def test_choose_rate_is_quantized_and_bounded(tmp_path):
+    model = SpeakingRateModel(str(tmp_path / "rates.json"))
+    assert model.choose_rate("azure", "v", TEXT, slot_sec=4.0) == "0%"
+    for slot_sec in (1.9, 1.8, 1.7, 1.6, 1.5):
+        percent = parse_rate(model.choose_rate("azure", "v", TEXT, slot_sec=slot_sec))
+        assert percent > 0
+        assert percent % RATE_STEP == 0
+    assert model.choose_rate("azure", "v", TEXT, slot_sec=0.1, max_boost=50) == "+50%"
+    assert model.choose_rate("azure", "v", TEXT, slot_sec=0.1, base_rate="+10%", max_boost=20) == "+30%"
+
+
+def test_close_slots_share_one_rate(tmp_path):
+    model = SpeakingRateModel(str(tmp_path / "rates.json"))
+    # A slightly different learned speed must not change the TTS cache key
+    rates = {model.choose_rate("azure", "v", TEXT, slot_sec=slot) for slot in (1.70, 1.71, 1.72)}
+    assert len(rates) == 1
+
+
+def test_save_merges_observations_of_every_instance(tmp_path):
+    path = str(tmp_path / "rates.json")
+    first = SpeakingRateModel(path)
+    second = SpeakingRateModel(path)
+    first.observe("azure", "v", TEXT, "0%", 2.0)
+    second.observe("azure", "v", TEXT, "0%", 2.0)
+    second.observe("azure", "w", TEXT, "0%", 2.0)
+    first.save()
+    second.save()
+    # Saving again without new observations must not count them twice
+    first.save()
+
+    reloaded = SpeakingRateModel(path)
+    assert reloaded.get_stats("azure", "v")['observed_clips'] == 2
+    assert reloaded.get_stats("azure", "w")['observed_clips'] == 1
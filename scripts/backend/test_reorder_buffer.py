@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.reorder_buffer import ReorderBuffer
+
+
+def test_in_order_results_are_delivered():
+    buf = ReorderBuffer()
+    for i in range(3):
+        buf.put(i, f"phrase {i}")
+    assert [buf.get(timeout=1) for _ in range(3)] == ["phrase 0", "phrase 1", "phrase 2"]
+    assert buf.get_stats()['delivered'] == 3
+
+
+def test_out_of_order_results_are_released_by_id():
+    buf = ReorderBuffer()
+    buf.put(2, "c")
+    buf.put(1, "b")
+    assert buf.get(timeout=0.05) is None
+    buf.put(0, "a")
+    assert [buf.get(timeout=1) for _ in range(3)] == ["a", "b", "c"]
+    stats = buf.get_stats()
+    assert stats['max_depth'] == 3
+    assert stats['buffered'] == 0
+    assert stats['hol_blocking_sec'] > 0
+
+
+def test_skipped_id_is_passed_over():
+    buf = ReorderBuffer()
+    buf.put(1, "b")
+    buf.skip(0)
+    assert buf.get(timeout=1) == "b"
+    stats = buf.get_stats()
+    assert stats['skipped'] == 1
+    assert stats['deadline_skips'] == 0
+
+
+def test_overdue_id_is_given_up_and_its_late_result_dropped(capsys):
+    buf = ReorderBuffer(deadline_sec=0.1)
+    buf.expect(0)
+    buf.put(1, "b")
+    start = time.time()
+    assert buf.get(timeout=2) == "b"
+    assert time.time() - start < 1.0
+    buf.put(0, "a")
+    stats = buf.get_stats()
+    assert stats['deadline_skips'] == 1
+    assert stats['late_drops'] == 1
+    assert stats['buffered'] == 0
+    # Skips are reported through get_stats only, not printed per phrase
+    assert capsys.readouterr().out == ""
+
+
+def test_missing_id_is_not_skipped_while_nothing_waits_behind_it():
+    buf = ReorderBuffer(deadline_sec=0.05)
+    buf.expect(0)
+    assert buf.get(timeout=0.2) is None
+    buf.put(0, "a")
+    assert buf.get(timeout=1) == "a"
+    assert buf.get_stats()['deadline_skips'] == 0
+
+
+def test_get_blocks_until_the_next_id_arrives():
+    buf = ReorderBuffer()
+    threading.Timer(0.05, buf.put, args=(0, "a")).start()
+    assert buf.get(timeout=2) == "a"
+
+
+def test_close_wakes_a_blocked_consumer():
+    buf = ReorderBuffer()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(buf.get()))
+    consumer.start()
+    time.sleep(0.05)
+    buf.close()
+    consumer.join(timeout=2)
+    assert not consumer.is_alive()
+    assert results == [None]
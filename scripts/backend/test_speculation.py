@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.backends import SynthesisResult
+from scripts.backend.ultraaudio.speculation import PartialStabilizer, Speculator
+
+
+def fake_synthesize(text):
+    # Raw 16-bit PCM, one sample per character
+    return SynthesisResult(audio_data=b"\x01\x00" * max(len(text), 6), latency_ms=10.0)
+
+
+def speculate(speculator, partials):
+    for text in partials:
+        speculator.on_partial(text, fake_synthesize)
+    pieces = speculator.take()
+    # The final result arrives after the speculative syntheses finished
+    wait([piece.future for piece in pieces])
+    return pieces
+
+
+def test_stabilizer_waits_for_repeated_hypotheses():
+    stabilizer = PartialStabilizer(stability=2, min_words=3)
+    assert stabilizer.feed("Hola,") is None
+    assert stabilizer.feed("Hola, amigo") == "Hola,"
+    # The stable span was handed out already
+    assert stabilizer.feed("Hola, amigo") is None
+
+
+def test_stabilizer_cuts_after_the_last_clause_boundary():
+    stabilizer = PartialStabilizer(stability=2, min_words=10)
+    stabilizer.feed("Yes, I think so. But")
+    assert stabilizer.feed("Yes, I think so. But then") == "Yes, I think so."
+
+
+def test_stabilizer_needs_min_words_without_a_boundary():
+    stabilizer = PartialStabilizer(stability=2, min_words=3)
+    stabilizer.feed("one two")
+    assert stabilizer.feed("one two three") is None
+    assert stabilizer.feed("one two three four") == "one two three"
+
+
+def test_stabilizer_reset_starts_a_new_utterance():
+    stabilizer = PartialStabilizer(stability=2, min_words=1)
+    stabilizer.feed("first")
+    assert stabilizer.feed("first") == "first"
+    stabilizer.reset()
+    assert stabilizer.feed("second") is None
+    assert stabilizer.feed("second") == "second"
+
+
+def test_claim_reuses_pieces_that_open_the_final_text():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        speculator = Speculator(executor, stability=2, min_words=3)
+        pieces = speculate(speculator, ["Hola,", "Hola, amigo", "Hola, amigo mío"])
+        assert [p.text for p in pieces] == ["Hola,"]
+        audio = []
+        rest = speculator.claim(pieces, "Hola, amigo mío", audio.append)
+    assert rest == "amigo mío"
+    assert b"".join(audio) == fake_synthesize("Hola,").audio_data
+    stats = speculator.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 0
+    assert stats['utterances_hit'] == 1
+    assert stats['saved_synthesis_ms'] == 10.0
+
+
+def test_claim_discards_pieces_after_a_mismatch():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        speculator = Speculator(executor, stability=2, min_words=3)
+        pieces = speculate(speculator, [
+            "Hola,", "Hola, amigo", "Hola, amigo mío que", "Hola, amigo mío que tal"
+        ])
+        assert [p.text for p in pieces] == ["Hola,", "amigo mío que"]
+        audio = []
+        rest = speculator.claim(pieces, "Hola, amiga mía, qué tal estás?", audio.append)
+    assert rest == "amiga mía, qué tal estás?"
+    assert len(audio) == 1
+    stats = speculator.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['wasted_chars'] == len("amigo mío que")
+
+
+def test_discarding_a_queued_piece_cancels_it_without_waste():
+    release = threading.Event()
+
+    def blocked(text):
+        release.wait(2)
+        return fake_synthesize(text)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        speculator = Speculator(executor, stability=1, min_words=1)
+        speculator.on_partial("Guten", blocked)
+        speculator.on_partial("Guten Tag,", blocked)
+        first, queued = speculator.take()
+        speculator.discard([queued])
+        release.set()
+        wait([first.future])
+    assert queued.future.cancelled()
+    stats = speculator.get_stats()
+    assert stats['misses'] == 1
+    assert stats['wasted_chars'] == 0
+
+
+def test_claim_stops_at_a_piece_without_audio():
+    def synthesize(text):
+        # A synthesis that "succeeds" with no audio must not be spliced in
+        return SynthesisResult(audio_data=b"", latency_ms=5.0)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        speculator = Speculator(executor, stability=1, min_words=1)
+        speculator.on_partial("Bonjour,", synthesize)
+        audio = []
+        rest = speculator.claim(speculator.take(), "Bonjour, Marie", audio.append)
+    assert rest == "Bonjour, Marie"
+    assert audio == []
+    stats = speculator.get_stats()
+    assert stats['failures'] == 1
+    assert stats['hits'] == 0
+    assert stats['utterances_hit'] == 0
+
+
+def test_claim_survives_a_failed_piece():
+    def synthesize(text):
+        raise RuntimeError("engine down")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        speculator = Speculator(executor, stability=1, min_words=1)
+        speculator.on_partial("Ciao,", synthesize)
+        rest = speculator.claim(speculator.take(), "Ciao, Luca", lambda chunk: None)
+    assert rest == "Ciao, Luca"
+    assert speculator.get_stats()['failures'] == 1
+
+
+def test_on_partial_after_executor_shutdown_is_ignored():
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.shutdown()
+    speculator = Speculator(executor, stability=1, min_words=1)
+    speculator.on_partial("Hallo,", fake_synthesize)
+    assert speculator.take() == []
+    assert speculator.get_stats()['speculated'] == 0
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.backends import SynthesisResult
+from scripts.backend.ultraaudio.synth_pool import SynthesizerPool
+
+
+class FakeSynthesizer:
+    def __init__(self, release):
+        self.release = release
+        self.closed = False
+
+    def open_connection(self):
+        pass
+
+    def speak_ssml(self, ssml):
+        self.release.wait(2)
+        return SynthesisResult(audio_data=b"\x00\x00" * 8)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBackend:
+    def __init__(self):
+        self.release = threading.Event()
+        self.synthesizers = []
+
+    def create_synthesizer(self, voice_name, output_format=None):
+        syn = FakeSynthesizer(self.release)
+        self.synthesizers.append(syn)
+        return syn
+
+
+def test_requests_share_the_pooled_synthesizer():
+    backend = FakeBackend()
+    backend.release.set()
+    pool = SynthesizerPool(backend, "v", size=1)
+    assert pool.speak_ssml("<speak/>").ok
+    assert pool.speak_ssml("<speak/>").ok
+    assert len(backend.synthesizers) == 1
+    assert pool.get_stats()['segments'] == 2
+
+
+def test_timeout_returns_an_error_result():
+    backend = FakeBackend()
+    pool = SynthesizerPool(backend, "v", size=1)
+    busy = threading.Thread(target=pool.speak_ssml, args=("<speak/>",))
+    busy.start()
+    time.sleep(0.05)
+
+    result = pool.speak_ssml("<speak/>", timeout=0.05)
+    assert not result.ok
+    assert "No synthesizer free" in result.error
+    backend.release.set()
+    busy.join()
+
+
+def test_close_wakes_waiting_requests():
+    backend = FakeBackend()
+    pool = SynthesizerPool(backend, "v", size=1)
+    busy = threading.Thread(target=pool.speak_ssml, args=("<speak/>",))
+    busy.start()
+    time.sleep(0.05)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(pool.speak_ssml("<speak/>")))
+    waiter.start()
+    time.sleep(0.05)
+
+    pool.close()
+    waiter.join(timeout=2)
+    assert not waiter.is_alive()
+    assert results[0].error == "Synthesizer pool is closed"
+
+    # The in-flight synthesizer is closed when it comes back, not pooled again
+    backend.release.set()
+    busy.join(timeout=2)
+    assert all(syn.closed for syn in backend.synthesizers)
+    assert pool.speak_ssml("<speak/>").error == "Synthesizer pool is closed"
@@ -0,0 +1,102 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from scripts.backend.ultraaudio.transcript_cache import TranscriptCache, translate_transcript
+
+SEGMENTS = [
+    {'start': 0.0, 'duration': 1.5, 'original': "Hello there.", 'confidence': 0.9,
+     'translated': "Hola.", 'audio_path': "/tmp/seg0.wav"},
+    {'start': 2.0, 'duration': 0.5, 'original': "", 'confidence': 0.0},
+    {'start': 3.0, 'duration': 2.0, 'original': "How are you?", 'confidence': 0.8},
+]
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, texts, source_lang, target_lang):
+        self.calls.append((list(texts), source_lang, target_lang))
+        return [f"{target_lang}:{text}" for text in texts]
+
+
+def test_make_key_is_stable_and_depends_on_every_part():
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    assert key == TranscriptCache.make_key("abc", "en-US", "azure")
+    assert key != TranscriptCache.make_key("abd", "en-US", "azure")
+    assert key != TranscriptCache.make_key("abc", "de-DE", "azure")
+    assert key != TranscriptCache.make_key("abc", "en-US", "offline")
+
+
+def test_put_then_get_keeps_only_source_fields(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    assert cache.get(key) is None
+
+    cache.put(key, SEGMENTS, {'es': ["Hola.", "", "¿Cómo estás?"]}, engine="azure")
+    entry = cache.get(key)
+    assert entry['engine'] == "azure"
+    assert entry['segments'][0] == {'start': 0.0, 'duration': 1.5, 'original': "Hello there.", 'confidence': 0.9}
+    assert entry['translations'] == {'es': ["Hola.", "", "¿Cómo estás?"]}
+    assert cache.get_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_translate_transcript_reuses_a_stored_translation(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    cache.put(key, SEGMENTS, {'es': ["Hola.", "", "¿Cómo estás?"]})
+    backend = FakeBackend()
+
+    texts, translated_now = translate_transcript(backend, cache.get(key), "en", "es")
+    assert texts == ["Hola.", "", "¿Cómo estás?"]
+    assert not translated_now
+    assert backend.calls == []
+
+
+def test_translate_transcript_batches_the_non_empty_texts(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    cache.put(key, SEGMENTS)
+    backend = FakeBackend()
+
+    texts, translated_now = translate_transcript(backend, cache.get(key), "en", "fr")
+    assert texts == ["fr:Hello there.", "", "fr:How are you?"]
+    assert translated_now
+    assert backend.calls == [(["Hello there.", "How are you?"], "en", "fr")]
+
+
+def test_add_translations_keeps_every_new_language(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    cache.put(key, SEGMENTS, {'es': ["a", "", "b"]})
+    entry = cache.get(key)
+
+    merged = cache.add_translations(key, entry, {'fr': ["c", "", "d"], 'de': ["e", "", "f"]})
+    assert set(merged['translations']) == {'es', 'fr', 'de'}
+    assert cache.get(key)['translations'] == merged['translations']
+
+
+def test_add_translations_keeps_languages_added_by_another_job(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    cache.put(key, SEGMENTS)
+    stale_entry = cache.get(key)
+
+    TranscriptCache(str(tmp_path)).add_translations(key, cache.get(key), {'fr': ["c", "", "d"]})
+    cache.add_translations(key, stale_entry, {'de': ["e", "", "f"]})
+    assert set(cache.get(key)['translations']) == {'fr', 'de'}
+
+
+def test_add_translations_writes_the_entry_when_the_file_is_gone(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = TranscriptCache.make_key("abc", "en-US", "azure")
+    cache.put(key, SEGMENTS)
+    entry = cache.get(key)
+    os.remove(cache._path(key))
+
+    cache.add_translations(key, entry, {'es': ["a", "", "b"]})
+    restored = cache.get(key)
+    assert restored['segments'] == entry['segments']
+    assert restored['translations'] == {'es': ["a", "", "b"]}
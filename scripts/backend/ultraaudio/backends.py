@@ -0,0 +1,706 @@
+import os
+import re
+import html
+import time
+import wave
+import random
+import threading
+import json
+import hashlib
+
+try:
+    import azure.cognitiveservices.speech as speechsdk
+except Exception as e:
+    print(f"DEBUG: Failed to import azure speech sdk: {e}")
+    speechsdk = None
+
+from .utils import translate_stub, pcm_to_wav_bytes, generate_tone_pcm
+
+SPEECH_BACKEND_ENV = "ULTRAAUDIO_SPEECH_BACKEND"
+DEFAULT_OUTPUT_FORMAT = "Riff16Khz16BitMonoPcm"
+TICKS_PER_SECOND = 10_000_000
+# Bytes read from a synthesis stream per call (0.1 s of 16 kHz 16-bit mono)
+STREAM_READ_BYTES = 3200
+
+
+class RecognitionResult:
+    """A recognized (or partially recognized) utterance, independent of the engine."""
+
+    def __init__(self, text, translations, offset_sec=0.0, duration_sec=0.0,
+                 confidence=0.0, is_final=True, raw_json=None):
+        self.text = text
+        self.translations = translations or {}
+        self.offset_sec = offset_sec
+        self.duration_sec = duration_sec
+        self.confidence = confidence
+        self.is_final = is_final
+        self.raw_json = raw_json
+
+
+class SynthesisResult:
+    """
+    Synthesized audio (RIFF WAV bytes) or the reason synthesis failed.
+
+    ``bookmarks`` lists (mark, audio_offset_sec) for every SSML ``<bookmark>`` reached.
+    ``first_chunk_ms`` is the time to the first audio chunk of a streamed request.
+    """
+
+    def __init__(self, audio_data=None, error=None, latency_ms=0.0, bookmarks=None, first_chunk_ms=None):
+        self.audio_data = audio_data
+        self.error = error
+        self.latency_ms = latency_ms
+        self.bookmarks = bookmarks or []
+        self.first_chunk_ms = first_chunk_ms
+
+    @property
+    def ok(self):
+        return self.error is None and bool(self.audio_data)
+
+
+def _riff_data_offset(buf):
+    """Offset of the PCM in a RIFF/WAVE header, or None until the header is complete."""
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos:pos + 4])
+        if chunk_id == b'data':
+            return pos + 8
+        size = int.from_bytes(buf[pos + 4:pos + 8], 'little')
+        pos += 8 + size + (size & 1)
+    return None
+
+
+class PcmChunkSplitter:
+    """
+    Forwards streamed synthesis audio to ``on_chunk`` as raw PCM.
+
+    A leading RIFF header (if the format has one) is held back until complete and
+    dropped, and every forwarded chunk is a whole number of 16-bit samples.
+    ``pcm`` collects everything forwarded.
+    """
+
+    def __init__(self, on_chunk):
+        self.on_chunk = on_chunk
+        self.pcm = bytearray()
+        self._pending = b""
+        self._in_header = True
+
+    def feed(self, data):
+        self._pending += bytes(data)
+        if self._in_header:
+            if len(self._pending) < 12:
+                return
+            if self._pending[:4] == b'RIFF':
+                offset = _riff_data_offset(self._pending)
+                if offset is None:
+                    return
+                self._pending = self._pending[offset:]
+            self._in_header = False
+        n = len(self._pending) - len(self._pending) % 2
+        if n:
+            chunk, self._pending = self._pending[:n], self._pending[n:]
+            self.pcm += chunk
+            self.on_chunk(chunk)
+
+
+class RecognitionSession:
+    """
+    Continuous recognition over one audio source.
+
+    Sessions are either file-backed (``wav_path``) or push-backed, in which case
+    callers feed 16 kHz / 16-bit mono PCM through ``write`` and finish with
+    ``close_stream``. Callbacks receive ``RecognitionResult`` objects.
+    """
+
+    def __init__(self):
+        self._handlers = {'recognized': [], 'recognizing': [], 'canceled': [], 'stopped': []}
+        self._done = threading.Event()
+
+    def connect(self, on_recognized=None, on_recognizing=None, on_canceled=None, on_stopped=None):
+        for kind, handler in (('recognized', on_recognized), ('recognizing', on_recognizing),
+                              ('canceled', on_canceled), ('stopped', on_stopped)):
+            if handler is not None:
+                self._handlers[kind].append(handler)
+
+    def _emit(self, kind, *args):
+        for handler in self._handlers[kind]:
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Recognition {kind} handler error: {e}")
+
+    def start(self):
+        raise NotImplementedError
+
+    def write(self, audio_bytes):
+        raise NotImplementedError
+
+    def close_stream(self):
+        pass
+
+    def stop(self, wait=True):
+        raise NotImplementedError
+
+    def wait(self, timeout=None):
+        """Block until the session ends (end of stream, error or stop)."""
+        return self._done.wait(timeout)
+
+
+class Synthesizer:
+    """A (possibly long-lived) text-to-speech channel for one voice."""
+
+    def __init__(self, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        self.voice_name = voice_name
+        self.output_format = output_format
+
+    def open_connection(self):
+        """Pre-connect so the first request does not pay connection setup."""
+        pass
+
+    def speak_ssml(self, ssml):
+        raise NotImplementedError
+
+    def speak_ssml_stream(self, ssml, on_chunk):
+        """
+        Like ``speak_ssml``, but ``on_chunk(pcm_bytes)`` receives the audio while it
+        is synthesized. This default delivers it in one chunk once synthesis is done.
+        """
+        res = self.speak_ssml(ssml)
+        if res.ok:
+            res.first_chunk_ms = res.latency_ms
+            PcmChunkSplitter(on_chunk).feed(res.audio_data)
+        return res
+
+    def speak_text(self, text):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SpeechBackend:
+    """Recognize-stream, translate and synthesize behind one interface."""
+
+    name = "base"
+
+    def open_recognition(self, source_lang, target_langs, wav_path=None):
+        raise NotImplementedError
+
+    def create_synthesizer(self, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        raise NotImplementedError
+
+    def translate(self, texts, source_lang, target_lang):
+        raise NotImplementedError
+
+    def synthesize(self, ssml, voice_name):
+        syn = self.create_synthesizer(voice_name)
+        try:
+            return syn.speak_ssml(ssml)
+        finally:
+            syn.close()
+
+
+# --- Azure Speech SDK ---
+
+class AzureRecognitionSession(RecognitionSession):
+    def __init__(self, backend, source_lang, target_langs, wav_path=None):
+        super().__init__()
+        translation_config = speechsdk.translation.SpeechTranslationConfig(
+            subscription=backend.speech_key,
+            region=backend.region
+        )
+        translation_config.speech_recognition_language = source_lang
+        for t_lang in target_langs:
+            translation_config.add_target_language(t_lang)
+
+        self._push_stream = None
+        if wav_path:
+            # File-based AudioConfig for faster-than-realtime processing
+            audio_config = speechsdk.audio.AudioConfig(filename=wav_path)
+        else:
+            self._push_stream = speechsdk.audio.PushAudioInputStream()
+            audio_config = speechsdk.audio.AudioConfig(stream=self._push_stream)
+
+        self._recognizer = speechsdk.translation.TranslationRecognizer(
+            translation_config=translation_config,
+            audio_config=audio_config
+        )
+        self._recognizer.recognized.connect(self._on_recognized)
+        self._recognizer.recognizing.connect(self._on_recognizing)
+        self._recognizer.canceled.connect(self._on_canceled)
+        self._recognizer.session_stopped.connect(self._on_session_stopped)
+
+    @staticmethod
+    def _convert(result, is_final):
+        confidence = 0.0
+        raw_json = getattr(result, 'json', None)
+        if is_final and raw_json:
+            try:
+                json_res = json.loads(raw_json)
+                if 'NBest' in json_res and len(json_res['NBest']) > 0:
+                    confidence = json_res['NBest'][0].get('Confidence', 0.0) * 100
+            except Exception as json_err:
+                print(f"DEBUG: JSON parse error (ignoring): {json_err}")
+        return RecognitionResult(
+            text=result.text,
+            translations=dict(result.translations),
+            offset_sec=getattr(result, 'offset', 0) / TICKS_PER_SECOND,
+            duration_sec=getattr(result, 'duration', 0) / TICKS_PER_SECOND,
+            confidence=confidence,
+            is_final=is_final,
+            raw_json=raw_json
+        )
+
+    def _on_recognized(self, evt):
+        if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
+            self._emit('recognized', self._convert(evt.result, True))
+
+    def _on_recognizing(self, evt):
+        if evt.result.reason == speechsdk.ResultReason.TranslatingSpeech:
+            self._emit('recognizing', self._convert(evt.result, False))
+        else:
+            self._emit('recognizing', RecognitionResult(evt.result.text, {}, is_final=False))
+
+    def _on_canceled(self, evt):
+        if evt.result.reason == speechsdk.ResultReason.Canceled:
+            details = evt.result.cancellation_details
+            if details.reason != speechsdk.CancellationReason.EndOfStream:
+                self._emit('canceled', details.error_details or str(details.reason))
+        self._done.set()
+
+    def _on_session_stopped(self, evt):
+        self._emit('stopped')
+        self._done.set()
+
+    def start(self):
+        self._recognizer.start_continuous_recognition_async().get()
+
+    def write(self, audio_bytes):
+        if self._push_stream is not None:
+            self._push_stream.write(audio_bytes)
+
+    def close_stream(self):
+        if self._push_stream is not None:
+            self._push_stream.close()
+
+    def stop(self, wait=True):
+        future = self._recognizer.stop_continuous_recognition_async()
+        if wait:
+            future.get()
+
+
+class AzureSynthesizer(Synthesizer):
+    def __init__(self, backend, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        super().__init__(voice_name, output_format)
+        speech_config = speechsdk.SpeechConfig(subscription=backend.speech_key, region=backend.region)
+        if voice_name:
+            speech_config.speech_synthesis_voice_name = voice_name
+        if output_format:
+            speech_config.set_speech_synthesis_output_format(
+                getattr(speechsdk.SpeechSynthesisOutputFormat, output_format)
+            )
+        # Use os.devnull to prevent trying to open default speaker on server
+        null_audio_config = speechsdk.audio.AudioConfig(filename=os.devnull)
+        self._synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=null_audio_config)
+        self._synthesizer.bookmark_reached.connect(self._on_bookmark)
+        self._bookmarks = []
+        self._connection = None
+
+    def _on_bookmark(self, evt):
+        self._bookmarks.append((evt.text, evt.audio_offset / TICKS_PER_SECOND))
+
+    def open_connection(self):
+        self._connection = speechsdk.Connection.from_speech_synthesizer(self._synthesizer)
+        self._connection.open(True)
+
+    def _convert(self, res, t_start):
+        latency = (time.time() - t_start) * 1000
+        if res.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            return SynthesisResult(res.audio_data, latency_ms=latency, bookmarks=list(self._bookmarks))
+        error = str(res.reason)
+        try:
+            details = res.cancellation_details
+            error = details.error_details or str(details.reason)
+        except Exception:
+            pass
+        return SynthesisResult(error=error, latency_ms=latency)
+
+    def speak_ssml(self, ssml):
+        t_start = time.time()
+        # One request at a time per synthesizer, so the bookmark list is per request
+        self._bookmarks = []
+        return self._convert(self._synthesizer.speak_ssml_async(ssml).get(), t_start)
+
+    def speak_ssml_stream(self, ssml, on_chunk):
+        # Read through the request's own AudioDataStream: the synthesizing events of a
+        # synthesizer shared by several threads cannot be told apart per request
+        t_start = time.time()
+        self._bookmarks = []
+        res = self._synthesizer.start_speaking_ssml_async(ssml).get()
+        if res.reason != speechsdk.ResultReason.SynthesizingAudioStarted:
+            return self._convert(res, t_start)
+        stream = speechsdk.AudioDataStream(res)
+        splitter = PcmChunkSplitter(on_chunk)
+        first_chunk_ms = None
+        buf = bytes(STREAM_READ_BYTES)
+        while True:
+            n = stream.read_data(buf)
+            if n == 0:
+                break
+            if first_chunk_ms is None:
+                first_chunk_ms = (time.time() - t_start) * 1000
+            splitter.feed(buf[:n])
+        latency = (time.time() - t_start) * 1000
+        if stream.status == speechsdk.StreamStatus.Canceled:
+            error = "Synthesis canceled"
+            try:
+                error = stream.cancellation_details.error_details or str(stream.cancellation_details.reason)
+            except Exception:
+                pass
+            return SynthesisResult(error=error, latency_ms=latency)
+        sample_rate = int(re.search(r'(\d+)Khz', self.output_format or DEFAULT_OUTPUT_FORMAT).group(1)) * 1000
+        return SynthesisResult(pcm_to_wav_bytes(bytes(splitter.pcm), sample_rate), latency_ms=latency,
+                               bookmarks=list(self._bookmarks), first_chunk_ms=first_chunk_ms)
+
+    def speak_text(self, text):
+        t_start = time.time()
+        self._bookmarks = []
+        return self._convert(self._synthesizer.speak_text_async(text).get(), t_start)
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        self._synthesizer = None
+
+
+class AzureSpeechBackend(SpeechBackend):
+    name = "azure"
+    translator_endpoint = "https://api.cognitive.microsofttranslator.com/translate"
+
+    def __init__(self, speech_key=None, region=None, translator_key=None, translator_region=None):
+        if speechsdk is None:
+            raise RuntimeError("azure-cognitiveservices-speech is not installed; use the 'offline' speech backend.")
+        from .config import AZURE_KEY, AZURE_LOCATION
+        self.speech_key = speech_key or AZURE_KEY
+        self.region = region or AZURE_LOCATION
+        self.translator_key = translator_key or os.getenv("AZURE_TRANSLATOR_KEY") or self.speech_key
+        self.translator_region = translator_region or os.getenv("AZURE_TRANSLATOR_REGION") or self.region
+
+    def open_recognition(self, source_lang, target_langs, wav_path=None):
+        return AzureRecognitionSession(self, source_lang, target_langs, wav_path)
+
+    def create_synthesizer(self, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        return AzureSynthesizer(self, voice_name, output_format)
+
+    @staticmethod
+    def _translator_code(code):
+        code = (code or "").lower()
+        if code.startswith("zh"):
+            return "zh-Hans"
+        return code.split("-")[0]
+
+    def translate(self, texts, source_lang, target_lang):
+        import requests
+        translated = []
+        # The Translator API accepts up to 100 texts per request
+        for i in range(0, len(texts), 100):
+            batch = texts[i:i + 100]
+            resp = requests.post(
+                self.translator_endpoint,
+                params={
+                    'api-version': '3.0',
+                    'from': self._translator_code(source_lang),
+                    'to': self._translator_code(target_lang)
+                },
+                headers={
+                    'Ocp-Apim-Subscription-Key': self.translator_key,
+                    'Ocp-Apim-Subscription-Region': self.translator_region,
+                    'Content-Type': 'application/json'
+                },
+                json=[{'text': t} for t in batch],
+                timeout=30
+            )
+            resp.raise_for_status()
+            translated.extend(item['translations'][0]['text'] for item in resp.json())
+        return translated
+
+
+# --- Offline deterministic engine ---
+
+_OFFLINE_WORDS = (
+    "the quick brown fox jumps over a lazy dog while we talk about audio "
+    "translation latency speech voice meeting video segment offline engine"
+).split()
+
+_BYTES_PER_SECOND = 16000 * 2
+
+
+def _rate_multiplier(rate):
+    """Turn an SSML prosody rate ('+10%', '-5%', '1.2', 'fast') into a speed factor."""
+    named = {'x-slow': 0.5, 'slow': 0.75, 'medium': 1.0, 'default': 1.0, 'fast': 1.25, 'x-fast': 1.5}
+    rate = (rate or "").strip().lower()
+    if rate in named:
+        return named[rate]
+    try:
+        if rate.endswith('%'):
+            return max(0.1, 1.0 + float(rate[:-1]) / 100.0)
+        return max(0.1, float(rate))
+    except ValueError:
+        return 1.0
+
+
+def _ssml_text_and_rate(ssml):
+    match = re.search(r'<prosody[^>]*\brate="([^"]*)"', ssml)
+    rate = match.group(1) if match else "0%"
+    text = re.sub(r'<[^>]+>', ' ', ssml)
+    text = html.unescape(" ".join(text.split()))
+    return text, rate
+
+
+_BOOKMARK_RE = re.compile(r'<bookmark\s+mark="([^"]*)"\s*/>')
+
+
+def _ssml_pieces(ssml):
+    """Split SSML at its bookmarks into [(mark or None, text, rate), ...]."""
+    parts = _BOOKMARK_RE.split(ssml)
+    pieces = []
+    text, rate = _ssml_text_and_rate(parts[0])
+    if text or len(parts) == 1:
+        pieces.append((None, text, rate))
+    for mark, fragment in zip(parts[1::2], parts[2::2]):
+        text, rate = _ssml_text_and_rate(fragment)
+        pieces.append((mark, text, rate))
+    return pieces
+
+
+class OfflineRecognitionSession(RecognitionSession):
+    def __init__(self, backend, source_lang, target_langs, wav_path=None):
+        super().__init__()
+        self.backend = backend
+        self.source_lang = source_lang
+        self.target_langs = list(target_langs)
+        self.wav_path = wav_path
+        self._cond = threading.Condition()
+        self._available_sec = 0.0
+        self._closed = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        if wav_path:
+            with wave.open(wav_path, 'rb') as wf:
+                self._available_sec = wf.getnframes() / float(wf.getframerate())
+            self._closed = True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, audio_bytes):
+        with self._cond:
+            self._available_sec += len(audio_bytes) / _BYTES_PER_SECOND
+            self._cond.notify_all()
+
+    def close_stream(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stop(self, wait=True):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if wait and self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        engine = self.backend
+        index = 0
+        seg_start = 0.0
+        try:
+            while not self._stop_event.is_set():
+                seg_duration = engine.segment_duration(index)
+                seg_end = seg_start + seg_duration
+                with self._cond:
+                    while (not self._closed and self._available_sec < seg_end
+                           and not self._stop_event.is_set()):
+                        self._cond.wait(0.1)
+                    available = self._available_sec
+                if self._stop_event.is_set() or available - seg_start < engine.min_segment_sec:
+                    break
+                seg_duration = min(seg_duration, available - seg_start)
+
+                text = engine.transcript(index, seg_duration)
+                words = text.split()
+                # Partial hypotheses grow word by word, as a streaming recognizer would
+                for n in range(1, len(words), max(1, len(words) // engine.partials_per_segment)):
+                    if self._stop_event.is_set():
+                        break
+                    partial = " ".join(words[:n])
+                    self._emit('recognizing', RecognitionResult(
+                        partial,
+                        {lang: engine.translate_text(partial, lang) for lang in self.target_langs},
+                        seg_start, seg_duration * n / len(words), is_final=False
+                    ))
+                engine.simulate_recognition(index, seg_duration)
+                if self._stop_event.is_set():
+                    break
+                self._emit('recognized', RecognitionResult(
+                    text,
+                    {lang: engine.translate_text(text, lang) for lang in self.target_langs},
+                    seg_start, seg_duration, confidence=engine.confidence(index)
+                ))
+                seg_start = seg_end + engine.gap_sec
+                index += 1
+        finally:
+            self._emit('stopped')
+            self._done.set()
+
+
+class OfflineSynthesizer(Synthesizer):
+    def __init__(self, backend, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        super().__init__(voice_name, output_format)
+        self.backend = backend
+
+    def _render(self, pieces, on_chunk=None):
+        """
+        One request for [(mark or None, text, rate), ...]; a mark is reported where its
+        piece starts. With ``on_chunk`` the PCM is delivered in ``STREAM_READ_BYTES``
+        chunks as it is "rendered" (see ``synthesis_rtf``).
+        """
+        engine = self.backend
+        t_start = time.time()
+        rng = engine.rng("synth", self.voice_name, " ".join(text for _, text, _ in pieces))
+        engine.simulate_synthesis(rng)
+        if engine.failure_rate and rng.random() < engine.failure_rate:
+            return SynthesisResult(error="Offline engine injected failure",
+                                   latency_ms=(time.time() - t_start) * 1000)
+        freq = 180.0 + int(hashlib.md5((self.voice_name or "").encode('utf-8')).hexdigest()[:4], 16) % 200
+        pcm = b""
+        bookmarks = []
+        for mark, text, rate in pieces:
+            if mark is not None:
+                bookmarks.append((mark, len(pcm) / 2.0 / engine.sample_rate))
+            if not text and mark is not None:
+                continue
+            duration = engine.speech_duration(text, rate)
+            pcm += generate_tone_pcm(duration, engine.sample_rate, freq=freq, kind=engine.signal,
+                                     seed=rng.randrange(1 << 30))
+        first_chunk_ms = None
+        if on_chunk is None:
+            engine.simulate_render(len(pcm) / 2.0 / engine.sample_rate)
+        else:
+            for i in range(0, len(pcm), STREAM_READ_BYTES):
+                chunk = pcm[i:i + STREAM_READ_BYTES]
+                engine.simulate_render(len(chunk) / 2.0 / engine.sample_rate)
+                if first_chunk_ms is None:
+                    first_chunk_ms = (time.time() - t_start) * 1000
+                on_chunk(chunk)
+        return SynthesisResult(pcm_to_wav_bytes(pcm, engine.sample_rate),
+                               latency_ms=(time.time() - t_start) * 1000, bookmarks=bookmarks,
+                               first_chunk_ms=first_chunk_ms)
+
+    def speak_ssml(self, ssml):
+        return self._render(_ssml_pieces(ssml))
+
+    def speak_ssml_stream(self, ssml, on_chunk):
+        return self._render(_ssml_pieces(ssml), on_chunk=on_chunk)
+
+    def speak_text(self, text):
+        return self._render([(None, text, "0%")])
+
+
+class OfflineSpeechBackend(SpeechBackend):
+    """
+    Local, deterministic stand-in for Azure: no network, no key.
+
+    Recognition emits one utterance every ``segment_sec`` (+ ``gap_sec``) of input
+    audio, translation tags the text via ``translate_stub`` and synthesis returns a
+    tone/noise/silence WAV whose length follows the text length and prosody rate.
+    Latencies are ``*_latency_ms`` plus seeded uniform ``jitter_ms`` (synthesis also
+    takes ``synthesis_rtf`` seconds per second of audio rendered), so runs are
+    repeatable for profiling and load tests.
+    """
+
+    name = "offline"
+
+    def __init__(self, recognition_latency_ms=50.0, synthesis_latency_ms=80.0,
+                 translation_latency_ms=5.0, jitter_ms=20.0, segment_sec=4.0, gap_sec=0.5,
+                 realtime_factor=0.0, chars_per_sec=15.0, signal="tone", sample_rate=16000,
+                 failure_rate=0.0, partials_per_segment=3, seed=0, synthesis_rtf=0.0):
+        self.recognition_latency_ms = recognition_latency_ms
+        self.synthesis_latency_ms = synthesis_latency_ms
+        self.translation_latency_ms = translation_latency_ms
+        self.jitter_ms = jitter_ms
+        self.segment_sec = segment_sec
+        self.gap_sec = gap_sec
+        # 0 disables pacing; 1.0 recognizes a file at real-time speed
+        self.realtime_factor = realtime_factor
+        self.chars_per_sec = chars_per_sec
+        self.signal = signal
+        self.sample_rate = sample_rate
+        self.failure_rate = failure_rate
+        self.synthesis_rtf = synthesis_rtf
+        self.partials_per_segment = max(1, partials_per_segment)
+        self.min_segment_sec = 0.3
+        self.seed = seed
+
+    def rng(self, *key):
+        return random.Random(":".join(str(k) for k in (self.seed,) + key))
+
+    def _sleep(self, base_ms, rng):
+        delay_ms = base_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+    def segment_duration(self, index):
+        return self.segment_sec * self.rng("seg", index).uniform(0.6, 1.0)
+
+    def transcript(self, index, duration_sec):
+        rng = self.rng("words", index)
+        n_words = max(1, int(round(duration_sec * 2.5)))
+        return " ".join(rng.choice(_OFFLINE_WORDS) for _ in range(n_words)).capitalize() + "."
+
+    def confidence(self, index):
+        return self.rng("conf", index).uniform(80.0, 98.0)
+
+    def speech_duration(self, text, rate="0%"):
+        return max(0.2, len(text) / self.chars_per_sec / _rate_multiplier(rate))
+
+    def simulate_recognition(self, index, seg_duration):
+        rng = self.rng("rec", index)
+        if self.realtime_factor > 0:
+            time.sleep(seg_duration / self.realtime_factor)
+        self._sleep(self.recognition_latency_ms, rng)
+
+    def simulate_synthesis(self, rng):
+        self._sleep(self.synthesis_latency_ms, rng)
+
+    def simulate_render(self, audio_sec):
+        if self.synthesis_rtf > 0:
+            time.sleep(audio_sec * self.synthesis_rtf)
+
+    def translate_text(self, text, target_lang):
+        return translate_stub(text, target_lang) if text else text
+
+    def open_recognition(self, source_lang, target_langs, wav_path=None):
+        return OfflineRecognitionSession(self, source_lang, target_langs, wav_path)
+
+    def create_synthesizer(self, voice_name, output_format=DEFAULT_OUTPUT_FORMAT):
+        return OfflineSynthesizer(self, voice_name, output_format)
+
+    def translate(self, texts, source_lang, target_lang):
+        self._sleep(self.translation_latency_ms, self.rng("translate", len(texts)))
+        return [self.translate_text(t, target_lang) for t in texts]
+
+
+def get_speech_backend(name=None, **options):
+    """Return the backend named ``name`` (or ``$ULTRAAUDIO_SPEECH_BACKEND``, default 'azure')."""
+    name = (name or os.getenv(SPEECH_BACKEND_ENV) or "azure").lower()
+    if name == "azure":
+        return AzureSpeechBackend(**options)
+    if name == "offline":
+        return OfflineSpeechBackend(**options)
+    raise ValueError(f"Unknown speech backend '{name}'. Use 'azure' or 'offline'.")
@@ -0,0 +1,146 @@
+import os
+import threading
+from contextlib import contextmanager
+
+JOB_TIMEOUT_ENV = "ULTRAAUDIO_JOB_TIMEOUT"
+STAGE_TIMEOUTS_ENV = "ULTRAAUDIO_STAGE_TIMEOUTS"
+STAGES = ('extract', 'denoise', 'recognize', 'synthesize', 'mix', 'mux')
+
+
+class JobCancelled(Exception):
+    """A job (or one of its stages) was cancelled; raised by ``CancelToken.check``."""
+
+
+class DeadlineExceeded(JobCancelled):
+    """A job or stage ran past its deadline."""
+
+
+class CancelToken:
+    """
+    Cooperative cancellation for one job, shared by all its stages and threads.
+
+    Code polls ``check()`` (raises ``JobCancelled``) between units of work, and
+    blocking calls register a callback with ``on_cancel`` that unblocks them (stop
+    an SDK session, kill ffmpeg, cancel queued futures). ``timeout`` sets a deadline:
+    a timer cancels the token with ``DeadlineExceeded`` when it passes.
+
+    ``stage(name, timeout)`` gives a child token with its own deadline; it is also
+    cancelled with its parent, and must be closed (use it as a context manager).
+    """
+
+    def __init__(self, timeout=None, parent=None, name="Job"):
+        self.name = name
+        self.timeout = timeout
+        self.error = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._parent = parent
+        self._timer = None
+        if parent is not None:
+            parent.add_callback(self._follow_parent)
+        if timeout:
+            self._timer = threading.Timer(timeout, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _follow_parent(self):
+        self._cancel(self._parent.error)
+
+    def _expire(self):
+        self._cancel(DeadlineExceeded(f"{self.name} exceeded its {self.timeout:g}s deadline"))
+
+    def cancel(self, reason="Canceled"):
+        self._cancel(JobCancelled(reason))
+
+    def _cancel(self, error):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.error = error
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"DEBUG: Cancel callback failed: {e}")
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise self.error
+
+    def wait(self, timeout=None):
+        """Sleep up to ``timeout`` seconds; True as soon as the token is cancelled."""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Call ``callback()`` on cancellation (right away if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Run ``callback`` if cancellation happens inside the ``with`` block."""
+        self.add_callback(callback)
+        try:
+            yield self
+        finally:
+            self.remove_callback(callback)
+
+    def stage(self, name, timeout=None):
+        return CancelToken(timeout, parent=self, name=f"Stage '{name}'")
+
+    def close(self):
+        """Stop the deadline timer and detach from the parent."""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._parent is not None:
+            self._parent.remove_callback(self._follow_parent)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def configured_timeouts():
+    """
+    (job_timeout, {stage: timeout}) in seconds from $ULTRAAUDIO_JOB_TIMEOUT and
+    $ULTRAAUDIO_STAGE_TIMEOUTS ("recognize=3600,mux=600"); unset means no deadline.
+    """
+    job_timeout = None
+    try:
+        job_timeout = float(os.getenv(JOB_TIMEOUT_ENV, "") or 0) or None
+    except ValueError:
+        print(f"DEBUG: Ignoring invalid {JOB_TIMEOUT_ENV}")
+    return job_timeout, parse_stage_timeouts(os.getenv(STAGE_TIMEOUTS_ENV, ""))
+
+
+def parse_stage_timeouts(spec):
+    """{stage: seconds} from "name=seconds" items separated by commas (or a list of them)."""
+    items = spec.split(',') if isinstance(spec, str) else spec
+    timeouts = {}
+    for item in items or []:
+        name, _, value = item.partition('=')
+        name = name.strip()
+        if not name or not value.strip():
+            continue
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage '{name}' (expected one of {', '.join(STAGES)})")
+        timeouts[name] = float(value)
+    return timeouts
@@ -0,0 +1,137 @@
+import os
+import struct
+import threading
+
+import numpy as np
+
+CLIP_MEMORY_MB_ENV = "ULTRAAUDIO_CLIP_MEMORY_MB"
+DEFAULT_CLIP_MEMORY_MB = 256
+
+
+class ClipAudio:
+    """
+    A synthesized clip held as the RIFF/PCM bytes the synthesizer returned.
+
+    The header is parsed once; ``pcm`` is a memoryview into the original bytes, so
+    reading the duration or the samples never copies or re-parses the file.
+    Only 16-bit PCM is supported (what every backend produces).
+    """
+
+    def __init__(self, audio_data):
+        view = memoryview(audio_data)
+        if len(view) < 12 or bytes(view[0:4]) != b'RIFF' or bytes(view[8:12]) != b'WAVE':
+            raise ValueError("Not a RIFF/WAVE clip")
+        fmt = None
+        pcm = None
+        pos = 12
+        while pos + 8 <= len(view):
+            chunk_id = bytes(view[pos:pos + 4])
+            size = struct.unpack_from('<I', view, pos + 4)[0]
+            body = pos + 8
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack_from('<HHIIHH', view, body)
+            elif chunk_id == b'data':
+                # Streamed WAVs may carry a placeholder size; the data then runs to the end
+                pcm = view[body:min(body + size, len(view))]
+                break
+            pos = body + size + (size & 1)
+        if fmt is None or pcm is None:
+            raise ValueError("Clip has no fmt or data chunk")
+        audio_format, self.channels, self.sample_rate, _, _, bits = fmt
+        if audio_format != 1 or bits != 16:
+            raise ValueError(f"Unsupported clip format {audio_format}/{bits}-bit")
+        frame_bytes = 2 * self.channels
+        self.pcm = pcm[:len(pcm) - len(pcm) % frame_bytes]
+        self.nbytes = len(view)
+
+    @property
+    def duration(self):
+        return len(self.pcm) / float(2 * self.channels * self.sample_rate)
+
+    def samples(self, sample_rate=None):
+        """Mono float32 samples in [-1, 1], resampled to ``sample_rate`` (like ``read_wav_samples``)."""
+        samples = np.frombuffer(self.pcm, dtype='<i2').astype(np.float32) / 32768.0
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        if sample_rate and self.sample_rate != sample_rate and len(samples):
+            n_out = int(round(len(samples) * sample_rate / float(self.sample_rate)))
+            positions = np.linspace(0, len(samples) - 1, n_out)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        return samples
+
+
+class SegmentAudioStore:
+    """
+    One job's synthesized clips kept in memory, keyed by their file path.
+
+    The overlap resolver and the mixers ask the store for durations and samples
+    and only open the file for clips it does not hold. ``put`` accepts clips until
+    ``max_bytes`` are held; past that the caller keeps the clip on disk instead
+    (``spill`` writes it). Paths stay the identifiers throughout, so on-disk and
+    in-memory clips mix freely.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CLIP_MEMORY_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._clips = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.spilled = 0
+
+    def put(self, path, audio_data):
+        """Hold ``audio_data`` for ``path``; False if it is over budget or unparseable."""
+        if not audio_data or self.max_bytes <= 0:
+            return False
+        try:
+            clip = ClipAudio(audio_data)
+        except (ValueError, struct.error) as e:
+            print(f"DEBUG: Clip store: not holding {os.path.basename(path)}: {e}")
+            return False
+        with self._lock:
+            previous = self._clips.get(path)
+            held = self._bytes - (previous.nbytes if previous else 0)
+            if held + clip.nbytes > self.max_bytes:
+                return False
+            self._clips[path] = clip
+            self._bytes = held + clip.nbytes
+        return True
+
+    def spill(self, path, audio_data):
+        """Keep the clip in memory if it fits, else write it to ``path``."""
+        if self.put(path, audio_data):
+            return
+        with open(path, 'wb') as f:
+            f.write(audio_data)
+        with self._lock:
+            self.spilled += 1
+
+    def get(self, path):
+        with self._lock:
+            clip = self._clips.get(path)
+            if clip is not None:
+                self.hits += 1
+        return clip
+
+    def __contains__(self, path):
+        with self._lock:
+            return path in self._clips
+
+    def clear(self):
+        with self._lock:
+            self._clips = {}
+            self._bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {'clips': len(self._clips), 'mb': self._bytes / (1024 * 1024),
+                    'budget_mb': self.max_bytes / (1024 * 1024), 'hits': self.hits, 'spilled': self.spilled}
+
+
+def create_clip_store():
+    """A store with the budget from $ULTRAAUDIO_CLIP_MEMORY_MB (0 keeps every clip on disk)."""
+    try:
+        max_mb = float(os.getenv(CLIP_MEMORY_MB_ENV, DEFAULT_CLIP_MEMORY_MB))
+    except ValueError:
+        max_mb = DEFAULT_CLIP_MEMORY_MB
+    return SegmentAudioStore(int(max_mb * 1024 * 1024))
@@ -0,0 +1,236 @@
+import os
+import time
+import wave
+import concurrent.futures
+import multiprocessing
+
+import numpy as np
+
+try:
+    import noisereduce as nr
+except Exception as e:
+    print(f"DEBUG: noisereduce not available, using built-in spectral gate: {e}")
+    nr = None
+
+
+def _stft(samples, n_fft, hop):
+    """Magnitude-phase STFT (frames x bins) with a Hann window; the signal is zero-padded at both ends."""
+    window = np.hanning(n_fft).astype(np.float32)
+    padded = np.pad(samples, (n_fft, n_fft + hop))
+    n_frames = 1 + (len(padded) - n_fft) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        padded, shape=(n_frames, n_fft),
+        strides=(padded.strides[0] * hop, padded.strides[0])
+    )
+    return np.fft.rfft(frames * window, axis=1), window
+
+
+def _istft(spectrum, window, n_fft, hop, length):
+    """Weighted overlap-add inverse of ``_stft``, trimmed to ``length`` samples."""
+    frames = np.fft.irfft(spectrum, n=n_fft, axis=1).astype(np.float32) * window
+    n_frames = len(frames)
+    out = np.zeros((n_frames - 1) * hop + n_fft, dtype=np.float32)
+    norm = np.zeros_like(out)
+    ratio = n_fft // hop
+    # Frames k, k + ratio, k + 2*ratio... tile contiguously, so each phase is one vector add
+    for phase in range(ratio):
+        chunk = frames[phase::ratio]
+        start = phase * hop
+        out[start:start + chunk.size] += chunk.ravel()
+        norm[start:start + chunk.size] += np.tile(window * window, len(chunk))
+    out /= np.maximum(norm, 1e-8)
+    return out[n_fft:n_fft + length]
+
+
+def _smooth(mask, time_frames, freq_bins):
+    """Box-filter a (frames x bins) mask along both axes with cumulative sums."""
+    for axis, width in ((0, time_frames), (1, freq_bins)):
+        if width <= 1:
+            continue
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (width // 2, width - 1 - width // 2)
+        padded = np.pad(mask, pad, mode='edge')
+        csum = np.cumsum(padded, axis=axis, dtype=np.float32)
+        csum = np.insert(csum, 0, 0.0, axis=axis)
+        upper = np.take(csum, np.arange(width, csum.shape[axis]), axis=axis)
+        lower = np.take(csum, np.arange(0, csum.shape[axis] - width), axis=axis)
+        mask = (upper - lower) / width
+    return mask
+
+
+def noise_threshold(noise, n_fft=1024, hop=256, n_std=1.5):
+    """Per-bin gate threshold (dB): mean + ``n_std`` standard deviations of the noise spectrum."""
+    spectrum, _ = _stft(np.asarray(noise, dtype=np.float32), n_fft, hop)
+    noise_db = 20.0 * np.log10(np.abs(spectrum) + 1e-9)
+    return noise_db.mean(axis=0) + n_std * noise_db.std(axis=0)
+
+
+def spectral_gate(samples, sr, threshold_db, n_fft=1024, hop=256, prop_decrease=1.0,
+                  time_smooth_ms=50, freq_smooth_hz=500):
+    """
+    Stationary spectral gating with NumPy's rfft (same scheme as noisereduce's stationary mode).
+
+    Bins below the noise threshold are attenuated by ``prop_decrease``; the binary
+    mask is smoothed over time and frequency to avoid musical-noise artifacts.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) == 0:
+        return samples
+    spectrum, window = _stft(samples, n_fft, hop)
+    signal_db = 20.0 * np.log10(np.abs(spectrum) + 1e-9)
+    mask = (signal_db > threshold_db).astype(np.float32)
+    time_frames = max(1, int(round(time_smooth_ms / 1000.0 * sr / hop)))
+    freq_bins = max(1, int(round(freq_smooth_hz / (sr / float(n_fft)))))
+    mask = _smooth(mask, time_frames, freq_bins)
+    mask = mask * prop_decrease + (1.0 - prop_decrease)
+    return _istft(spectrum * mask, window, n_fft, hop, len(samples))
+
+
+def _denoise_block(args):
+    """Process-pool worker: denoise one block with the shared noise profile."""
+    block, sr, engine, noise_clip, threshold_db = args
+    if engine == "noisereduce":
+        return nr.reduce_noise(y=block, sr=sr, stationary=True, y_noise=noise_clip).astype(np.float32)
+    return spectral_gate(block, sr, threshold_db)
+
+
+def _read_span(wf, start, n):
+    wf.setpos(start)
+    raw = wf.readframes(n)
+    samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    channels = wf.getnchannels()
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def noise_profile_clip(wav_path, noise_regions, max_sec=10.0, min_region_sec=0.1):
+    """Concatenate up to ``max_sec`` of the given non-speech regions into one noise clip."""
+    pieces = []
+    collected = 0
+    with wave.open(wav_path, 'rb') as wf:
+        sr = wf.getframerate()
+        total = wf.getnframes()
+        for start, end in noise_regions:
+            if end - start < min_region_sec:
+                continue
+            s = int(start * sr)
+            n = min(int((end - start) * sr), int(max_sec * sr) - collected, total - s)
+            if n <= 0:
+                continue
+            pieces.append(_read_span(wf, s, n))
+            collected += n
+            if collected >= max_sec * sr:
+                break
+    if not pieces:
+        return None
+    return np.concatenate(pieces)
+
+
+def denoise_wav(in_path, out_path, noise_regions=None, block_sec=30.0, overlap_sec=1.0,
+                workers=None, engine="auto", cancel=None):
+    """
+    Denoise a WAV block by block with bounded memory.
+
+    The noise profile is estimated once from ``noise_regions`` (non-speech spans,
+    e.g. the VAD's silence regions); without them the quietest frames of the file's
+    first block stand in. Overlapping blocks are denoised on a process pool, joined
+    by a linear cross-fade over the overlap and appended to ``out_path`` in order,
+    so at most ``2 * workers`` blocks are in memory whatever the input length.
+
+    ``engine`` is "noisereduce", "spectral" (built-in NumPy gate) or "auto"
+    (noisereduce when installed). ``cancel`` (a CancelToken) is checked between
+    blocks. Returns a stats dict.
+    """
+    t_start = time.time()
+    if engine == "auto":
+        engine = "noisereduce" if nr is not None else "spectral"
+    workers = workers or max(1, min(4, os.cpu_count() or 1))
+
+    with wave.open(in_path, 'rb') as wf:
+        sr = wf.getframerate()
+        total = wf.getnframes()
+
+    noise_clip = noise_profile_clip(in_path, noise_regions or [])
+    if noise_clip is None:
+        # No detected silence: use the quietest 10% of 50 ms frames of the first block
+        with wave.open(in_path, 'rb') as wf:
+            head = _read_span(wf, 0, min(total, int(block_sec * sr)))
+        frame = int(0.05 * sr)
+        n_frames = len(head) // frame
+        if n_frames:
+            frames = head[:n_frames * frame].reshape(n_frames, frame)
+            quiet = np.argsort(np.mean(frames * frames, axis=1))[:max(1, n_frames // 10)]
+            noise_clip = frames[np.sort(quiet)].ravel()
+        else:
+            noise_clip = head
+    profile_sec = len(noise_clip) / float(sr)
+    threshold_db = noise_threshold(noise_clip) if engine == "spectral" else None
+    if engine == "spectral":
+        # Workers only need the threshold
+        noise_clip = None
+
+    block = max(1, int(block_sec * sr))
+    overlap = min(int(overlap_sec * sr), block // 2)
+    starts = list(range(0, total, block))
+
+    def block_args(wf):
+        for s in starts:
+            # Each block reaches ``overlap`` samples into the next one
+            n = min(block + overlap, total - s)
+            yield _read_span(wf, s, n), sr, engine, noise_clip, threshold_db
+
+    tail = None
+    with wave.open(in_path, 'rb') as wf, wave.open(out_path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sr)
+
+        def write(samples):
+            if cancel is not None:
+                cancel.check()
+            np.clip(samples, -1.0, 1.0, out=samples)
+            out.writeframes((samples * 32767).astype('<i2').tobytes())
+
+        if workers > 1 and multiprocessing.current_process().daemon:
+            # Daemonic processes may not have children
+            print("DEBUG: Denoise: running in a daemonic process; denoising in-process")
+            workers = 1
+        if workers == 1 or len(starts) == 1:
+            # Not worth a process pool
+            for args in block_args(wf):
+                tail = _emit(_denoise_block(args), tail, block, write)
+            workers = 1
+        else:
+            pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            try:
+                pending = []
+                for args in block_args(wf):
+                    pending.append(pool.submit(_denoise_block, args))
+                    # Bounded in-flight window keeps memory flat
+                    if len(pending) < 2 * workers:
+                        continue
+                    tail = _emit(pending.pop(0).result(), tail, block, write)
+                for fut in pending:
+                    tail = _emit(fut.result(), tail, block, write)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        'engine': engine,
+        'workers': workers,
+        'blocks': len(starts),
+        'profile_sec': profile_sec,
+        'seconds': time.time() - t_start
+    }
+
+
+def _emit(processed, tail, block, write):
+    """Cross-fade ``processed`` with the previous block's tail, write one block, return the new tail."""
+    processed = np.asarray(processed, dtype=np.float32).copy()
+    if tail is not None and len(tail):
+        n = min(len(tail), len(processed))
+        fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)
+        processed[:n] = tail[:n] * (1.0 - fade_in) + processed[:n] * fade_in
+    write(processed[:block])
+    return processed[block:]
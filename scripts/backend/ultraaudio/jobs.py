@@ -0,0 +1,259 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+JOBS_DIR_ENV = "ULTRAAUDIO_JOBS_DIR"
+MANIFEST_NAME = "job_manifest.json"
+STAGES = ("extract", "denoise", "recognize", "synthesize", "assemble", "mux")
+# A running job touches its manifest this often, so a long stage still looks alive
+MANIFEST_KEEPALIVE_SEC = 60.0
+
+
+def jobs_root():
+    """Directory holding one working directory per job ($ULTRAAUDIO_JOBS_DIR or the system temp dir)."""
+    root = os.getenv(JOBS_DIR_ENV) or os.path.join(tempfile.gettempdir(), "ultraaudio_jobs")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def file_fingerprint(path, sample_bytes=1 << 20):
+    """Cheap content fingerprint: size plus SHA-256 of the first and last ``sample_bytes``."""
+    size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(sample_bytes, size - sample_bytes))
+            h.update(f.read(sample_bytes))
+    return h.hexdigest()
+
+
+def make_job_id(input_path, params):
+    """Same input content + same output-affecting parameters -> same job (and same working dir)."""
+    payload = json.dumps([file_fingerprint(input_path), params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class JobManifest:
+    """
+    On-disk checkpoint of one dubbing job (``job_manifest.json`` in its working dir).
+
+    Records the job parameters, per-stage status and outputs, recognized chunks and
+    segments, and every synthesized clip with its SHA-256, so an interrupted job can
+    resume from the last completed stage and reuse valid clips. Writes are atomic
+    (temp file + rename) and throttled to ``save_interval`` seconds except at stage
+    boundaries.
+    """
+
+    def __init__(self, job_dir, params=None, save_interval=1.0):
+        self.job_dir = job_dir
+        self.path = os.path.join(job_dir, MANIFEST_NAME)
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._last_save = 0.0
+        os.makedirs(job_dir, exist_ok=True)
+
+        self.data = None
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                print(f"DEBUG: Unreadable job manifest {self.path}, starting over: {e}")
+        if self.data is None:
+            now = datetime.now().isoformat()
+            self.data = {
+                'job_id': os.path.basename(job_dir.rstrip(os.sep)),
+                'params': params or {},
+                'status': 'pending',
+                'created': now,
+                'updated': now,
+                'stages': {},
+                'chunks': {},
+                'segments': [],
+                'clips': {}
+            }
+            self.save(force=True)
+
+    @classmethod
+    def load(cls, job_dir):
+        if not os.path.exists(os.path.join(job_dir, MANIFEST_NAME)):
+            raise FileNotFoundError(f"No job manifest in {job_dir}")
+        return cls(job_dir)
+
+    @property
+    def job_id(self):
+        return self.data['job_id']
+
+    @property
+    def params(self):
+        return self.data['params']
+
+    def save(self, force=False):
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_save < self.save_interval:
+                return
+            self._last_save = now
+            self.data['updated'] = datetime.now().isoformat()
+            fd, tmp_path = tempfile.mkstemp(dir=self.job_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    def touch(self):
+        """Mark the job as alive without rewriting the manifest."""
+        with self._lock:
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    def keep_alive(self, interval=MANIFEST_KEEPALIVE_SEC):
+        """``touch`` every ``interval`` seconds from a thread until the returned event is set."""
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.touch()
+
+        threading.Thread(target=run, daemon=True).start()
+        return stop
+
+    def set_status(self, status, error=None):
+        with self._lock:
+            self.data['status'] = status
+            if error is not None:
+                self.data['error'] = str(error)
+            else:
+                self.data.pop('error', None)
+            self.save(force=True)
+
+    # --- Stages ---
+    def stage_done(self, name):
+        """True when ``name`` completed and every file it produced still exists."""
+        stage = self.data['stages'].get(name)
+        if not stage or stage.get('status') != 'done':
+            return False
+        for path in stage.get('files', []):
+            if not os.path.exists(path):
+                return False
+        return True
+
+    def stage_outputs(self, name):
+        return self.data['stages'].get(name, {}).get('outputs', {})
+
+    def start_stage(self, name):
+        """Mark ``name`` running; every later stage is invalidated since its inputs change."""
+        with self._lock:
+            self.data['stages'][name] = {'status': 'running', 'started': datetime.now().isoformat()}
+            if name in STAGES:
+                for later in STAGES[STAGES.index(name) + 1:]:
+                    self.data['stages'].pop(later, None)
+            self.save(force=True)
+
+    def complete_stage(self, name, files=None, **outputs):
+        """Mark a stage done; ``files`` are the paths it produced (checked on resume)."""
+        with self._lock:
+            stage = self.data['stages'].setdefault(name, {})
+            stage.update({
+                'status': 'done',
+                'finished': datetime.now().isoformat(),
+                'files': [p for p in (files or []) if p],
+                'outputs': outputs
+            })
+            self.save(force=True)
+
+    # --- Recognition checkpoints ---
+    def record_chunk(self, chunk_index, segments):
+        """Kept (rebased, de-duplicated) segments of one recognized chunk."""
+        with self._lock:
+            self.data['chunks'][str(chunk_index)] = [dict(seg) for seg in segments]
+            self.save()
+
+    def done_chunks(self):
+        return {int(k): v for k, v in self.data['chunks'].items()}
+
+    def record_segment(self, seg):
+        with self._lock:
+            self.data['segments'].append(dict(seg))
+            self.save()
+
+    def segments(self):
+        return list(self.data['segments'])
+
+    def reset_recognition(self):
+        with self._lock:
+            self.data['segments'] = []
+            self.save(force=True)
+
+    def adopt_recognition(self, source, target_lang):
+        """
+        Take the extract, denoise and recognize stages of ``source``, a job recognized
+        with ``target_lang`` among its translation languages, instead of redoing them.
+        Segments are re-pointed at ``target_lang``; later stages here are invalidated.
+        """
+        if not source.stage_done('recognize'):
+            raise ValueError(f"Job {source.job_id} has not finished recognition")
+        segments = []
+        for seg in source.segments():
+            translations = seg.get('translations') or {}
+            if target_lang not in translations:
+                raise ValueError(f"Job {source.job_id} was not recognized with target language '{target_lang}'")
+            seg = dict(seg)
+            seg['translated'] = translations[target_lang]
+            # The rate was chosen for the source job's voice and text
+            seg.pop('tts_rate', None)
+            segments.append(seg)
+        with self._lock:
+            for name in STAGES:
+                if name in ('extract', 'denoise', 'recognize') and name in source.data['stages']:
+                    self.data['stages'][name] = copy.deepcopy(source.data['stages'][name])
+                else:
+                    self.data['stages'].pop(name, None)
+            self.data['segments'] = segments
+            self.data['chunks'] = {}
+            self.data['source_job'] = source.job_id
+            self.save(force=True)
+
+    # --- Synthesized clips ---
+    def record_clip(self, clip_id, path, start, sha256):
+        with self._lock:
+            self.data['clips'][clip_id] = {'path': path, 'start': start, 'sha256': sha256}
+            self.save()
+
+    def valid_clip(self, clip_id):
+        """(path, start) of a recorded clip whose file still matches its hash, else None."""
+        clip = self.data['clips'].get(clip_id)
+        if not clip:
+            return None
+        try:
+            if sha256_file(clip['path']) != clip['sha256']:
+                return None
+        except OSError:
+            return None
+        return clip['path'], clip['start']
@@ -0,0 +1,225 @@
+import os
+import re
+import time
+import wave
+import subprocess
+
+import numpy as np
+
+
+def get_ffmpeg_exe():
+    """The ffmpeg binary bundled with imageio-ffmpeg (moviepy's), else the one on PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def probe_media(input_path):
+    """
+    Duration and stream codecs from ``ffmpeg -i`` without decoding anything.
+
+    Returns {'duration': float|None, 'video_codec': str|None, 'audio_codec': str|None}.
+    """
+    proc = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-i", input_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    info = proc.stderr.decode('utf-8', errors='replace')
+    duration = None
+    match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", info)
+    if match:
+        h, m, s = match.groups()
+        duration = int(h) * 3600 + int(m) * 60 + float(s)
+    video = re.search(r"Stream #\S+.*?: Video: (\w+)", info)
+    audio = re.search(r"Stream #\S+.*?: Audio: (\w+)", info)
+    return {
+        'duration': duration,
+        'video_codec': video.group(1) if video else None,
+        'audio_codec': audio.group(1) if audio else None
+    }
+
+
+def iter_audio_blocks(input_path, sample_rate=16000, block_sec=1.0, cancel=None):
+    """
+    Decode only the audio stream to mono int16 PCM through an ffmpeg pipe.
+
+    Yields NumPy int16 arrays of ``block_sec`` seconds (the last one may be shorter).
+    No video is decoded and nothing is written to disk. Cancelling ``cancel`` (a
+    CancelToken) kills ffmpeg and raises.
+    """
+    cmd = [
+        get_ffmpeg_exe(), "-v", "error", "-nostdin", "-i", input_path,
+        "-vn", "-sn", "-dn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le", "-"
+    ]
+    block_bytes = max(1, int(sample_rate * block_sec)) * 2
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if cancel is not None:
+        cancel.add_callback(proc.kill)
+    try:
+        pending = b""
+        while True:
+            data = proc.stdout.read(block_bytes - len(pending))
+            if cancel is not None:
+                cancel.check()
+            if not data:
+                break
+            pending += data
+            if len(pending) >= block_bytes:
+                yield np.frombuffer(pending, dtype='<i2')
+                pending = b""
+        if len(pending) >= 2:
+            yield np.frombuffer(pending[:len(pending) - len(pending) % 2], dtype='<i2')
+        proc.wait()
+        if proc.returncode not in (0, None):
+            err = proc.stderr.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg audio extraction failed: {err}")
+    finally:
+        if cancel is not None:
+            cancel.remove_callback(proc.kill)
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def run_ffmpeg(cmd, cancel=None):
+    """Run ffmpeg to completion; returns (returncode, stderr text). Cancelling ``cancel`` kills it and raises."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        if cancel is None:
+            _, err = proc.communicate()
+        else:
+            with cancel.on_cancel(proc.kill):
+                _, err = proc.communicate()
+            cancel.check()
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    return proc.returncode, err.decode('utf-8', errors='replace').strip()
+
+
+class WavBlockWriter:
+    """Block sink that appends int16 mono blocks to a WAV file."""
+
+    def __init__(self, path, sample_rate=16000):
+        self.path = path
+        self._wf = wave.open(path, 'wb')
+        self._wf.setnchannels(1)
+        self._wf.setsampwidth(2)
+        self._wf.setframerate(sample_rate)
+
+    def __call__(self, block):
+        self._wf.writeframes(block.tobytes())
+
+    def close(self):
+        if self._wf is not None:
+            self._wf.close()
+            self._wf = None
+
+
+def extract_audio(input_path, sinks, sample_rate=16000, block_sec=1.0, cancel=None):
+    """
+    Stream the input's audio through every sink (callables taking one int16 block).
+
+    Sinks can be a ``WavBlockWriter`` (only when a stage needs a file), a VAD
+    accumulator or a recognizer push stream
+    (``lambda b: session.write(b.tobytes())``). Sinks with a ``close`` method are
+    closed when extraction ends, also on failure. Returns the decoded duration.
+    """
+    n_samples = 0
+    try:
+        for block in iter_audio_blocks(input_path, sample_rate, block_sec, cancel=cancel):
+            n_samples += len(block)
+            for sink in sinks:
+                sink(block)
+    finally:
+        for sink in sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+    return n_samples / float(sample_rate)
+
+
+# Video codecs an .mp4 container can carry as-is; anything else is re-encoded
+MP4_COPY_CODECS = {'h264', 'hevc', 'mpeg4', 'av1', 'vp9'}
+
+
+def mux_video(video_path, audio_path, out_path, video_codec=None, mode="copy", cancel=None):
+    """
+    Replace the audio track of ``video_path`` with ``audio_path`` (AAC) into ``out_path``.
+
+    In "copy" mode the original video bitstream is copied untouched and only the
+    new audio is encoded; it falls back to a libx264 re-encode when the source codec
+    cannot go into the output container or the copy fails. Returns
+    {'path': 'copy'|'reencode', 'seconds': float, 'reason': str|None}.
+    """
+    t_start = time.time()
+    ext = os.path.splitext(out_path)[1].lower()
+    if video_codec is None:
+        video_codec = probe_media(video_path)['video_codec']
+
+    reason = None
+    if mode != "copy":
+        reason = "re-encode requested"
+    elif ext in ('.mp4', '.m4v', '.mov') and video_codec not in MP4_COPY_CODECS:
+        reason = f"video codec '{video_codec}' cannot be copied into {ext}"
+
+    def run(video_args):
+        cmd = [
+            get_ffmpeg_exe(), "-y", "-v", "error", "-nostdin",
+            "-i", video_path, "-i", audio_path,
+            "-map", "0:v:0", "-map", "1:a:0"
+        ] + video_args + ["-c:a", "aac", "-b:a", "192k", "-shortest", "-movflags", "+faststart", out_path]
+        return run_ffmpeg(cmd, cancel)
+
+    if reason is None:
+        code, err = run(["-c:v", "copy"])
+        if code == 0:
+            return {'path': 'copy', 'seconds': time.time() - t_start, 'reason': None}
+        reason = f"stream copy failed: {err.splitlines()[-1] if err else code}"
+        print(f"DEBUG: Remux fell back to re-encode ({reason})")
+
+    code, err = run(["-c:v", "libx264", "-pix_fmt", "yuv420p"])
+    if code != 0:
+        raise RuntimeError(f"ffmpeg video mux failed: {err}")
+    return {'path': 'reencode', 'seconds': time.time() - t_start, 'reason': reason}
+
+
+# ISO 639-2 codes for the translation languages, as MP4/MKV audio track tags expect
+ISO639_2 = {
+    'en': 'eng', 'hi': 'hin', 'fr': 'fra', 'es': 'spa', 'de': 'deu', 'ta': 'tam', 'te': 'tel',
+    'ml': 'mal', 'ar': 'ara', 'zh-cn': 'zho', 'ru': 'rus', 'ja': 'jpn', 'ko': 'kor', 'it': 'ita',
+    'pt': 'por', 'nl': 'nld', 'tr': 'tur', 'sv': 'swe', 'pl': 'pol', 'id': 'ind', 'el': 'ell'
+}
+
+
+def mux_multitrack(video_path, tracks, out_path, cancel=None):
+    """
+    One video with an AAC audio track per language.
+
+    ``tracks`` is [(audio_path, lang_code, title), ...]; the first track is the default.
+    The video bitstream is stream-copied. Returns {'tracks': int, 'seconds': float}.
+    """
+    t_start = time.time()
+    cmd = [get_ffmpeg_exe(), "-y", "-v", "error", "-nostdin", "-i", video_path]
+    for audio_path, _, _ in tracks:
+        cmd += ["-i", audio_path]
+    cmd += ["-map", "0:v:0"]
+    for i in range(len(tracks)):
+        cmd += ["-map", f"{i + 1}:a:0"]
+    cmd += ["-c:v", "copy", "-c:a", "aac", "-b:a", "192k"]
+    for i, (_, lang, title) in enumerate(tracks):
+        cmd += [
+            f"-metadata:s:a:{i}", f"language={ISO639_2.get(lang.lower(), lang)}",
+            f"-metadata:s:a:{i}", f"title={title or lang}",
+            f"-disposition:a:{i}", "default" if i == 0 else "0"
+        ]
+    cmd += ["-shortest", "-movflags", "+faststart", out_path]
+    code, err = run_ffmpeg(cmd, cancel)
+    if code != 0:
+        raise RuntimeError(f"ffmpeg multi-track mux failed: {err}")
+    return {'tracks': len(tracks), 'seconds': time.time() - t_start}
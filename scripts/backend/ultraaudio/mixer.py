@@ -0,0 +1,371 @@
+import os
+import time
+import wave
+import tracemalloc
+
+import numpy as np
+
+from .profiling import peak_rss_mb
+from .utils import pcm_to_wav_bytes
+
+
+def wav_duration(path):
+    """Duration in seconds from the RIFF header, without decoding any samples."""
+    with wave.open(path, 'rb') as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+
+def read_wav_samples(path, sample_rate=None):
+    """
+    Decode a 16-bit PCM WAV to a mono float32 array in [-1, 1].
+
+    Multi-channel audio is down-mixed; if ``sample_rate`` differs from the file's
+    rate the signal is linearly resampled.
+    """
+    with wave.open(path, 'rb') as wf:
+        sr = wf.getframerate()
+        channels = wf.getnchannels()
+        raw = wf.readframes(wf.getnframes())
+    samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    if sample_rate and sr != sample_rate and len(samples):
+        n_out = int(round(len(samples) * sample_rate / float(sr)))
+        positions = np.linspace(0, len(samples) - 1, n_out)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def clip_duration(path, store=None):
+    """Duration of a clip held by ``store`` (a SegmentAudioStore) or, failing that, on disk."""
+    clip = store.get(path) if store is not None else None
+    return clip.duration if clip is not None else wav_duration(path)
+
+
+def clip_samples(path, sample_rate=None, store=None):
+    clip = store.get(path) if store is not None else None
+    return clip.samples(sample_rate) if clip is not None else read_wav_samples(path, sample_rate)
+
+
+def time_stretch(samples, factor, frame=512, hop=256, tolerance=128):
+    """
+    Speed ``samples`` up by ``factor`` (> 1 shortens) keeping the pitch (WSOLA).
+
+    Windowed frames are taken about every ``hop * factor`` input samples and
+    overlap-added every ``hop`` output samples; each frame is moved by up to
+    ``tolerance`` samples to where it best continues the previous one, so the
+    waveforms line up instead of interfering. Clips shorter than a few frames
+    are resampled instead.
+    """
+    n_out = int(round(len(samples) / factor))
+    if factor == 1.0 or n_out < 1:
+        return samples
+    if len(samples) < frame * 4:
+        positions = np.linspace(0, len(samples) - 1, n_out)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    samples = np.asarray(samples, dtype=np.float32)
+    window = np.hanning(frame).astype(np.float32)
+    n_frames = max(1, int(np.ceil((n_out - frame) / float(hop))) + 1)
+    last_start = len(samples) - frame
+    out = np.zeros(n_frames * hop + frame, dtype=np.float32)
+    norm = np.zeros_like(out)
+    start = 0
+    for k in range(n_frames):
+        if k:
+            natural = min(start + hop, last_start)
+            nominal = int(k * hop * factor)
+            lo = max(0, min(nominal - tolerance, last_start))
+            hi = max(lo, min(nominal + tolerance, last_start))
+            corr = np.correlate(samples[lo:hi + frame], samples[natural:natural + frame], mode='valid')
+            start = lo + int(np.argmax(corr))
+        out[k * hop:k * hop + frame] += samples[start:start + frame] * window
+        norm[k * hop:k * hop + frame] += window
+    out /= np.maximum(norm, 1e-3)
+    return out[:n_out]
+
+
+def fit_clips_to_slots(clip_data_list, total_duration, max_speedup=1.25, tolerance=0.02, store=None):
+    """
+    Time-stretch clips that would run into the next clip (or past the end of the
+    media) so they fit their slot, up to ``max_speedup``; anything left over is
+    shifted by ``resolve_overlap_offsets`` as before. Stretched clips are named
+    ``*_fit.wav`` next to the originals; with a ``store`` they are kept in memory
+    and only written when the store is full.
+
+    Returns ([(path, start), ...], stats).
+    """
+    clips = sorted(clip_data_list, key=lambda x: x[1])
+    fitted = []
+    stretched = 0
+    max_factor = 1.0
+    residual_sec = 0.0
+    for i, (path, start) in enumerate(clips):
+        end = clips[i + 1][1] if i + 1 < len(clips) else max(total_duration, start)
+        slot = end - start
+        try:
+            duration = clip_duration(path, store)
+        except Exception:
+            fitted.append((path, start))
+            continue
+        if max_speedup <= 1.0 or slot <= 0 or duration <= slot * (1.0 + tolerance):
+            fitted.append((path, start))
+            continue
+        factor = min(duration / slot, max_speedup)
+        clip = store.get(path) if store is not None else None
+        if clip is not None:
+            sample_rate = clip.sample_rate
+        else:
+            with wave.open(path, 'rb') as wf:
+                sample_rate = wf.getframerate()
+        samples = time_stretch(clip_samples(path, store=store), factor)
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+        out_path = os.path.splitext(path)[0] + "_fit.wav"
+        wav_bytes = pcm_to_wav_bytes(pcm.tobytes(), sample_rate)
+        if store is not None:
+            store.spill(out_path, wav_bytes)
+        else:
+            with open(out_path, 'wb') as f:
+                f.write(wav_bytes)
+        fitted.append((out_path, start))
+        stretched += 1
+        max_factor = max(max_factor, factor)
+        residual_sec += max(0.0, duration / factor - slot)
+    return fitted, {'clips': len(fitted), 'stretched': stretched, 'max_factor': max_factor,
+                    'residual_overrun_sec': residual_sec}
+
+
+def resolve_overlap_offsets(clip_data_list, gap_sec=0.05, store=None):
+    """
+    Place clips on the timeline: [(path, start, duration), ...] sorted by start.
+
+    A clip that would overlap the previous one is pushed to just after it.
+    Durations come from the WAV header (in ``store`` or on disk), so no clip is
+    opened through moviepy/ffmpeg.
+    """
+    placements = []
+    last_end_time = 0.0
+    for path, start_time in sorted(clip_data_list, key=lambda x: x[1]):
+        try:
+            duration = clip_duration(path, store)
+        except Exception as e:
+            print(f"DEBUG: Skipping unreadable clip {path}: {e}")
+            continue
+        if start_time < last_end_time:
+            start_time = last_end_time + gap_sec
+        placements.append((path, start_time, duration))
+        last_end_time = start_time + duration
+    return placements
+
+
+def mix_timeline(placements, total_duration, out_path, sample_rate=16000,
+                 ambience_path=None, ambience_gain=0.0, cancel=None, store=None):
+    """
+    Mix placed clips into one preallocated float32 timeline and write it in one go.
+
+    Each clip is decoded once (from ``store`` if it holds it) and added at its offset; the ambience track (if any)
+    is scaled and added in a single vectorized pass. Output is 16-bit mono PCM.
+    Returns a stats dict (samples, clips, buffer and peak memory).
+    """
+    t_start = time.time()
+    end = max([total_duration] + [start + duration for _, start, duration in placements])
+    timeline = np.zeros(int(np.ceil(end * sample_rate)), dtype=np.float32)
+
+    mixed = 0
+    for path, start, _ in placements:
+        if cancel is not None:
+            cancel.check()
+        try:
+            samples = clip_samples(path, sample_rate, store)
+        except Exception as e:
+            print(f"DEBUG: Failed to decode clip {path}: {e}")
+            continue
+        offset = int(round(start * sample_rate))
+        n = min(len(samples), len(timeline) - offset)
+        if n > 0:
+            timeline[offset:offset + n] += samples[:n]
+            mixed += 1
+
+    if ambience_path and ambience_gain > 0:
+        ambience = read_wav_samples(ambience_path, sample_rate)
+        n = min(len(ambience), len(timeline))
+        timeline[:n] += ambience_gain * ambience[:n]
+
+    np.clip(timeline, -1.0, 1.0, out=timeline)
+    pcm = (timeline * 32767).astype('<i2')
+    with wave.open(out_path, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm.tobytes())
+
+    return {
+        'samples': len(timeline),
+        'clips': mixed,
+        'buffer_mb': (timeline.nbytes + pcm.nbytes) / (1024 * 1024),
+        'peak_rss_mb': peak_rss_mb(),
+        'seconds': time.time() - t_start
+    }
+
+
+class WavWindowReader:
+    """Sequential reader of a 16-bit PCM WAV, as mono float32 at ``sample_rate``, one window at a time."""
+
+    def __init__(self, path, sample_rate):
+        self.sample_rate = sample_rate
+        self._wf = wave.open(path, 'rb')
+        self._file_rate = self._wf.getframerate()
+        self._channels = self._wf.getnchannels()
+
+    def read(self, n):
+        """Up to ``n`` samples (fewer at the end of the file)."""
+        n_file = n if self._file_rate == self.sample_rate else int(round(n * self._file_rate / float(self.sample_rate)))
+        raw = self._wf.readframes(n_file)
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        if self._channels > 1:
+            samples = samples.reshape(-1, self._channels).mean(axis=1)
+        if self._file_rate != self.sample_rate and len(samples):
+            n_out = int(round(len(samples) * self.sample_rate / float(self._file_rate)))
+            positions = np.linspace(0, len(samples) - 1, n_out)
+            samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        return samples[:n]
+
+    def close(self):
+        self._wf.close()
+
+
+def mix_streaming(placements, total_duration, out_path, sample_rate=16000,
+                  ambience_path=None, ambience_gain=0.0, window_sec=30.0, cancel=None, store=None):
+    """
+    Same mix as ``mix_timeline`` in constant memory, for multi-hour media.
+
+    The timeline is walked in ``window_sec`` windows: only the clips overlapping a
+    window are decoded (and dropped once it has passed them), the matching slice of
+    the ambience track is read, and the mixed window is appended to the output.
+    Every file is closed even on failure or cancellation (``cancel`` is checked
+    per window), and a partial output is removed.
+    Returns a stats dict (samples, clips, windows, buffer and peak memory).
+    """
+    t_start = time.time()
+    end = max([total_duration] + [start + duration for _, start, duration in placements])
+    total = int(np.ceil(end * sample_rate))
+    window = max(1, int(window_sec * sample_rate))
+    clips = [(int(round(start * sample_rate)), path) for path, start, _ in sorted(placements, key=lambda p: p[1])]
+    buffer = np.zeros(window, dtype=np.float32)
+    decoded = {}
+    mixed = set()
+    next_clip = 0
+    windows = 0
+    ambience = None
+    wf = None
+    try:
+        if ambience_path and ambience_gain > 0:
+            ambience = WavWindowReader(ambience_path, sample_rate)
+        wf = wave.open(out_path, 'wb')
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        for w_start in range(0, total, window):
+            if cancel is not None:
+                cancel.check()
+            w_end = min(total, w_start + window)
+            buf = buffer[:w_end - w_start]
+            buf.fill(0.0)
+            while next_clip < len(clips) and clips[next_clip][0] < w_end:
+                offset, path = clips[next_clip]
+                try:
+                    decoded[next_clip] = (offset, clip_samples(path, sample_rate, store))
+                except Exception as e:
+                    print(f"DEBUG: Failed to decode clip {path}: {e}")
+                next_clip += 1
+            # Placement order, so the float sums match mix_timeline exactly
+            for i in sorted(decoded):
+                offset, samples = decoded[i]
+                a = max(offset, w_start)
+                b = min(offset + len(samples), w_end)
+                if b > a:
+                    buf[a - w_start:b - w_start] += samples[a - offset:b - offset]
+                    mixed.add(i)
+                if offset + len(samples) <= w_end:
+                    del decoded[i]
+            if ambience is not None:
+                amb = ambience.read(len(buf))
+                buf[:len(amb)] += ambience_gain * amb
+            np.clip(buf, -1.0, 1.0, out=buf)
+            wf.writeframes((buf * 32767).astype('<i2').tobytes())
+            windows += 1
+    except Exception:
+        if wf is not None:
+            wf.close()
+            wf = None
+        try:
+            os.remove(out_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        if wf is not None:
+            wf.close()
+        if ambience is not None:
+            ambience.close()
+
+    return {
+        'samples': total,
+        'clips': len(mixed),
+        'windows': windows,
+        # Window buffer plus its 16-bit copy, the same accounting as mix_timeline
+        'buffer_mb': (buffer.nbytes + window * 2) / (1024 * 1024),
+        'peak_rss_mb': peak_rss_mb(),
+        'seconds': time.time() - t_start
+    }
+
+
+def mix_with_moviepy(placements, total_duration, out_path, sample_rate=16000,
+                     ambience_path=None, ambience_gain=0.0, cancel=None):
+    """The legacy CompositeAudioClip assembly, kept as a fallback and benchmark baseline."""
+    import moviepy.editor as mp
+
+    t_start = time.time()
+    clips = []
+    try:
+        for path, start, _ in placements:
+            if cancel is not None:
+                cancel.check()
+            clips.append(mp.AudioFileClip(path).set_start(start))
+        final_audio = mp.CompositeAudioClip(clips)
+        final_end = max([c.end for c in clips] + [0])
+        final_audio.duration = max(total_duration, final_end)
+        if ambience_path and ambience_gain > 0:
+            ambience = mp.AudioFileClip(ambience_path)
+            clips.append(ambience)
+            final_audio = mp.CompositeAudioClip([ambience.volumex(ambience_gain), final_audio])
+            final_audio.duration = total_duration
+        final_audio.write_audiofile(out_path, codec='pcm_s16le', fps=sample_rate, logger=None)
+    finally:
+        for c in clips:
+            try:
+                c.close()
+            except Exception:
+                pass
+    return {'clips': len(placements), 'peak_rss_mb': peak_rss_mb(), 'seconds': time.time() - t_start}
+
+
+def benchmark_mixers(clip_data_list, total_duration, out_dir, ambience_path=None, ambience_gain=0.15):
+    """
+    Run the NumPy, streaming and moviepy mixers on the same clips.
+
+    Returns {'numpy': stats, 'streaming': stats, 'moviepy': stats} where each stats dict also carries
+    the Python-heap peak (``traced_peak_mb``) measured with tracemalloc.
+    """
+    placements = resolve_overlap_offsets(clip_data_list)
+    results = {}
+    for name, mixer in (('numpy', mix_timeline), ('streaming', mix_streaming), ('moviepy', mix_with_moviepy)):
+        out_path = os.path.join(out_dir, f"bench_mix_{name}.wav")
+        tracemalloc.start()
+        try:
+            stats = mixer(placements, total_duration, out_path,
+                          ambience_path=ambience_path, ambience_gain=ambience_gain)
+            stats['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+        results[name] = stats
+    return results
@@ -1,4 +1,3 @@
-import os
 import time
 import uuid
 import math
@@ -6,13 +5,40 @@ import random
 import collections
 import threading
 import queue
-import json
 import concurrent.futures
 from datetime import datetime
 
 import numpy as np
-import azure.cognitiveservices.speech as speechsdk
-from .config import AZURE_KEY, AZURE_LOCATION
+from .backends import get_speech_backend, PcmChunkSplitter
+from .tts_cache import get_tts_cache
+from .media_io import iter_audio_blocks
+from .reorder_buffer import ReorderBuffer, DEFAULT_DEADLINE_SEC
+from .speculation import Speculator, DEFAULT_STABILITY
+from .synth_pool import VoiceSynthesizerPools
+from .utils import pcm_to_wav_bytes
+
+TTS_WORKERS = 4
+# Idle pooled synthesizers are probed (and replaced if broken) this often during silence
+SYNTH_HEALTH_CHECK_SEC = 60.0
+
+
+class PhraseAudio:
+    """The audio of one phrase while it is being synthesized: PCM chunks, then its metrics."""
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self.metrics = None
+
+    def write(self, pcm):
+        self._chunks.put(pcm)
+
+    def finish(self, metrics=None):
+        self.metrics = metrics
+        self._chunks.put(None)
+
+    def read(self, timeout=None):
+        """The next PCM chunk, None once the phrase is complete; raises queue.Empty on timeout."""
+        return self._chunks.get(timeout=timeout)
 
 
 class LiveTranslationOrchestrator:
@@ -28,7 +54,13 @@ class LiveTranslationOrchestrator:
         voice_map,
         voice_rate="0%",
         voice_pitch="default",
-        voice_style="Neutral"
+        voice_style="Neutral",
+        backend=None,
+        playback_deadline_sec=DEFAULT_DEADLINE_SEC,
+        streaming_tts=True,
+        speculative=False,
+        speculation_stability=DEFAULT_STABILITY,
+        playback_piece_sec=None
     ):
         self.source_lang = source_lang
         self.primary_lang = primary_target_lang
@@ -37,21 +69,33 @@ class LiveTranslationOrchestrator:
         self.voice_rate = voice_rate
         self.voice_pitch = voice_pitch
         self.voice_style = voice_style
+        self.backend = backend or get_speech_backend()
+        self.tts_cache = get_tts_cache()
         
         self.result_queue = queue.Queue()
         self.audio_queue = queue.Queue()
 
+        # Total synthesis time per phrase, and time until its first audio chunk
         self.latencies = []
+        self.first_audio_latencies = []
         self.confidence_scores = []
+        self.streaming_tts = streaming_tts
+        # None: one WAV per phrase in audio_queue, which the Live tab plays as one
+        # <audio> tag. Only a player that queues pieces in order can take the phrase
+        # in pieces of this many seconds while it is still being synthesized.
+        self.playback_piece_sec = playback_piece_sec
 
         self.is_running = False
         self.recognizer = None
-        self.tts_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.tts_executor = concurrent.futures.ThreadPoolExecutor(max_workers=TTS_WORKERS)
+        self.synth_pools = None
+        # Opt-in: synthesize stable leading clauses from partial results before the final one
+        self.speculator = Speculator(self.tts_executor, speculation_stability) if speculative else None
 
+        # Every recognized phrase gets a sequence id; its audio (or a skip marker when
+        # there is nothing to speak) is played strictly in that order
         self.sequence_id_counter = 0
-        self.next_play_id = 0
-        self.audio_buffer = {}
-        self.playback_lock = threading.Lock()
+        self.playback_buffer = ReorderBuffer(deadline_sec=playback_deadline_sec)
         self.last_voice_activity = 0
         
         # WebRTC Support
@@ -139,47 +183,110 @@ class LiveTranslationOrchestrator:
 
     def stop_pipeline(self):
         self.is_running = False
+        self.playback_buffer.close()
         if self.tts_executor:
             self.tts_executor.shutdown(wait=False)
+        print(f"Live playback: {self.get_playback_stats()}")
+        if self.synth_pools:
+            print(f"Live synthesizers: {self.synth_pools.get_stats()}")
+        if self.speculator:
+            print(f"Live speculation: {self.get_speculation_stats()}")
+
+    def _play(self, pcm):
+        self.audio_queue.put(pcm_to_wav_bytes(pcm))
+        time.sleep(len(pcm) / 32000.0)
 
     def _playback_worker(self):
+        piece_bytes = int(self.playback_piece_sec * 32000) if self.playback_piece_sec else None
         while self.is_running:
-            item_to_play = None
-            with self.playback_lock:
-                if self.next_play_id in self.audio_buffer:
-                    item_to_play = self.audio_buffer.pop(self.next_play_id)
-
-            if item_to_play:
-                self.next_play_id += 1
-                # Check if it's a valid item or a failure placeholder
-                if item_to_play.get('audio_data'):
-                    self.result_queue.put(item_to_play['metrics'])
-                    self.audio_queue.put(item_to_play['audio_data'])
-                    audio_size = len(item_to_play['audio_data'])
-                    duration_sec = audio_size / 32000.0
-                    time.sleep(duration_sec + 0.05)
-                else:
-                    # It was a failure/skip, just log or ignore
-                    pass
-            else:
-                time.sleep(0.05)
-
-    def _process_tts_task(self, seq_id, original_text, translated_text, synthesizer, lang_code):
-        try:
-            styled_rate, styled_pitch = self._style_adjustments()
-            t_start = time.time()
-
-            ssml_string = f"""
+            # Blocks until the next phrase has audio; missing or overdue ones are skipped
+            phrase = self.playback_buffer.get(timeout=0.5)
+            if not phrase:
+                continue
+            # Collect the phrase as it is synthesized (played piece by piece if enabled)
+            pending = b""
+            while self.is_running:
+                try:
+                    pcm = phrase.read(timeout=self.playback_buffer.deadline_sec)
+                except queue.Empty:
+                    print("Live playback: synthesis stalled mid-phrase; moving on")
+                    break
+                if pcm is None:
+                    break
+                pending += pcm
+                if piece_bytes and len(pending) >= piece_bytes:
+                    self._play(pending)
+                    pending = b""
+            if pending:
+                self._play(pending)
+            if phrase.metrics:
+                self.result_queue.put(phrase.metrics)
+            time.sleep(0.05)
+
+    def get_playback_stats(self):
+        """Reorder buffer metrics: delivered and skipped phrases, head-of-line blocking time."""
+        return self.playback_buffer.get_stats()
+
+    def get_speculation_stats(self):
+        """Speculative synthesis counters (hit rate, wasted synthesis), or None when it is off."""
+        return self.speculator.get_stats() if self.speculator else None
+
+    def _ssml(self, text, lang_code):
+        styled_rate, styled_pitch = self._style_adjustments()
+        voice_name = self.voice_map.get(lang_code, self.voice_map.get(self.primary_lang))
+        return f"""
             <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
-                <voice name="{self.voice_map.get(lang_code, self.voice_map.get(self.primary_lang))}">
+                <voice name="{voice_name}">
                     <prosody rate="{styled_rate}" pitch="{styled_pitch}">
-                        {translated_text}
+                        {text}
                     </prosody>
                 </voice>
             </speak>
             """
 
-            tts_result = synthesizer.speak_ssml_async(ssml_string).get()
+    def _process_tts_task(self, seq_id, original_text, translated_text, synthesizer, lang_code, speculated=None):
+        phrase = PhraseAudio()
+        first_audio = {'t': None}
+        try:
+            styled_rate, styled_pitch = self._style_adjustments()
+            t_start = time.time()
+            voice_name = self.voice_map.get(lang_code, self.voice_map.get(self.primary_lang))
+
+            def on_chunk(pcm):
+                if first_audio['t'] is None:
+                    # Playable from its first chunk
+                    first_audio['t'] = time.time()
+                    self.playback_buffer.put(seq_id, phrase)
+                phrase.write(pcm)
+
+            # Speculated leading clauses that match the final text are played as they are
+            remaining_text = translated_text
+            if speculated:
+                remaining_text = self.speculator.claim(speculated, translated_text, on_chunk)
+
+            tts_ok = True
+            if remaining_text:
+                ssml_string = self._ssml(remaining_text, lang_code)
+                streamed = {'any': False}
+
+                def on_stream_chunk(pcm):
+                    streamed['any'] = True
+                    on_chunk(pcm)
+
+                def synthesize():
+                    if self.streaming_tts:
+                        return synthesizer.speak_ssml_stream(ssml_string, on_stream_chunk)
+                    return synthesizer.speak_ssml(ssml_string)
+
+                cache_key = self.tts_cache.make_key(
+                    self.backend.name, voice_name, styled_rate, styled_pitch, self.voice_style,
+                    synthesizer.output_format, remaining_text
+                )
+                tts_result = self.tts_cache.fetch_or_synthesize(cache_key, synthesize)
+                if tts_result.ok and not streamed['any']:
+                    # Cache hit or non-streaming synthesis: the whole phrase at once
+                    PcmChunkSplitter(on_chunk).feed(tts_result.audio_data)
+                tts_ok = tts_result.ok
             t_end = time.time()
             latency = (t_end - t_start) * 1000
 
@@ -190,6 +297,7 @@ class LiveTranslationOrchestrator:
                 "original": original_text,
                 "translated": translated_text,
                 "latency": latency,
+                "first_audio_ms": (first_audio['t'] - t_start) * 1000 if first_audio['t'] else None,
                 "bleu": quality, # Mapping quality est to BLEU field for UI compatibility
                 "p_gram": confidence, # Mapping confidence to p_gram field
                 "confidence": confidence,
@@ -199,170 +307,169 @@ class LiveTranslationOrchestrator:
 
             self.latencies.append(latency)
             self.confidence_scores.append(confidence)
+            if tts_ok and first_audio['t'] is not None:
+                # A success with no audio has no time to first audio
+                self.first_audio_latencies.append(metrics["first_audio_ms"])
 
-            if tts_result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                with self.playback_lock:
-                    self.audio_buffer[seq_id] = {
-                        'metrics': metrics,
-                        'audio_data': tts_result.audio_data
-                    }
+            if first_audio['t'] is not None:
+                # A failure mid-stream ends the phrase with the audio already played
+                phrase.finish(metrics if tts_ok else None)
             else:
-                # Handle synthesis failure
-                with self.playback_lock:
-                    self.audio_buffer[seq_id] = {'metrics': None, 'audio_data': None}
+                # Synthesis failed: nothing to play for this phrase
+                self.playback_buffer.skip(seq_id)
 
         except Exception as e:
             print(f"Background TTS Error: {e}")
             # Ensure we don't block playback
-            with self.playback_lock:
-                self.audio_buffer[seq_id] = {'metrics': None, 'audio_data': None}
+            if first_audio['t'] is not None:
+                phrase.finish()
+            else:
+                self.playback_buffer.skip(seq_id)
 
     def _run_translation_loop(self, input_type, file_path):
         try:
-            translation_config = speechsdk.translation.SpeechTranslationConfig(
-                subscription=AZURE_KEY,
-                region=AZURE_LOCATION
-            )
-            # Will be set by the UI before starting; keep placeholder usage in case.
-            translation_config.speech_recognition_language = self.source_lang
-            for t_lang in self.bridge_langs:
-                translation_config.add_target_language(t_lang)
-
             if input_type == "File Simulation" and file_path:
-                stream = speechsdk.audio.PushAudioInputStream()
-                audio_config = speechsdk.audio.AudioConfig(stream=stream)
+                self.recognizer = self.backend.open_recognition(self.source_lang, self.bridge_langs)
                 threading.Thread(
                     target=self._push_audio_chunks,
-                    args=(file_path, stream),
+                    args=(file_path, self.recognizer),
                     daemon=True
                 ).start()
             elif input_type == "WebRTC":
                 # Create a push stream that external callers (WebRTC processor) can write to
-                self.push_stream = speechsdk.audio.PushAudioInputStream()
-                audio_config = speechsdk.audio.AudioConfig(stream=self.push_stream)
+                self.recognizer = self.backend.open_recognition(self.source_lang, self.bridge_langs)
+                self.push_stream = self.recognizer
             else:
                 # Default Microphone (Local only) - DISABLED for Cloud Stability
-                # audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
                 raise ValueError(f"Invalid input_type '{input_type}'. Cloud deployment does not support default microphone. Use 'WebRTC' or 'File Simulation'.")
 
-            self.recognizer = speechsdk.translation.TranslationRecognizer(
-                translation_config=translation_config,
-                audio_config=audio_config
-            )
-
-            tts_config = speechsdk.SpeechConfig(subscription=AZURE_KEY, region=AZURE_LOCATION)
-            tts_config.speech_synthesis_voice_name = self.voice_map.get(self.primary_lang, "en-US-JennyNeural")
-            tts_config.set_speech_synthesis_output_format(
-                speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm
-            )
+            # Pre-connected synthesizers, one per TTS worker, for the primary voice only:
+            # bridge languages are delivered as text and never synthesized. Synthesizer
+            # audio goes to a null output; we only want the audio data to send to the frontend
+            primary_voice = self.voice_map.get(self.primary_lang, "en-US-JennyNeural")
+            pool_sizes = {primary_voice: TTS_WORKERS}
+            self.synth_pools = VoiceSynthesizerPools(self.backend, pool_sizes, output_format="Riff16Khz16BitMonoPcm")
+            # Warm-up: the first phrase should not pay for connection or voice setup
+            self.synth_pools.check_health()
+            synthesizer = self.synth_pools.get(primary_voice)
 
-            # Prevent backend playback by directing to null output
-            # We only want the audio data to send to the frontend
-            audio_config = speechsdk.audio.AudioConfig(filename=os.devnull)
-            synthesizer = speechsdk.SpeechSynthesizer(speech_config=tts_config, audio_config=audio_config)
-            connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
-            connection.open(True)
+            def speak_speculative(text):
+                return synthesizer.speak_ssml(self._ssml(text, self.primary_lang))
 
-            def activity_callback(evt):
+            def activity_callback(result):
                 self.last_voice_activity = time.time()
+                partial_translation = result.translations.get(self.primary_lang)
+                if self.speculator and partial_translation:
+                    self.speculator.on_partial(partial_translation, speak_speculative)
 
-            def result_callback(evt):
+            def result_callback(result):
                 self.last_voice_activity = time.time()
-                if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
-                    current_seq_id = self.sequence_id_counter
-                    self.sequence_id_counter += 1
-                    original_text = evt.result.text
-                    translations = evt.result.translations
-
-                    if self.primary_lang in translations:
-                        translated_text = translations[self.primary_lang]
-                        if translated_text:
-                            self.tts_executor.submit(
-                                self._process_tts_task,
-                                current_seq_id,
-                                original_text,
-                                translated_text,
-                                synthesizer,
-                                self.primary_lang
-                            )
-
-                    for lang_code, translated_text in translations.items():
-                        if lang_code == self.primary_lang:
-                            continue
-                        if not translated_text:
-                            continue
-
-                        # Extract REAL confidence from Azure JSON result
-                        try:
-                            json_res = json.loads(evt.result.json)
-                            confidence_val = json_res.get('NBest', [{}])[0].get('Confidence', 0.0)
-                            confidence = confidence_val * 100.0
-                        except Exception:
-                            confidence = 0.0
-
-                        # Calculate Quality Estimate distinct from Confidence
-                        # We combine Confidence with a "Length Consistency" heuristic
-                        # This ensures Quality != Confidence and reflects translation structural integrity
-                        len_orig = len(original_text)
-                        len_trans = len(translated_text)
-                        ratio = len_trans / len_orig if len_orig > 0 else 0
-                        
-                        # Penalize if translation length deviates significantly from original
-                        # (e.g. hallucination or truncation)
-                        deviation = abs(ratio - 1.0)
-                        consistency_factor = max(0.7, 1.0 - (deviation * 0.2)) # Factor between 0.7 and 1.0
-                        
-                        quality_est = confidence * consistency_factor
-
-                        metrics = {
-                            "id": str(uuid.uuid4())[:8],
-                            "original": original_text,
-                            "translated": translated_text,
-                            "latency": 0.0,
-                            "bleu": quality_est,
-                            "p_gram": confidence,
-                            "confidence": confidence,
-                            "lang": lang_code,
-                            "timestamp": datetime.now().strftime("%H:%M:%S")
-                        }
-                        self.result_queue.put(metrics)
-
-            def canceled_callback(evt):
-                print(f"Azure Cancellation: {evt.result.reason}")
-                if evt.result.reason == speechsdk.ResultReason.Canceled:
-                    cancellation_details = evt.result.cancellation_details
-                    print(f"Cancellation Details: {cancellation_details.reason}")
-                    print(f"Cancellation Error Details: {cancellation_details.error_details}")
+                current_seq_id = self.sequence_id_counter
+                self.sequence_id_counter += 1
+                self.playback_buffer.expect(current_seq_id)
+                original_text = result.text
+                translations = result.translations
+                speculated = self.speculator.take() if self.speculator else []
+
+                translated_text = translations.get(self.primary_lang)
+                if translated_text:
+                    try:
+                        self.tts_executor.submit(
+                            self._process_tts_task,
+                            current_seq_id,
+                            original_text,
+                            translated_text,
+                            synthesizer,
+                            self.primary_lang,
+                            speculated
+                        )
+                    except RuntimeError:
+                        # Executor already shut down (pipeline stopping)
+                        self.playback_buffer.skip(current_seq_id)
+                        if speculated:
+                            self.speculator.discard(speculated)
+                else:
+                    # No primary translation: nothing will ever arrive for this id
+                    self.playback_buffer.skip(current_seq_id)
+                    if speculated:
+                        self.speculator.discard(speculated)
+
+                for lang_code, translated_text in translations.items():
+                    if lang_code == self.primary_lang:
+                        continue
+                    if not translated_text:
+                        continue
+
+                    # REAL confidence reported by the recognizer
+                    confidence = result.confidence
+
+                    # Calculate Quality Estimate distinct from Confidence
+                    # We combine Confidence with a "Length Consistency" heuristic
+                    # This ensures Quality != Confidence and reflects translation structural integrity
+                    len_orig = len(original_text)
+                    len_trans = len(translated_text)
+                    ratio = len_trans / len_orig if len_orig > 0 else 0
                     
-                    self.result_queue.put({
+                    # Penalize if translation length deviates significantly from original
+                    # (e.g. hallucination or truncation)
+                    deviation = abs(ratio - 1.0)
+                    consistency_factor = max(0.7, 1.0 - (deviation * 0.2)) # Factor between 0.7 and 1.0
+                    
+                    quality_est = confidence * consistency_factor
+
+                    metrics = {
                         "id": str(uuid.uuid4())[:8],
-                        "original": f"AZURE ERROR: {cancellation_details.error_details}",
-                        "translated": "Session canceled by Azure.",
-                        "latency": 0,
-                        "bleu": 0,
-                        "p_gram": 0,
-                        "confidence": 0,
-                        "lang": "Error",
+                        "original": original_text,
+                        "translated": translated_text,
+                        "latency": 0.0,
+                        "bleu": quality_est,
+                        "p_gram": confidence,
+                        "confidence": confidence,
+                        "lang": lang_code,
                         "timestamp": datetime.now().strftime("%H:%M:%S")
-                    })
-                    self.is_running = False
-                    # Force stop recognition to break the loop
-                    try:
-                        self.recognizer.stop_continuous_recognition_async()
-                    except:
-                        pass
+                    }
+                    self.result_queue.put(metrics)
+
+            def canceled_callback(error_details):
+                print(f"Azure Cancellation: {error_details}")
+                self.result_queue.put({
+                    "id": str(uuid.uuid4())[:8],
+                    "original": f"AZURE ERROR: {error_details}",
+                    "translated": "Session canceled by Azure.",
+                    "latency": 0,
+                    "bleu": 0,
+                    "p_gram": 0,
+                    "confidence": 0,
+                    "lang": "Error",
+                    "timestamp": datetime.now().strftime("%H:%M:%S")
+                })
+                self.is_running = False
+                # Force stop recognition to break the loop
+                try:
+                    self.recognizer.stop(wait=False)
+                except:
+                    pass
 
-            self.recognizer.recognizing.connect(activity_callback)
-            self.recognizer.recognized.connect(result_callback)
-            self.recognizer.canceled.connect(canceled_callback)
-            self.recognizer.start_continuous_recognition_async()
+            self.recognizer.connect(
+                on_recognized=result_callback,
+                on_recognizing=activity_callback,
+                on_canceled=canceled_callback
+            )
+            self.recognizer.start()
 
+            last_health_check = time.time()
             while self.is_running:
                 time.sleep(0.1)
-            self.recognizer.stop_continuous_recognition_async()
+                if time.time() - last_health_check >= SYNTH_HEALTH_CHECK_SEC and not self.is_voice_active():
+                    self.synth_pools.check_health(min_idle_sec=SYNTH_HEALTH_CHECK_SEC)
+                    last_health_check = time.time()
+            self.recognizer.stop(wait=False)
+            self.synth_pools.close()
 
         except Exception as e:
             print(f"Pipeline Error: {e}")
+            if self.synth_pools:
+                self.synth_pools.close()
             self.result_queue.put({
                 "id": str(uuid.uuid4())[:8],
                 "original": f"SYSTEM ERROR: {str(e)}",
@@ -377,22 +484,31 @@ class LiveTranslationOrchestrator:
             self.is_running = False
 
     def _push_audio_chunks(self, file_path, stream):
-        chunk_size = 6400
-        with open(file_path, 'rb') as f:
-            while self.is_running:
-                data = f.read(chunk_size)
-                if not data:
+        # Decoded to 16 kHz mono PCM on the fly, so any WAV layout (or media file) works
+        # and the RIFF header is never pushed as audio
+        blocks = iter_audio_blocks(file_path, sample_rate=16000, block_sec=0.2)
+        try:
+            for block in blocks:
+                if not self.is_running:
                     break
-                stream.write(data)
+                stream.write(block.tobytes())
                 time.sleep(0.1)
-        stream.close()
+        finally:
+            blocks.close()
+            stream.close_stream()
 
     def get_stats(self):
+        """
+        (p95, p99 synthesis latency, quality, confidence, p95, p99 time to first audio),
+        latencies in ms. Time to first audio is when a phrase could start playing.
+        """
         if not self.latencies:
-            return 0, 0, 0, 0
+            return 0, 0, 0, 0, 0, 0
 
         p95 = np.percentile(self.latencies, 95)
         p99 = np.percentile(self.latencies, 99)
+        first_p95 = np.percentile(self.first_audio_latencies, 95) if self.first_audio_latencies else 0
+        first_p99 = np.percentile(self.first_audio_latencies, 99) if self.first_audio_latencies else 0
         avg_conf = np.mean(self.confidence_scores) if self.confidence_scores else 0
         # For UI compatibility, return avg_conf for both "bleu" and "pgram" slots
-        return p95, p99, avg_conf, avg_conf
+        return p95, p99, avg_conf, avg_conf, first_p95, first_p99
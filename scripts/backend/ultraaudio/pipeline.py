@@ -5,152 +5,212 @@ import shutil
 import uuid
 import gc
 
-import moviepy.editor as mp
 import concurrent.futures
-import azure.cognitiveservices.speech as speechsdk
 import streamlit as st
 import threading
 import wave
 from datetime import datetime
-import json
 import pandas as pd
 from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-try:
-    import noisereduce as nr
-    import soundfile as sf
-except Exception as e:
-    print(f"DEBUG: Failed to import noisereduce or soundfile: {e}")
-    nr = None
-    sf = None
-
-from .config import get_azure_configs
+from .backends import get_speech_backend
 from .srt_utils import generate_srt_content
+from .vad import plan_vad_chunks, speech_coverage, silence_regions, VadAccumulator
+from .media_io import probe_media, extract_audio, mux_video, mux_multitrack, WavBlockWriter
+from .denoise import denoise_wav
+from .mixer import resolve_overlap_offsets, fit_clips_to_slots, mix_timeline, mix_streaming, mix_with_moviepy
+from .synth_pool import SynthesizerPool
+from .tts_cache import get_tts_cache
+from .rate_model import get_rate_model, wav_bytes_duration
+from .jobs import JobManifest, jobs_root, make_job_id, sha256_bytes, sha256_file
+from .transcript_cache import get_transcript_cache, translate_transcript
+from .profiling import StageTimer, file_bytes
+from .cancellation import CancelToken, JobCancelled
+from .workspace import get_workspace
+from .clip_store import create_clip_store
+from .ssml_batch import SegmentBatcher, DEFAULT_MAX_BATCH_SEC, build_batch_ssml, split_at_bookmarks
 
+# Chunks are pushed to their recognition session in blocks of this many seconds
+PUSH_BLOCK_SEC = 1.0
 
-def split_audio(audio_path, chunk_duration_sec, temp_dir):
-    try:
-        audio = mp.AudioFileClip(audio_path)
-        total_duration = audio.duration
-        chunk_paths = []
-        for i, start_time in enumerate(range(0, int(total_duration) + 1, chunk_duration_sec)):
-            end_time = min(start_time + chunk_duration_sec, total_duration)
-            if start_time >= end_time:
-                continue
-            chunk_path = os.path.join(temp_dir, f"chunk_{i}.wav")
-            try:
-                sub_audio = audio.subclip(start_time, end_time)
-                sub_audio.write_audiofile(
-                    chunk_path, codec='pcm_s16le', fps=16000, nbytes=2,
-                    ffmpeg_params=["-ac", "1"], logger=None
-                )
-                chunk_paths.append((chunk_path, i, start_time))
-            except Exception:
-                pass
-        return chunk_paths
-    finally:
-        try:
-            audio.close()
-        except:
-            pass
 
+def plan_fixed_chunks(total_duration, chunk_duration_sec):
+    """Fixed-length chunk cores [(core_start, core_end), ...] covering the whole file."""
+    plan = []
+    start = 0.0
+    while start < total_duration:
+        end = min(start + chunk_duration_sec, total_duration)
+        plan.append((start, end))
+        start = end
+    return plan
 
-def recognize_chunk(task_data):
-    chunk_path, chunk_index, target_lang_code, translation_config = task_data
-    audio_input = speechsdk.AudioConfig(filename=chunk_path)
-    translator = speechsdk.translation.TranslationRecognizer(
-        translation_config=translation_config,
-        audio_config=audio_input
-    )
-    translator.add_target_language(target_lang_code)
+
+def plan_audio_chunks(audio_path, chunk_duration_sec, overlap_sec=0.0, chunk_plan=None):
+    """
+    Slice bounds of a PCM WAV's chunks; nothing is written.
+
+    Each chunk owns its core [core_start, core_end) and is padded by ``overlap_sec``
+    on both sides so utterances crossing a boundary are heard whole by one chunk.
+    Returns [(index, start_sec, end_sec, core_start, core_end), ...].
+    """
+    with wave.open(audio_path, 'rb') as src:
+        total_duration = src.getnframes() / float(src.getframerate())
+    plan = chunk_plan if chunk_plan is not None else plan_fixed_chunks(total_duration, chunk_duration_sec)
+    chunks = []
+    for i, (core_start, core_end) in enumerate(plan):
+        start_time = max(0.0, core_start - overlap_sec)
+        end_time = min(total_duration, core_end + overlap_sec)
+        if start_time < end_time:
+            chunks.append((i, start_time, end_time, core_start, core_end))
+    return chunks
+
+
+def push_wav_slice(session, audio_path, start_sec, end_sec, cancel=None):
+    """Write [start_sec, end_sec) of a 16 kHz mono PCM WAV to ``session``'s push stream, then close it."""
+    with wave.open(audio_path, 'rb') as src:
+        sr = src.getframerate()
+        src.setpos(int(start_sec * sr))
+        remaining = int(round((end_sec - start_sec) * sr))
+        block = int(PUSH_BLOCK_SEC * sr)
+        while remaining > 0:
+            if cancel is not None:
+                cancel.check()
+            frames = src.readframes(min(block, remaining))
+            if not frames:
+                break
+            session.write(frames)
+            remaining -= len(frames) // (src.getsampwidth() * src.getnchannels())
+    session.close_stream()
+
+
+def recognize_chunk(task_data, cancel=None):
+    audio_path, start_sec, end_sec, chunk_index, source_lang_code, target_lang_code, backend = task_data
+    if cancel is not None:
+        cancel.check()
+    # A list of targets recognizes once for all of them; the first one is 'translated'
+    target_langs = [target_lang_code] if isinstance(target_lang_code, str) else list(target_lang_code)
+    # The chunk is read from the job's WAV and pushed as PCM; no chunk file is written
+    session = backend.open_recognition(source_lang_code, target_langs)
     segments = []
     rec_text_parts = []
     trans_text_parts = []
-    done = threading.Event() if 'threading' in globals() else None
-
-    def handle_translation(evt):
-        if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
-            start_sec = evt.result.offset / 10_000_000
-            duration_sec = evt.result.duration / 10_000_000
-            trans = evt.result.translations[target_lang_code]
-            segments.append({
-                'start': start_sec,
-                'duration': duration_sec,
-                'original': evt.result.text,
-                'translated': trans
-            })
-            rec_text_parts.append(evt.result.text)
-            trans_text_parts.append(trans)
-
-    translator.recognized.connect(handle_translation)
-    if done is not None:
-        translator.session_stopped.connect(lambda evt: done.set())
-    translator.start_continuous_recognition_async()
-    if done is not None:
-        done.wait(timeout=200)
-    translator.stop_continuous_recognition_async().get()
-    return (chunk_index, segments, " ".join(rec_text_parts), " ".join(trans_text_parts))
 
+    def handle_translation(result):
+        trans = result.translations.get(target_langs[0], '')
+        segments.append({
+            'start': result.offset_sec,
+            'duration': result.duration_sec,
+            'original': result.text,
+            'translated': trans,
+            'translations': {lang: result.translations.get(lang, '') for lang in target_langs},
+            'confidence': result.confidence,
+            'translation_time': datetime.now().isoformat(),
+            'output_time': None
+        })
+        rec_text_parts.append(result.text)
+        trans_text_parts.append(trans)
 
-def synthesize_segment_ssml(segment_data):
-    i, segment, synthesis_config, temp_dir, rate, pitch, voice_name = segment_data
-    text = segment.get('translated', '')
-    start_time = segment.get('start', 0)
-    if not text or text.isspace():
-        return None
-    path = os.path.join(temp_dir, f"seg_{i}.wav")
-
-    ssml_string = f"""
-    <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
-        <voice name="{voice_name}">
-            <prosody rate="{rate}" pitch="{pitch}">
-                {text}
-            </prosody>
-        </voice>
-    </speak>
-    """
+    session.connect(on_recognized=handle_translation)
+    session.start()
     try:
-        audio_cfg = speechsdk.audio.AudioOutputConfig(filename=path)
-        syn = speechsdk.SpeechSynthesizer(speech_config=synthesis_config, audio_config=audio_cfg)
-        res = syn.speak_ssml_async(ssml_string).get()
+        push_wav_slice(session, audio_path, start_sec, end_sec, cancel)
+        if cancel is None:
+            session.wait(timeout=200)
+        else:
+            with cancel.on_cancel(lambda: session.stop(wait=False)):
+                session.wait(timeout=200)
+    finally:
+        session.stop()
+    if cancel is not None:
+        cancel.check()
+    return (chunk_index, segments, " ".join(rec_text_parts), " ".join(trans_text_parts))
 
-        if res.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            if os.path.exists(path) and os.path.getsize(path) > 44:
-                return (path, start_time)
-        return None
-    except Exception:
-        return None
 
+def recognize_chunks_parallel(wav_path, backend, source_lang_code, target_lang_code,
+                              chunk_duration_sec, overlap_sec=2.0, workers=4,
+                              on_segment=None, on_chunk_done=None, chunk_plan=None,
+                              done_chunks=None, on_chunk_result=None, cancel=None):
+    """
+    Recognize a long WAV as overlapping chunks on ``workers`` concurrent sessions,
+    each fed its slice of the WAV through a push stream.
 
-def resolve_audio_overlaps(clip_data_list):
-    if not clip_data_list:
-        return []
-    sorted_data = sorted(clip_data_list, key=lambda x: x[1])
+    Segment starts are rebased by each chunk's offset, and a segment is kept only by
+    the chunk whose core contains its start, which de-duplicates the overlaps.
+    ``on_segment(seg)`` fires as soon as a chunk finishes so synthesis can start early;
+    ``on_chunk_done(done, total)`` reports progress. Chunks found in ``done_chunks``
+    ({index: kept_segments}, from a checkpoint) are not recognized again; their
+    segments are replayed instead. ``on_chunk_result(index, kept_segments)`` fires
+    once per recognized chunk, with ``None`` when recognition failed.
+    ``target_lang_code`` may be a list of languages (see ``recognize_chunk``).
+    Cancelling ``cancel`` stops the running sessions, drops queued chunks and raises.
+    Returns segments ordered by start.
+    """
+    done_chunks = done_chunks or {}
+    chunks = plan_audio_chunks(wav_path, chunk_duration_sec, overlap_sec, chunk_plan)
+    bounds = {index: (offset, core_start, core_end) for index, offset, _, core_start, core_end in chunks}
+    merged = []
 
-    final_clips = []
-    last_end_time = 0.0
+    for index in sorted(done_chunks):
+        for seg in done_chunks[index]:
+            merged.append(seg)
+            if on_segment:
+                on_segment(seg)
+    pending = [c for c in chunks if c[0] not in done_chunks]
 
-    for path, start_time in sorted_data:
-        try:
-            clip = mp.AudioFileClip(path)
-            duration = clip.duration
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers))
+    futures_index = {}
 
-            if start_time < last_end_time:
-                new_start = last_end_time + 0.05
-                clip = clip.set_start(new_start)
-                last_end_time = new_start + duration
-            else:
-                clip = clip.set_start(start_time)
-                last_end_time = start_time + duration
+    def drop_queued():
+        for fut in futures_index:
+            fut.cancel()
 
-            final_clips.append(clip)
-        except Exception:
-            pass
+    try:
+        futures_index = {
+            executor.submit(
+                recognize_chunk,
+                (wav_path, start_sec, end_sec, index, source_lang_code, target_lang_code, backend), cancel
+            ): index
+            for index, start_sec, end_sec, _, _ in pending
+        }
+        futures = list(futures_index)
+        if cancel is not None:
+            cancel.add_callback(drop_queued)
+        for done_count, fut in enumerate(concurrent.futures.as_completed(futures), 1):
+            if cancel is not None:
+                cancel.check()
+            try:
+                chunk_index, segments, _, _ = fut.result()
+            except Exception as e:
+                print(f"Chunk recognition failed: {e}")
+                if on_chunk_result:
+                    on_chunk_result(futures_index[fut], None)
+                continue
+            offset, core_start, core_end = bounds[chunk_index]
+            kept = []
+            for seg in segments:
+                seg['start'] += offset
+                if not (core_start <= seg['start'] < core_end):
+                    continue
+                seg['input_time'] = seg['start']
+                kept.append(seg)
+            if on_chunk_result:
+                on_chunk_result(chunk_index, kept)
+            for seg in kept:
+                merged.append(seg)
+                if on_segment:
+                    on_segment(seg)
+            if on_chunk_done:
+                on_chunk_done(done_count, len(futures))
+    finally:
+        if cancel is not None:
+            cancel.remove_callback(drop_queued)
+        executor.shutdown(wait=True, cancel_futures=True)
 
-    return final_clips
+    merged.sort(key=lambda seg: seg['start'])
+    return merged
 
 
-def run_pipeline(
+def process_media(
     input_path, 
     is_video, 
     source_lang_code, 
@@ -164,315 +224,725 @@ def run_pipeline(
     mode,
     mix_original=False,
     original_vol=0.0,
-    progress_bar=None,
-    status_container=None
+    backend=None,
+    recognition_workers=1,
+    chunk_overlap_sec=2.0,
+    chunk_strategy="fixed",
+    mixer="streaming",
+    tts_workers=4,
+    video_mode="copy",
+    denoise_workers=None,
+    job_dir=None,
+    session_id=None,
+    on_progress=None,
+    on_status=None,
+    translation_langs=None,
+    source_job_dir=None,
+    on_recognition_done=None,
+    use_transcript_cache=True,
+    tts_batch_sec=DEFAULT_MAX_BATCH_SEC,
+    max_stretch=1.25,
+    cancel=None,
+    stage_timeouts=None,
+    keep_intermediates=False
 ):
-    # Fetch Azure credentials
-    speech_key, service_region = get_azure_configs()
-    
-    translation_config = speechsdk.translation.SpeechTranslationConfig(
-        subscription=speech_key, 
-        region=service_region
-    )
-    translation_config.speech_recognition_language = source_lang_code
-    translation_config.add_target_language(target_lang_code)
+    """
+    Dub one media file end to end and return its result dict.
 
-    synthesis_config = speechsdk.SpeechConfig(
-        subscription=speech_key, 
-        region=service_region
-    )
-    synthesis_config.speech_synthesis_voice_name = voice_name
+    Takes only explicit paths and settings (no Streamlit state), so it runs the same
+    from the UI, a background worker process or a script. Work happens in the job
+    directory (``job_dir`` or one derived from the input and settings under
+    ``jobs_root()``); the result is saved to the dubbing history under ``session_id``.
+    ``on_progress(fraction, text)`` and ``on_status(text)`` report progress and may be
+    called from worker threads. Raises on failure.
+
+    A job submitted again after it finished returns its recorded result (marked
+    ``reused``) without re-running or re-saving it, as long as its outputs exist;
+    once they have expired it runs afresh with new output names.
+
+    Multi-target runs (see ``process_media_multi``): ``translation_langs`` attaches
+    more target languages to the recognizer, so segments carry every translation;
+    ``source_job_dir`` takes extraction, denoising and recognition from such a job
+    instead of redoing them; ``on_recognition_done(job_dir)`` fires once this job's
+    recognition is complete.
+
+    With ``use_transcript_cache`` a file whose source transcript is already cached
+    (same content, source language and engine) is not recognized again: the cached
+    texts are translated in batches and go straight to synthesis.
+
+    ``tts_batch_sec`` groups consecutive short segments (up to that many seconds of
+    source speech) into one SSML request with bookmarks, then cuts the audio back into
+    per-segment clips; 0 sends one request per segment.
+
+    Each segment's speaking rate is predicted from the voice's learned speed so its
+    clip fits the segment; clips that still run into the next one are time-stretched
+    by up to ``max_stretch`` (1.0 disables) before any later clip is shifted.
+
+    ``cancel`` (a CancelToken, possibly with a job deadline) stops the job at the
+    next check in any stage, and ``stage_timeouts`` ({stage: seconds}) bounds single
+    stages; either raises ``JobCancelled``. A cancelled or timed-out job removes its
+    job directory; a stage timeout keeps the checkpoints, so the job can be resumed.
+
+    Before starting, the workspace is swept to stay under its disk quota; once the job
+    is done its intermediates are deleted (``keep_intermediates`` keeps them, e.g. for
+    a job other targets adopt recognition from) and only the final outputs remain.
+    """
+    backend = backend or get_speech_backend()
+    recognition_langs = [target_lang_code] + [
+        lang for lang in (translation_langs or []) if lang != target_lang_code
+    ]
     temp_audio_path = None
     all_segments = []
-    resources = []
     total_duration = 0
 
+    # Everything that shapes the output identifies the job, so resubmitting the same
+    # media with the same settings resumes from the last checkpoint
+    job_params = {
+        'input_path': input_path, 'is_video': is_video,
+        'source_lang_code': source_lang_code, 'target_lang_code': target_lang_code,
+        'voice_name': voice_name, 'chunk_duration': chunk_duration,
+        'voice_rate': voice_rate, 'voice_pitch': voice_pitch,
+        'source_lang_name': source_lang_name, 'target_lang_name': target_lang_name,
+        'mode': mode, 'mix_original': mix_original, 'original_vol': original_vol,
+        'recognition_workers': recognition_workers, 'chunk_overlap_sec': chunk_overlap_sec,
+        'chunk_strategy': chunk_strategy, 'mixer': mixer, 'video_mode': video_mode,
+        'backend': backend.name, 'tts_batch_sec': tts_batch_sec, 'max_stretch': max_stretch
+    }
+    if len(recognition_langs) > 1:
+        job_params['translation_langs'] = recognition_langs
+    if job_dir is None:
+        id_params = {k: v for k, v in job_params.items() if k != 'input_path'}
+        job_dir = os.path.join(jobs_root(), make_job_id(input_path, id_params))
+    manifest = JobManifest(job_dir, job_params)
+    manifest.params['input_path'] = input_path
+    manifest.params['session_id'] = session_id
+    if manifest.data.get('status') == 'done':
+        recorded = manifest.data.get('result')
+        outputs = [recorded.get('audio_path'), recorded.get('video_path')] if recorded else []
+        if recorded and all(os.path.exists(p) for p in outputs if p):
+            # Resubmitted after it finished: nothing to redo and the history already has it
+            print(f"Job {manifest.job_id} is already done; returning its outputs")
+            if on_progress:
+                on_progress(1.0, "Already dubbed")
+            if on_recognition_done and manifest.stage_done('recognize'):
+                # Other targets of a multi-language run still start from this job
+                on_recognition_done(job_dir)
+            return dict(recorded, reused=True)
+        # Outputs expired or deleted: a fresh run, under new output names and a new history entry
+        print(f"Job {manifest.job_id}: outputs of the earlier run are gone; dubbing again")
+        manifest.data.pop('run_id', None)
+        manifest.data.pop('result', None)
+    if source_job_dir and not manifest.stage_done('recognize'):
+        manifest.adopt_recognition(JobManifest.load(source_job_dir), target_lang_code)
+        print(f"Job {manifest.job_id}: reusing recognition of job {os.path.basename(source_job_dir)}")
+    manifest.set_status('running')
+    try:
+        get_workspace().sweep()
+    except Exception as e:
+        print(f"DEBUG: Workspace sweep failed: {e}")
+    recognition_notified = {'v': False}
+
+    def notify_recognition_done():
+        if on_recognition_done and not recognition_notified['v'] and manifest.stage_done('recognize'):
+            recognition_notified['v'] = True
+            on_recognition_done(job_dir)
+    timer = StageTimer({
+        'job_id': manifest.job_id, 'input': os.path.basename(input_path), 'backend': backend.name,
+        'mode': mode, 'target_lang': target_lang_code
+    })
+    # Own token: stops this job's leftover threads on any exit without cancelling the caller's
+    job_cancel = CancelToken(parent=cancel, name="Job")
+    # Workspace sweeps treat a running job whose manifest went untouched as dead
+    keep_alive = manifest.keep_alive()
+    stage_timeouts = stage_timeouts or {}
+
+    def stage_cancel(name):
+        return job_cancel.stage(name, stage_timeouts.get(name))
+
     try:
         # 1. Extract Audio + Optional Noise Reduction
-        if status_container:
-            status_container.write("Step 1/3: Processing audio source...")
+        if on_status:
+            on_status("Step 1/3: Processing audio source...")
         
-        if is_video:
-            media_clip = mp.VideoFileClip(input_path)
-            audio_clip = media_clip.audio
-            resources.append(media_clip)
+        temp_dir = job_dir
+
+        if manifest.stage_done('extract'):
+            extracted = manifest.stage_outputs('extract')
+            media_info = extracted['media_info']
+            extracted_audio_path = extracted['audio_path']
+            total_duration = extracted['total_duration']
+            decoded_duration = extracted['decoded_duration']
+            speech_regions = [tuple(r) for r in extracted['speech_regions']]
+            timer.skip('extract')
+            print(f"Resuming job {manifest.job_id}: audio already extracted")
         else:
-            media_clip = mp.AudioFileClip(input_path)
-            audio_clip = media_clip
-            resources.append(media_clip)
-        
-        total_duration = media_clip.duration
+            manifest.start_stage('extract')
+            with timer.stage('extract') as rec, stage_cancel('extract') as token:
+                media_info = probe_media(input_path)
+                total_duration = media_info['duration'] or 0
 
-        temp_audio_path = os.path.join(st.session_state['temp_dir'], "process_audio.wav")
-        audio_clip.write_audiofile(
-            temp_audio_path, codec='pcm_s16le', fps=16000,
-            nbytes=2, ffmpeg_params=["-ac", "1"], logger=None
-        )
+                # Decode only the audio stream (16 kHz mono) through an ffmpeg pipe, written
+                # once while the VAD runs on the same blocks
+                extracted_audio_path = os.path.join(temp_dir, "process_audio.wav")
+                vad_sink = VadAccumulator()
+                decoded_duration = extract_audio(
+                    input_path, [WavBlockWriter(extracted_audio_path), vad_sink], cancel=token
+                )
+                if not total_duration:
+                    total_duration = decoded_duration
+                speech_regions, _ = vad_sink.speech_regions()
+                rec.update(
+                    bytes_read=file_bytes(input_path), bytes_written=file_bytes(extracted_audio_path),
+                    media_sec=decoded_duration, speech_regions=len(speech_regions)
+                )
+            manifest.complete_stage(
+                'extract', files=[extracted_audio_path], audio_path=extracted_audio_path,
+                media_info=media_info, total_duration=total_duration,
+                decoded_duration=decoded_duration, speech_regions=speech_regions
+            )
+        temp_audio_path = extracted_audio_path
 
-        # Noise reduction
-        try:
-            if nr is not None and sf is not None:
-                data, sr = sf.read(temp_audio_path)
-                reduced_noise = nr.reduce_noise(y=data, sr=sr)
-                clean_path = os.path.join(st.session_state['temp_dir'], "clean_audio.wav")
-                sf.write(clean_path, reduced_noise, sr)
+        # Looked up before denoising: a cached transcript makes recognition, the only
+        # consumer of the denoised audio, unnecessary
+        transcript_cache = get_transcript_cache()
+        transcript_key = None
+        cached_transcript = None
+        if use_transcript_cache and not manifest.stage_done('recognize'):
+            media_sha = manifest.data.get('media_sha256')
+            if not media_sha:
+                media_sha = manifest.data['media_sha256'] = sha256_file(input_path)
+            transcript_key = transcript_cache.make_key(media_sha, source_lang_code, backend.name)
+            cached_transcript = transcript_cache.get(transcript_key)
+
+        denoise_stats = None
+        if cached_transcript is not None:
+            timer.skip('denoise', reason="transcript cached")
+        elif manifest.stage_done('denoise'):
+            temp_audio_path = manifest.stage_outputs('denoise')['audio_path']
+            denoise_stats = manifest.stage_outputs('denoise')['stats']
+            timer.skip('denoise')
+        else:
+            # Noise reduction: block-wise on a process pool, noise profile from the non-speech regions
+            try:
+                manifest.start_stage('denoise')
+                clean_path = os.path.join(temp_dir, "clean_audio.wav")
+                with timer.stage('denoise') as rec, stage_cancel('denoise') as token:
+                    denoise_stats = denoise_wav(
+                        extracted_audio_path, clean_path,
+                        noise_regions=silence_regions(speech_regions, decoded_duration),
+                        workers=denoise_workers, cancel=token
+                    )
+                    rec.update(
+                        bytes_read=file_bytes(extracted_audio_path), bytes_written=file_bytes(clean_path),
+                        engine=denoise_stats['engine'], workers=denoise_stats['workers'],
+                        blocks=denoise_stats['blocks']
+                    )
                 temp_audio_path = clean_path
-                print("✅ Noise reduction applied")
-            else:
-                print("noisereduce or soundfile not available; skipping denoise")
-        except Exception as e:
-            print(f"Noise reduction failed: {e}")
+                manifest.complete_stage('denoise', files=[clean_path], audio_path=clean_path, stats=denoise_stats)
+                print(f"✅ Noise reduction applied: {denoise_stats}")
+            except Exception as e:
+                if job_cancel.cancelled:
+                    raise
+                # Including a denoise timeout: the job goes on with the original audio,
+                # and the result says so
+                print(f"Noise reduction failed: {e}")
+                denoise_stats = {'error': str(e)}
+                if on_status:
+                    on_status(f"Noise reduction failed, continuing without it: {e}")
+
+        # Synthesized clips stay in memory (up to a budget) for slot fitting and mixing
+        clip_store = create_clip_store()
 
         # 2. Stream Recognize & Incremental Synthesize (low-latency)
-        if status_container:
-            status_container.write("Step 2/3: Recognizing and synthesizing...")
+        if on_status:
+            on_status("Step 2/3: Recognizing and synthesizing...")
 
-        def stream_recognize_and_synthesize(wav_path, translation_config, synthesis_config,
-                                            target_lang, voice_name, temp_dir,
+        def stream_recognize_and_synthesize(wav_path, backend, source_lang, target_lang,
+                                            voice_name, temp_dir,
                                             voice_rate_local, voice_pitch_local):
-            """Recognize and synthesize audio from a file using Azure SDK's file input.
+            """Recognize and synthesize audio from a file using the speech backend's file input.
             
+            With ``recognition_workers > 1`` the file is recognized as overlapping
+            chunks in parallel, and ``chunk_strategy="vad"`` cuts chunks in silence
+            gaps instead; otherwise one continuous session is used.
             Returns (all_segments, translated_clip_paths)
             """
 
             all_segs = []
             translated_paths = []
-            # Use sequential execution to prevent 'bad allocation' errors in Azure SDK
-            synth_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            # One long-lived synthesizer per worker: segments synthesize concurrently while
+            # recognition continues, and no two threads ever share an SDK synthesizer
+            synth_pool = SynthesizerPool(backend, voice_name, size=tts_workers)
+            tts_cache = get_tts_cache()
+            rate_model = get_rate_model()
+            synth_executor = concurrent.futures.ThreadPoolExecutor(max_workers=synth_pool.size)
             synth_futures = []
-            seq_lock = threading.Lock()
-            seq_counter = {'v': 0}
 
-            # Use file-based AudioConfig for faster-than-realtime processing
-            audio_config = speechsdk.audio.AudioConfig(filename=wav_path)
-
-            recognizer = speechsdk.translation.TranslationRecognizer(
-                translation_config=translation_config,
-                audio_config=audio_config
-            )
-            recognizer.add_target_language(target_lang)
-
-            done = threading.Event()
+            def release_synthesis():
+                # Cancelled or finished: drop queued segments and free the pooled synthesizers
+                for fut in list(synth_futures):
+                    fut.cancel()
+                synth_executor.shutdown(wait=False, cancel_futures=True)
+                synth_pool.close()
+            job_cancel.add_callback(release_synthesis)
+            seq_lock = threading.Lock()
+            # Adjacent short segments share one SSML request (split again at bookmarks)
+            batcher = SegmentBatcher(tts_batch_sec) if tts_batch_sec and tts_batch_sec > 0 else None
+            batch_stats = {'requests': 0, 'batches': 0, 'batched_segments': 0}
+            synth_failures = {'v': 0}
+            synth_busy = {'sec': 0.0}
+            recognition_failed = {'v': False}
             
             start_time_perf = time.time()
-            
-            # Capture the current Streamlit context
-            ctx = get_script_run_ctx()
 
-            def on_translated(evt):
-                # Attach the context to this thread
-                if ctx:
-                    add_script_run_ctx(threading.current_thread(), ctx)
+            def update_progress(progress):
+                if not on_progress:
+                    return
+                # Estimate Time Remaining
+                elapsed = time.time() - start_time_perf
+                if progress > 0.01:
+                    total_estimated = elapsed / progress
+                    remaining = total_estimated - elapsed
+                    etr_str = f"{int(remaining // 60)}m {int(remaining % 60)}s"
+                else:
+                    etr_str = "Calculating..."
                     
+                on_progress(progress, f"Translating: {int(progress*100)}% | Est. Remaining: {etr_str}")
+
+            def clip_key(seg_local, rate_local, text):
+                cache_key = tts_cache.make_key(
+                    backend.name, voice_name, rate_local, voice_pitch_local, None,
+                    synth_pool.output_format, text
+                )
+                # Named by content and position so a resumed job finds its earlier clips
+                return cache_key, sha256_bytes(f"{cache_key}:{seg_local.get('start', 0):.3f}".encode())[:16]
+
+            def save_clip(seg_local, clip_id, audio_data):
+                out_path = os.path.join(temp_dir, f"seg_stream_{clip_id}.wav")
                 try:
-                    if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
-                        # Debug: Print available translations
-                        # print(f"DEBUG: Available translations: {evt.result.translations.keys()}")
-                        
-                        if target_lang not in evt.result.translations:
-                            print(f"WARNING: Target language '{target_lang}' not found in translations.")
-                            return
-
-                        start_sec = getattr(evt.result, 'offset', 0) / 10_000_000
-                        duration_sec = getattr(evt.result, 'duration', 0) / 10_000_000
-                        translated_text = evt.result.translations[target_lang]
-                        original_text = evt.result.text
-                        
-                        # Progress Update
-                        if progress_bar and total_duration > 0:
-                            current_pos = start_sec + duration_sec
-                            progress = min(current_pos / total_duration, 1.0)
-                            
-                            # Estimate Time Remaining
-                            elapsed = time.time() - start_time_perf
-                            if progress > 0.01:
-                                total_estimated = elapsed / progress
-                                remaining = total_estimated - elapsed
-                                etr_str = f"{int(remaining // 60)}m {int(remaining % 60)}s"
-                            else:
-                                etr_str = "Calculating..."
-                                
-                            progress_bar.progress(progress, text=f"Translating: {int(progress*100)}% | Est. Remaining: {etr_str}")
-
-                        # Try to extract confidence
-                        confidence = 0.0
-                        try:
-                            json_res = json.loads(evt.result.json)
-                            if 'NBest' in json_res and len(json_res['NBest']) > 0:
-                                confidence = json_res['NBest'][0].get('Confidence', 0.0) * 100
-                        except Exception as json_err:
-                            print(f"DEBUG: JSON parse error (ignoring): {json_err}")
-                            pass
-
-                        trans_time_iso = datetime.now().isoformat()
-
-                        seg = {
-                            'start': start_sec,
-                            'duration': duration_sec,
-                            'original': original_text,
-                            'translated': translated_text,
-                            'confidence': confidence,
-                            'input_time': start_sec,
-                            'translation_time': trans_time_iso,
-                            'output_time': None
-                        }
-                        all_segs.append(seg)
-
-                        # schedule synthesis immediately
-                        with seq_lock:
-                            sid = seq_counter['v']
-                            seq_counter['v'] += 1
+                    # The file is the resume checkpoint; assembly reads the in-memory copy
+                    with open(out_path, 'wb') as f:
+                        f.write(audio_data)
+                    clip_store.put(out_path, audio_data)
+                    manifest.record_clip(clip_id, out_path, seg_local.get('start', 0), sha256_bytes(audio_data))
 
-                        # Dynamic Speed Adjustment
-                        char_density = len(translated_text) / (duration_sec + 0.1) # avoid div by zero
-                        
-                        try:
-                            base_rate_val = int(voice_rate_local.strip('%'))
-                        except:
-                            base_rate_val = 0
-                        
-                        dynamic_boost = 0
-                        if char_density > 20:
-                            dynamic_boost = int((char_density - 20) * 5)
-                            dynamic_boost = min(dynamic_boost, 50)
-                        
-                        final_rate = f"{base_rate_val + dynamic_boost}%"
-                        if base_rate_val + dynamic_boost > 0:
-                            final_rate = f"+{final_rate}"
-
-                        def synth_task(sid_local, seg_local, rate_local):
-                            text = seg_local.get('translated', '')
-                            if not text or text.isspace():
-                                return None
-
-                            ssml = f"""
+                    # Update output time
+                    seg_local['output_time'] = datetime.now().isoformat()
+
+                    return (out_path, seg_local.get('start', 0))
+                except Exception as write_err:
+                    synth_failures['v'] += 1
+                    print(f"DEBUG: Failed to write audio file: {write_err}")
+                    return None
+
+            def synth_task(seg_local, rate_local):
+                text = seg_local.get('translated', '')
+                if not text or text.isspace():
+                    return None
+
+                ssml = f"""
 <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
 <voice name="{voice_name}">
 <prosody rate="{rate_local}" pitch="{voice_pitch_local}">{text}</prosody>
 </voice>
 </speak>
 """
-                            syn = None
-                            try:
-                                # Create a fresh synthesizer for each segment to avoid state issues
-                                # Use os.devnull to prevent trying to open default speaker on server
-                                null_audio_config = speechsdk.audio.AudioConfig(filename=os.devnull)
-                                syn = speechsdk.SpeechSynthesizer(speech_config=synthesis_config, audio_config=null_audio_config)
-                                res = syn.speak_ssml_async(ssml).get()
-                                
-                                if res.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                                    out_path = os.path.join(temp_dir, f"seg_stream_{sid_local}.wav")
-                                    try:
-                                        # Write the audio data to file manually
-                                        with open(out_path, 'wb') as f:
-                                            f.write(res.audio_data)
-                                        
-                                        # Update output time
-                                        seg_local['output_time'] = datetime.now().isoformat()
-                                        
-                                        return (out_path, seg_local.get('start', 0))
-                                    except Exception as write_err:
-                                        print(f"DEBUG: Failed to write audio file: {write_err}")
-                                        return None
-                                else:
-                                    return None
-                            except Exception as e:
-                                print(f"Synthesis exception: {e}")
-                                return None
-                            finally:
-                                if syn:
-                                    del syn
-
-                        fut = synth_executor.submit(synth_task, sid, seg, final_rate)
-                        synth_futures.append(fut)
+                try:
+                    cache_key, clip_id = clip_key(seg_local, rate_local, text)
+                    checkpointed = manifest.valid_clip(clip_id)
+                    if checkpointed:
+                        return checkpointed
+
+                    def speak():
+                        with seq_lock:
+                            batch_stats['requests'] += 1
+                        result = synth_pool.speak_ssml(ssml)
+                        if result.ok:
+                            learn_rate(rate_local, text, result.audio_data)
+                        return result
+
+                    res = tts_cache.fetch_or_synthesize(cache_key, speak)
+                    
+                    if res.ok:
+                        return save_clip(seg_local, clip_id, res.audio_data)
+                    else:
+                        synth_failures['v'] += 1
+                        return None
+                except Exception as e:
+                    synth_failures['v'] += 1
+                    print(f"Synthesis exception: {e}")
+                    return None
+
+            def synth_batch_task(items):
+                """
+                Synthesize [(seg, rate), ...] with one SSML request, cut at its bookmarks.
+                Checkpointed and cached clips are served first; if the batch fails or a
+                bookmark is missing, its segments are synthesized one by one instead.
+                """
+                clips = []
+                todo = []
+                for seg_local, rate_local in items:
+                    text = seg_local.get('translated', '')
+                    if not text or text.isspace():
+                        continue
+                    try:
+                        cache_key, clip_id = clip_key(seg_local, rate_local, text)
+                        checkpointed = manifest.valid_clip(clip_id)
+                        if checkpointed:
+                            clips.append(checkpointed)
+                            continue
+                        audio = tts_cache.get(cache_key)
+                        if audio is not None:
+                            clips.append(save_clip(seg_local, clip_id, audio))
+                            continue
+                    except Exception as e:
+                        synth_failures['v'] += 1
+                        print(f"Synthesis exception: {e}")
+                        continue
+                    todo.append((seg_local, rate_local, text, cache_key, clip_id))
+
+                pieces = None
+                if len(todo) > 1:
+                    marks = [f"seg{i}" for i in range(len(todo))]
+                    ssml = build_batch_ssml(voice_name, voice_pitch_local, [
+                        (mark, text, rate_local) for mark, (_, rate_local, text, _, _) in zip(marks, todo)
+                    ])
+                    with seq_lock:
+                        batch_stats['requests'] += 1
+                    try:
+                        res = synth_pool.speak_ssml(ssml)
+                        pieces = split_at_bookmarks(res, marks) if res.ok else None
+                    except Exception as e:
+                        print(f"DEBUG: Batched synthesis failed: {e}")
+                    if pieces is None:
+                        print(f"DEBUG: Batch of {len(todo)} segments failed, synthesizing them one by one")
+                if pieces is None:
+                    for seg_local, rate_local, _, _, _ in todo:
+                        clips.append(synth_task(seg_local, rate_local))
+                else:
+                    with seq_lock:
+                        batch_stats['batches'] += 1
+                        batch_stats['batched_segments'] += len(todo)
+                    for (seg_local, rate_local, text, cache_key, clip_id), audio in zip(todo, pieces):
+                        learn_rate(rate_local, text, audio)
+                        tts_cache.put(cache_key, audio)
+                        clips.append(save_clip(seg_local, clip_id, audio))
+                return [clip for clip in clips if clip]
+
+            def timed_synth_task(task, *args):
+                if job_cancel.cancelled:
+                    return None
+                t_synth = time.perf_counter()
+                try:
+                    return task(*args)
+                finally:
+                    with seq_lock:
+                        synth_busy['sec'] += time.perf_counter() - t_synth
+
+            def submit_batch(items):
+                if job_cancel.cancelled:
+                    return
+                if len(items) == 1:
+                    fut = synth_executor.submit(timed_synth_task, synth_task, *items[0])
+                else:
+                    fut = synth_executor.submit(timed_synth_task, synth_batch_task, items)
+                synth_futures.append(fut)
+
+            def pick_rate(seg):
+                # Predicted from this voice's learned speed so the clip fits the segment's slot
+                return rate_model.choose_rate(
+                    backend.name, voice_name, seg.get('translated', ''), seg['duration'], voice_rate_local
+                )
+
+            def learn_rate(rate_local, text, audio_data):
+                try:
+                    rate_model.observe(backend.name, voice_name, text, rate_local, wav_bytes_duration(audio_data))
+                except Exception as e:
+                    print(f"DEBUG: Rate model update failed: {e}")
+
+            def schedule_segment(seg):
+                with seq_lock:
+                    all_segs.append(seg)
+
+                duration_sec = seg['duration']
+                if 'tts_rate' not in seg:
+                    # Checkpoint from before rates were stored with the segments
+                    seg['tts_rate'] = pick_rate(seg)
+                final_rate = seg['tts_rate']
+
+                # schedule synthesis immediately, or once enough short neighbours are batched
+                if batcher is None:
+                    submit_batch([(seg, final_rate)])
+                    return
+                with seq_lock:
+                    ready = batcher.add((seg, final_rate), duration_sec)
+                for batch in ready:
+                    submit_batch(batch)
+
+            def on_translated(result):
+                try:
+                    if target_lang not in result.translations:
+                        print(f"WARNING: Target language '{target_lang}' not found in translations.")
+                        return
+
+                    start_sec = result.offset_sec
+                    duration_sec = result.duration_sec
+                    
+                    # Progress Update
+                    if total_duration > 0:
+                        update_progress(min((start_sec + duration_sec) / total_duration, 1.0))
+
+                    on_recognized_segment({
+                        'start': start_sec,
+                        'duration': duration_sec,
+                        'original': result.text,
+                        'translated': result.translations[target_lang],
+                        'translations': {lang: result.translations.get(lang, '') for lang in recognition_langs},
+                        'confidence': result.confidence,
+                        'input_time': start_sec,
+                        'translation_time': datetime.now().isoformat(),
+                        'output_time': None
+                    })
                 except Exception as e:
                     import traceback
                     traceback.print_exc()
                     print(f"Translation event handler error: {e}")
 
-            def on_canceled(evt):
-                if evt.result.reason == speechsdk.ResultReason.Canceled:
-                    details = evt.result.cancellation_details
-                    if details.reason == speechsdk.CancellationReason.EndOfStream:
-                        pass
+            def on_canceled(error_details):
+                print(f"ERROR: Recognition canceled. Reason: {error_details}")
+                recognition_failed['v'] = True
+
+            def on_recognized_segment(seg):
+                # Chosen once and checkpointed, so a resumed job finds the same clips
+                seg['tts_rate'] = pick_rate(seg)
+                manifest.record_segment(seg)
+                schedule_segment(seg)
+
+            def on_chunk_result(chunk_index, kept_segments):
+                if kept_segments is None:
+                    recognition_failed['v'] = True
+                else:
+                    manifest.record_chunk(chunk_index, kept_segments)
+
+            def replay_cached_transcript(entry):
+                """Serve recognition from a cached transcript entry; True on success."""
+                try:
+                    with timer.stage('transcript_cache') as rec:
+                        texts = {}
+                        new_translations = {}
+                        for lang in recognition_langs:
+                            texts[lang], translated_now = translate_transcript(backend, entry, source_lang, lang)
+                            if translated_now:
+                                new_translations[lang] = texts[lang]
+                                rec['translated'] = rec.get('translated', 0) + len(texts[lang])
+                        if new_translations:
+                            transcript_cache.add_translations(transcript_key, entry, new_translations)
+                        rec['segments'] = len(entry['segments'])
+                except Exception as e:
+                    print(f"Transcript cache: translation failed, recognizing the un-denoised audio instead: {e}")
+                    return False
+                job_cancel.check()
+                print(f"Transcript cache hit: {len(entry['segments'])} segments, recognition skipped")
+                manifest.start_stage('recognize')
+                manifest.reset_recognition()
+                for i, cached_seg in enumerate(entry['segments']):
+                    seg = dict(cached_seg)
+                    seg.update({
+                        'translated': texts[target_lang][i],
+                        'translations': {lang: texts[lang][i] for lang in recognition_langs},
+                        'translation_time': datetime.now().isoformat(),
+                        'output_time': None
+                    })
+                    on_recognized_segment(seg)
+                update_progress(1.0)
+                manifest.complete_stage('recognize', segments=len(all_segs), transcript_cache=True)
+                return True
+
+            if manifest.stage_done('recognize'):
+                checkpointed_segments = manifest.segments()
+                print(f"Resuming job {manifest.job_id}: {len(checkpointed_segments)} segments already recognized")
+                timer.skip('recognize')
+                for seg in checkpointed_segments:
+                    schedule_segment(seg)
+            elif cached_transcript is not None and replay_cached_transcript(cached_transcript):
+                # Segments came from the transcript cache; nothing to recognize
+                pass
+            else:
+                manifest.start_stage('recognize')
+                manifest.reset_recognition()
+                with timer.stage('recognize') as rec, stage_cancel('recognize') as token:
+                    if recognition_workers > 1 or chunk_strategy == "vad":
+                        chunk_plan = None
+                        overlap_sec = chunk_overlap_sec
+                        if chunk_strategy == "vad":
+                            # Cut in silence gaps and skip long silent spans; no overlap needed
+                            chunk_plan = plan_vad_chunks(speech_regions, chunk_duration)
+                            overlap_sec = 0.0
+                            coverage = speech_coverage(chunk_plan, total_duration)
+                            print(f"VAD: recognizing {coverage['recognized_sec']:.1f}s of {coverage['total_sec']:.1f}s "
+                                  f"in {coverage['chunks']} chunks")
+                        recognize_chunks_parallel(
+                            wav_path, backend, source_lang, recognition_langs,
+                            chunk_duration, overlap_sec=overlap_sec, workers=recognition_workers,
+                            on_segment=on_recognized_segment,
+                            on_chunk_done=lambda done, total: update_progress(done / total),
+                            chunk_plan=chunk_plan,
+                            done_chunks=manifest.done_chunks(),
+                            on_chunk_result=on_chunk_result,
+                            cancel=token
+                        )
                     else:
-                        print(f"ERROR: Recognition canceled. Reason: {details.reason}")
-                done.set()
+                        # Use file-based input for faster-than-realtime processing
+                        session = backend.open_recognition(source_lang, recognition_langs, wav_path=wav_path)
+                        session.connect(on_recognized=on_translated, on_canceled=on_canceled)
 
-            recognizer.recognized.connect(on_translated)
-            recognizer.canceled.connect(on_canceled)
-            recognizer.session_stopped.connect(lambda evt: done.set())
+                        # start recognition
+                        session.start()
 
-            # start recognition
-            recognizer.start_continuous_recognition_async()
+                        # Wait for the file to be fully processed (a cancel or deadline stops the session)
+                        with token.on_cancel(lambda: session.stop(wait=False)):
+                            session.wait()
 
-            # Wait for the file to be fully processed
-            done.wait()
+                        # stop recognition
+                        session.stop(wait=False)
+                        token.check()
+                    rec.update(bytes_read=file_bytes(wav_path), segments=len(all_segs),
+                               workers=recognition_workers, strategy=chunk_strategy)
 
-            # stop recognition
-            recognizer.stop_continuous_recognition_async()
+                if not recognition_failed['v']:
+                    manifest.complete_stage('recognize', segments=len(all_segs))
+                    if transcript_key:
+                        ordered = sorted(all_segs, key=lambda seg: seg['start'])
+                        transcript_cache.put(
+                            transcript_key, ordered,
+                            translations={
+                                lang: [seg.get('translations', {}).get(lang, '') for seg in ordered]
+                                for lang in recognition_langs
+                            },
+                            source_lang=source_lang, engine=backend.name, input=os.path.basename(input_path)
+                        )
+            notify_recognition_done()
+            if batcher is not None:
+                with seq_lock:
+                    ready = batcher.flush()
+                for batch in ready:
+                    submit_batch(batch)
 
-            # wait for synthesis futures
-            for sf in concurrent.futures.as_completed(synth_futures):
-                try:
-                    r = sf.result()
-                    if r:
-                        translated_paths.append(r)
-                except Exception as e:
-                    print(f"Synthesis future exception: {e}")
-            
-            synth_executor.shutdown(wait=True)
+            # wait for synthesis futures; most synthesis already overlapped recognition, so
+            # this stage's wall time is only the tail and busy_sec is the summed worker time
+            with timer.stage('synthesize') as rec, stage_cancel('synthesize') as token:
+                with token.on_cancel(release_synthesis):
+                    for sf in concurrent.futures.as_completed(synth_futures):
+                        if token.cancelled:
+                            break
+                        try:
+                            r = sf.result()
+                            if isinstance(r, list):
+                                translated_paths.extend(r)
+                            elif r:
+                                translated_paths.append(r)
+                        except Exception as e:
+                            print(f"Synthesis future exception: {e}")
+                token.check()
+                job_cancel.check()
+
+                synth_executor.shutdown(wait=True)
+                synth_pool.close()
+                rec.update(
+                    bytes_written=file_bytes(*[path for path, _ in translated_paths]),
+                    segments=len(all_segs), requests=batch_stats['requests'], clips=len(translated_paths),
+                    failures=synth_failures['v'], busy_sec=synth_busy['sec'], workers=synth_pool.size
+                )
+            if manifest.stage_done('recognize') and synth_failures['v'] == 0:
+                manifest.complete_stage(
+                    'synthesize', files=[path for path, _ in translated_paths], clips=translated_paths
+                )
+            tts_stats.update(synth_pool.get_stats())
+            tts_stats['cache'] = tts_cache.get_stats()
+            rate_model.save()
+            tts_stats['rate_model'] = rate_model.get_stats(backend.name, voice_name)
+            if batcher is not None:
+                tts_stats['batching'] = dict(
+                    batch_stats, max_batch_sec=tts_batch_sec,
+                    requests_saved=batch_stats['batched_segments'] - batch_stats['batches']
+                )
+            print(f"TTS pool: {tts_stats}")
+            all_segs.sort(key=lambda seg: seg['start'])
             return all_segs, translated_paths
 
-        all_segments, translated_clip_paths = stream_recognize_and_synthesize(
-            temp_audio_path, translation_config, synthesis_config,
-            target_lang_code, voice_name, st.session_state['temp_dir'],
-            voice_rate, voice_pitch
-        )
+        tts_stats = {}
+        if manifest.stage_done('recognize') and manifest.stage_done('synthesize'):
+            print(f"Resuming job {manifest.job_id}: recognition and synthesis already done")
+            timer.skip('recognize')
+            timer.skip('synthesize')
+            notify_recognition_done()
+            all_segments = sorted(manifest.segments(), key=lambda seg: seg['start'])
+            translated_clip_paths = [tuple(c) for c in manifest.stage_outputs('synthesize')['clips']]
+        else:
+            all_segments, translated_clip_paths = stream_recognize_and_synthesize(
+                temp_audio_path, backend, source_lang_code,
+                target_lang_code, voice_name, temp_dir,
+                voice_rate, voice_pitch
+            )
 
         # 3. Assemble Final Audio
-        if status_container:
-            status_container.write("Step 3/3: Assembling final video...")
+        if on_status:
+            on_status("Step 3/3: Assembling final video...")
         
-        if progress_bar:
-            progress_bar.progress(90, text="Rendering final video (this may take a moment)...")
+        if on_progress:
+            on_progress(0.9, "Rendering final video (this may take a moment)...")
 
-        translated_audio_clips = resolve_audio_overlaps(translated_clip_paths)
-        
-        if not translated_audio_clips:
-            st.error("No audio segments were generated. Check logs.")
-            return False
+        # Generate unique ID for this run (kept across resumes so output paths stay stable)
+        run_id = manifest.data.setdefault('run_id', str(uuid.uuid4())[:6])
 
-        final_audio = mp.CompositeAudioClip(translated_audio_clips)
-        resources.extend(translated_audio_clips)
-        
-        # Ensure final audio matches video duration (or slightly longer)
-        final_end = 0
-        if translated_audio_clips:
-            c = translated_audio_clips[-1]
-            final_end = max(getattr(c, "end", 0) for c in translated_audio_clips)
-        final_audio.duration = max(getattr(media_clip, "duration", 0), final_end)
-
-        # --- Ambience Mixing ---
-        if mix_original and is_video:
-            try:
-                # Get original audio
-                original_audio = media_clip.audio
-                # Lower volume
-                original_audio = original_audio.volumex(original_vol)
-                # Mix
-                final_audio = mp.CompositeAudioClip([original_audio, final_audio])
-                # Ensure duration is correct (use original video duration as base)
-                final_audio.duration = media_clip.duration
-            except Exception as e:
-                print(f"Ambience mixing failed: {e}")
-        # -----------------------
+        if manifest.stage_done('assemble'):
+            final_audio_path = manifest.stage_outputs('assemble')['audio_path']
+            mix_stats = manifest.stage_outputs('assemble')['mix_stats']
+            timer.skip('fit_slots')
+            timer.skip('resolve_overlaps')
+            timer.skip('mix')
+        else:
+            manifest.start_stage('assemble')
+            with timer.stage('fit_slots') as rec:
+                # Residual overruns are sped up in place instead of pushing every later clip back
+                # moviepy only reads files, so its stretched clips are written out
+                mix_store = clip_store if mixer != "moviepy" else None
+                fitted_clips, fit_stats = fit_clips_to_slots(
+                    translated_clip_paths, total_duration, max_speedup=max_stretch, store=mix_store
+                )
+                rec.update(fit_stats)
+            with timer.stage('resolve_overlaps') as rec:
+                # Durations come from the WAV headers; no clip is opened through moviepy here
+                placements = resolve_overlap_offsets(fitted_clips, store=clip_store)
+                requested = dict(fitted_clips)
+                rec['clips'] = len(placements)
+                rec['shifted_sec'] = sum(start - requested[path] for path, start, _ in placements)
+            
+            if not placements:
+                raise RuntimeError("No audio segments were generated. Check logs.")
 
-        # Generate unique ID for this run
-        run_id = str(uuid.uuid4())[:6]
-        
-        final_audio_path = os.path.join(st.session_state['temp_dir'], f"final_output_{run_id}.wav")
-        final_audio.write_audiofile(final_audio_path, codec='pcm_s16le', fps=16000, logger=None)
+            # Ambience: the original track, lowered to original_vol, mixed under the dub
+            ambience_path = extracted_audio_path if (mix_original and is_video) else None
+            
+            final_audio_path = os.path.join(temp_dir, f"final_output_{run_id}.wav")
+            mix_fn = {"moviepy": mix_with_moviepy, "numpy": mix_timeline}.get(mixer, mix_streaming)
+            mix_kwargs = {'store': mix_store} if mix_store is not None else {}
+            with timer.stage('mix', mixer=mixer) as rec, stage_cancel('mix') as token:
+                # Final audio matches the media duration (or slightly longer if the dub overruns)
+                mix_stats = mix_fn(
+                    placements, total_duration, final_audio_path,
+                    ambience_path=ambience_path, ambience_gain=original_vol, cancel=token, **mix_kwargs
+                )
+                on_disk = [path for path, _, _ in placements if mix_store is None or path not in mix_store]
+                rec.update(
+                    bytes_read=file_bytes(ambience_path, *on_disk),
+                    bytes_written=file_bytes(final_audio_path), clips=len(placements)
+                )
+            mix_stats['fit'] = fit_stats
+            mix_stats['clip_store'] = clip_store.get_stats()
+            clip_store.clear()
+            manifest.complete_stage('assemble', files=[final_audio_path], audio_path=final_audio_path, mix_stats=mix_stats)
+            print(f"Mixer ({mixer}): {mix_stats}")
 
         srt_content = generate_srt_content(all_segments)
 
@@ -485,51 +955,282 @@ def run_pipeline(
             "video_path": None,
             "original_path": input_path if is_video else None,
             "filename": os.path.basename(input_path) if input_path else "unknown",
+            "duration": total_duration,
             "segments": all_segments,
             "source_lang": source_lang_name,
             "target_lang": target_lang_name,
-            "mode": mode
+            "mode": mode,
+            "mix_stats": mix_stats,
+            "tts_stats": tts_stats,
+            "denoise_stats": denoise_stats,
+            "job_id": manifest.job_id
         }
 
         if is_video:
-            final_vid_path = os.path.join(st.session_state['temp_dir'], f"final_video_{run_id}.mp4")
-            new_audio = mp.AudioFileClip(final_audio_path)
-            resources.append(new_audio)
-
-            final_video = media_clip.set_audio(new_audio)
-            resources.append(final_video)
-
-            final_video.write_videofile(
-                final_vid_path, codec='libx264',
-                audio_codec='aac', logger=None
-            )
+            if manifest.stage_done('mux'):
+                final_vid_path = manifest.stage_outputs('mux')['video_path']
+                video_stats = manifest.stage_outputs('mux')['video_stats']
+                timer.skip('mux')
+            else:
+                manifest.start_stage('mux')
+                final_vid_path = os.path.join(temp_dir, f"final_video_{run_id}.mp4")
+                with timer.stage('mux') as rec, stage_cancel('mux') as token:
+                    # Only the audio track changed: copy the video bitstream and encode just the new audio
+                    video_stats = mux_video(
+                        input_path, final_audio_path, final_vid_path,
+                        video_codec=media_info['video_codec'], mode=video_mode, cancel=token
+                    )
+                    rec.update(
+                        bytes_read=file_bytes(input_path, final_audio_path),
+                        bytes_written=file_bytes(final_vid_path), path=video_stats['path']
+                    )
+                manifest.complete_stage('mux', files=[final_vid_path], video_path=final_vid_path, video_stats=video_stats)
+                print(f"Video mux: {video_stats}")
+            result_data["video_stats"] = video_stats
             result_data["video_path"] = final_vid_path
 
-        # Save to DB
+        # Save to DB (the stored timings end before this write; its own stage is added after)
         from scripts.backend.db import DatabaseManager
-        try:
-            db = DatabaseManager()
-            session_id = st.session_state.get('session_id')
-            db.add_history_item(result_data, session_id)
-        except Exception as e:
-            print(f"DB Save Error: {e}")
-
-        st.session_state['history'].append(result_data)
-        
-        # Cleanup resources
-        for r in resources:
+        result_data["timings"] = timer.summary()
+        with timer.stage('db_write') as rec:
             try:
-                if hasattr(r, 'close'):
-                    r.close()
-            except:
-                pass
-        
-        return True
+                db = DatabaseManager()
+                db.add_history_item(result_data, session_id)
+            except Exception as e:
+                rec['error'] = str(e)
+                print(f"DB Save Error: {e}")
+            rec['segments'] = len(all_segments)
+        result_data["timings"] = timer.summary()
+        print("Stage timings: " + ", ".join(
+            f"{rec['stage']} {rec['wall_sec']:.2f}s" for rec in result_data["timings"]['stages']
+        ))
+
+        # A failed recognition chunk leaves the job resumable rather than done
+        if manifest.stage_done('recognize'):
+            # Returned as-is if the same job is submitted again
+            manifest.data['result'] = result_data
+            manifest.set_status('done')
+        else:
+            manifest.set_status('incomplete')
+        if manifest.data['status'] == 'done' and not keep_intermediates:
+            get_workspace().release_job(job_dir)
+        return result_data
 
+    except JobCancelled as e:
+        manifest.set_status('canceled', error=e)
+        if cancel is not None and cancel.cancelled:
+            # The whole job was cancelled or ran out of time: nothing will resume it
+            shutil.rmtree(job_dir, ignore_errors=True)
+            print(f"Job {manifest.job_id} canceled ({e}); removed {job_dir}")
+        raise
+    except Exception as e:
+        manifest.set_status('failed', error=e)
+        raise
+    finally:
+        # Releases whatever is still running for this job (SDK sessions, executors, ffmpeg)
+        keep_alive.set()
+        job_cancel.cancel("Job ended")
+        job_cancel.close()
+
+
+def run_pipeline(
+    input_path, 
+    is_video, 
+    source_lang_code, 
+    target_lang_code, 
+    voice_name, 
+    chunk_duration, 
+    voice_rate, 
+    voice_pitch, 
+    source_lang_name, 
+    target_lang_name, 
+    mode,
+    mix_original=False,
+    original_vol=0.0,
+    progress_bar=None,
+    status_container=None,
+    **options
+):
+    """
+    Streamlit entry point: runs ``process_media`` in the script thread, drives the
+    progress bar and status box, and appends the result to the session history.
+    Returns True on success.
+    """
+    # Progress is reported from recognition/synthesis threads too; they need the script context
+    ctx = get_script_run_ctx()
+
+    def on_progress(fraction, text):
+        if not progress_bar:
+            return
+        if ctx:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        progress_bar.progress(min(fraction, 1.0), text=text)
+
+    def on_status(text):
+        if status_container:
+            status_container.write(text)
+
+    options.setdefault('session_id', st.session_state.get('session_id'))
+    try:
+        result_data = process_media(
+            input_path, is_video, source_lang_code, target_lang_code, voice_name,
+            chunk_duration, voice_rate, voice_pitch, source_lang_name, target_lang_name, mode,
+            mix_original=mix_original, original_vol=original_vol,
+            on_progress=on_progress, on_status=on_status, **options
+        )
     except Exception as e:
         import traceback
         traceback.print_exc()
         st.error(f"Pipeline Error: {e}")
         return False
+
+    history = st.session_state.setdefault('history', [])
+    if not any(item.get('id') == result_data.get('id') for item in history):
+        history.append(result_data)
+    return True
+
+
+def resume_job(job_dir, backend=None, on_progress=None, on_status=None, **overrides):
+    """
+    Re-run a checkpointed job from its manifest and return its result dict.
+
+    Completed stages are skipped and segments whose clip is still on disk (and
+    matches its recorded hash) are not synthesized again.
+    """
+    manifest = JobManifest.load(job_dir)
+    params = dict(manifest.params)
+    backend_name = params.pop('backend', None)
+    params.update(overrides)
+    return process_media(
+        backend=backend or get_speech_backend(backend_name), job_dir=job_dir,
+        on_progress=on_progress, on_status=on_status, **params
+    )
+
+
+def process_media_multi(
+    input_path,
+    is_video,
+    source_lang_code,
+    targets,
+    chunk_duration,
+    voice_rate,
+    voice_pitch,
+    source_lang_name,
+    mode,
+    backend=None,
+    target_workers=None,
+    multitrack_path=None,
+    session_id=None,
+    on_progress=None,
+    on_status=None,
+    **options
+):
+    """
+    Dub one media file into several languages with a single recognition pass.
+
+    ``targets`` is a list of {'target_lang_code', 'target_lang_name', 'voice_name'}.
+    The first target's job recognizes with every target language attached; as soon
+    as its recognition is done the other targets start, reuse its extraction,
+    denoising and segments, and only synthesize, assemble and mux their own track,
+    up to ``target_workers`` languages at a time. With ``multitrack_path`` (videos
+    only) the dubbed tracks are also muxed into one multi-audio-track file.
+    ``options`` are passed to ``process_media``.
+
+    Returns {'results': {lang: result_data}, 'errors': {lang: str},
+    'multitrack_path': str|None, 'seconds': float}.
+    """
+    if not targets:
+        raise ValueError("No target languages given")
+    t_start = time.time()
+    backend = backend or get_speech_backend()
+    langs = [t['target_lang_code'] for t in targets]
+    if len(set(langs)) != len(langs):
+        raise ValueError(f"Duplicate target languages: {langs}")
+    lead, followers = targets[0], targets[1:]
+
+    progress = {lang: 0.0 for lang in langs}
+    progress_lock = threading.Lock()
+
+    def target_progress(target):
+        def report(fraction, text):
+            if not on_progress:
+                return
+            with progress_lock:
+                progress[target['target_lang_code']] = fraction
+                overall = sum(progress.values()) / len(progress)
+            on_progress(overall, f"[{target['target_lang_name']}] {text}")
+        return report
+
+    def run_target(target, **extra):
+        return process_media(
+            input_path, is_video, source_lang_code, target['target_lang_code'], target['voice_name'],
+            chunk_duration, voice_rate, voice_pitch, source_lang_name, target['target_lang_name'], mode,
+            backend=backend, session_id=session_id,
+            on_progress=target_progress(target), on_status=on_status, **dict(options, **extra)
+        )
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, target_workers or len(targets)))
+    futures = {}
+    futures_lock = threading.Lock()
+    lead_job_dir = {'v': None}
+
+    def start_followers(recognized_job_dir):
+        lead_job_dir['v'] = recognized_job_dir
+        if on_status:
+            on_status(f"Recognition done; dubbing {len(followers)} more languages in parallel...")
+        with futures_lock:
+            for target in followers:
+                futures[target['target_lang_code']] = executor.submit(
+                    run_target, target, source_job_dir=recognized_job_dir
+                )
+
+    results = {}
+    errors = {}
+    try:
+        lead_future = executor.submit(
+            run_target, lead, translation_langs=langs, on_recognition_done=start_followers,
+            keep_intermediates=True
+        )
+        try:
+            results[lead['target_lang_code']] = lead_future.result()
+        except Exception as e:
+            errors[lead['target_lang_code']] = str(e)
+        with futures_lock:
+            pending = dict(futures)
+        for target in followers:
+            lang = target['target_lang_code']
+            if lang not in pending:
+                errors[lang] = "Not started: recognition of the lead language did not complete"
+                continue
+            try:
+                results[lang] = pending[lang].result()
+            except Exception as e:
+                errors[lang] = str(e)
     finally:
-        pass
+        executor.shutdown(wait=True)
+    if lead_job_dir['v'] and lead['target_lang_code'] in results:
+        # The followers are done reading the lead's extracted audio
+        get_workspace().release_job(lead_job_dir['v'])
+    if options.get('cancel') is not None:
+        options['cancel'].check()
+
+    for lang, err in errors.items():
+        print(f"Multi-target dub failed for '{lang}': {err}")
+
+    out_multitrack = None
+    if multitrack_path and is_video and results:
+        names = {t['target_lang_code']: t['target_lang_name'] for t in targets}
+        tracks = [(results[lang]['audio_path'], lang, names[lang]) for lang in langs if lang in results]
+        try:
+            stats = mux_multitrack(input_path, tracks, multitrack_path, cancel=options.get('cancel'))
+            out_multitrack = multitrack_path
+            print(f"Multi-track mux: {stats}")
+        except Exception as e:
+            errors['multitrack'] = str(e)
+
+    return {
+        'results': results,
+        'errors': errors,
+        'multitrack_path': out_multitrack,
+        'seconds': time.time() - t_start
+    }
@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+PERF_LOG_ENV = "ULTRAAUDIO_PERF_LOG"
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MB of this process (or of its reaped children), None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def cpu_seconds():
+    """User + system CPU time of this process and its reaped children (ffmpeg, denoise pool)."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def file_bytes(*paths):
+    """Total size of the given files; missing files and None count as 0."""
+    total = 0
+    for path in paths:
+        if path and os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def perf_log_path():
+    """JSON-lines stage log: $ULTRAAUDIO_PERF_LOG, else ``stage_timings.jsonl`` in the jobs root."""
+    path = os.getenv(PERF_LOG_ENV)
+    if path:
+        return path
+    from .jobs import jobs_root
+    return os.path.join(jobs_root(), "stage_timings.jsonl")
+
+
+class StageTimer:
+    """
+    Per-stage instrumentation for one pipeline run.
+
+    ``with timer.stage("denoise") as rec:`` measures wall and CPU time and the peak
+    RSS reached by the end of the stage; the body adds its own metrics to ``rec``
+    (``bytes_read``, ``bytes_written``, ``segments``...). Every finished stage is
+    appended to the JSON-lines perf log tagged with ``context`` (job id, mode...), so
+    runs can be trended across releases. CPU time is process-wide, so stages that run
+    alongside other threads include their CPU too.
+    """
+
+    def __init__(self, context=None, log_path=None):
+        self.context = dict(context or {})
+        self.log_path = log_path if log_path is not None else perf_log_path()
+        self.stages = []
+        self._lock = threading.Lock()
+        self._t_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+
+    @contextmanager
+    def stage(self, name, **metrics):
+        rec = {'stage': name}
+        rec.update(metrics)
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield rec
+        except Exception as e:
+            rec['error'] = str(e)
+            raise
+        finally:
+            rec['wall_sec'] = time.perf_counter() - wall_start
+            rec['cpu_sec'] = cpu_seconds() - cpu_start
+            rec['peak_rss_mb'] = peak_rss_mb()
+            self.add(rec)
+
+    def skip(self, name, reason="resumed"):
+        """Record a stage that did not run (e.g. restored from a job checkpoint)."""
+        self.add({'stage': name, 'skipped': reason, 'wall_sec': 0.0, 'cpu_sec': 0.0})
+
+    def add(self, rec):
+        with self._lock:
+            self.stages.append(rec)
+        self._log(rec)
+
+    def _log(self, rec):
+        if not self.log_path:
+            return
+        line = dict(self.context)
+        line['time'] = datetime.now().isoformat()
+        line.update(rec)
+        try:
+            with self._lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(line, default=str) + "\n")
+        except Exception as e:
+            print(f"DEBUG: Failed to write perf log {self.log_path}: {e}")
+
+    def summary(self):
+        """
+        Stage records plus run totals; JSON-serializable. The children's peak RSS is the
+        largest subprocess (ffmpeg, denoise workers) and includes memory shared at fork.
+        """
+        with self._lock:
+            stages = [dict(rec) for rec in self.stages]
+        return {
+            'stages': stages,
+            'total_wall_sec': time.perf_counter() - self._t_start,
+            'total_cpu_sec': cpu_seconds() - self._cpu_start,
+            'peak_rss_mb': peak_rss_mb(),
+            'children_peak_rss_mb': peak_rss_mb(children=True)
+        }
@@ -0,0 +1,176 @@
+import io
+import os
+import json
+import math
+import wave
+import tempfile
+import threading
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .tts_cache import normalize_text
+
+RATE_MODEL_PATH_ENV = "ULTRAAUDIO_RATE_MODEL"
+# Prior speed for a voice nothing has been learned about (neural voices speak ~14-16 chars/s)
+DEFAULT_CHARS_PER_SEC = 15.0
+# The prior counts as this many seconds of observed speech, so a few clips already move it
+PRIOR_SEC = 5.0
+MAX_BOOST = 50
+# Chosen rates are rounded up to this many points, so the TTS cache key of a segment
+# stays the same while the learned speed drifts a little
+RATE_STEP = 5
+
+
+def parse_rate(rate):
+    """Percent from an SSML prosody rate ('+20%', '-10%', '0%'); unparseable rates are 0."""
+    try:
+        return int(str(rate).strip().rstrip('%'))
+    except (TypeError, ValueError):
+        return 0
+
+
+def format_rate(percent):
+    return f"+{percent}%" if percent > 0 else f"{percent}%"
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive lock across processes, held on ``path`` + '.lock' (blocks until free)."""
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def wav_bytes_duration(audio_data):
+    with wave.open(io.BytesIO(audio_data), 'rb') as wf:
+        return wf.getnframes() / float(wf.getframerate())
+
+
+class SpeakingRateModel:
+    """
+    Per-voice speaking speed learned from synthesized clips.
+
+    For each (engine, voice) it keeps the characters spoken per second at rate 0%,
+    assuming the engine scales speed by ``1 + rate/100``. ``choose_rate`` uses it to
+    pick the prosody rate that makes a segment's clip fit its slot before anything is
+    synthesized. The totals are stored as JSON; ``save`` merges this process's new
+    observations into the file under a file lock, so concurrent workers all contribute.
+    """
+
+    def __init__(self, path=None, default_cps=DEFAULT_CHARS_PER_SEC):
+        self.path = path or os.path.join(tempfile.gettempdir(), "ultraaudio_rate_model.json")
+        self.default_cps = default_cps
+        self._lock = threading.Lock()
+        self._totals = self._load()
+        # Observations not yet written: {voice_key: [chars, seconds, clips]}
+        self._pending = {}
+
+    @staticmethod
+    def _key(engine, voice_name):
+        return f"{engine}:{voice_name}"
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return {}
+
+    def chars_per_sec(self, engine, voice_name):
+        with self._lock:
+            chars, seconds, _ = self._totals.get(self._key(engine, voice_name), [0.0, 0.0, 0])
+        return (chars + self.default_cps * PRIOR_SEC) / (seconds + PRIOR_SEC)
+
+    def predict_duration(self, engine, voice_name, text, rate="0%"):
+        speed = 1.0 + parse_rate(rate) / 100.0
+        return len(normalize_text(text)) / (self.chars_per_sec(engine, voice_name) * max(speed, 0.1))
+
+    def choose_rate(self, engine, voice_name, text, slot_sec, base_rate="0%", max_boost=MAX_BOOST, headroom=0.95):
+        """
+        The prosody rate, at least ``base_rate`` and at most ``max_boost`` points above
+        it, at which ``text`` is predicted to fill ``headroom`` of its slot. The boost
+        is rounded up to ``RATE_STEP`` points.
+        """
+        base = parse_rate(base_rate)
+        if slot_sec <= 0 or not text:
+            return format_rate(base)
+        needed = self.predict_duration(engine, voice_name, text, format_rate(base)) / (slot_sec * headroom)
+        percent = base
+        if needed > 1.0:
+            percent = math.ceil((1.0 + base / 100.0) * needed * 100.0 - 100.0)
+            percent = base + math.ceil((percent - base) / float(RATE_STEP)) * RATE_STEP
+        return format_rate(min(max(percent, base), base + max_boost))
+
+    def observe(self, engine, voice_name, text, rate, duration_sec):
+        """Learn from one synthesized clip of ``text`` at ``rate`` lasting ``duration_sec``."""
+        chars = len(normalize_text(text))
+        if not chars or duration_sec < 0.2:
+            return
+        # Normalize to rate 0%: at +20% the voice covered 1.2x the chars it would at 0%
+        seconds = duration_sec * (1.0 + parse_rate(rate) / 100.0)
+        key = self._key(engine, voice_name)
+        with self._lock:
+            for totals in (self._totals, self._pending):
+                entry = totals.setdefault(key, [0.0, 0.0, 0])
+                entry[0] += chars
+                entry[1] += seconds
+                entry[2] += 1
+
+    def save(self):
+        with self._lock:
+            if not self._pending:
+                return
+            try:
+                # Read-merge-write under the file lock, or concurrent workers drop each other's clips
+                with _file_lock(self.path):
+                    merged = self._load()
+                    for key, (chars, seconds, clips) in self._pending.items():
+                        entry = merged.setdefault(key, [0.0, 0.0, 0])
+                        entry[0] += chars
+                        entry[1] += seconds
+                        entry[2] += clips
+                    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix=".tmp")
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(merged, f)
+                    os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"DEBUG: Rate model write failed: {e}")
+                return
+            self._totals = merged
+            self._pending = {}
+
+    def get_stats(self, engine, voice_name):
+        with self._lock:
+            clips = self._totals.get(self._key(engine, voice_name), [0.0, 0.0, 0])[2]
+        return {'chars_per_sec': self.chars_per_sec(engine, voice_name), 'observed_clips': clips}
+
+
+_shared_model = None
+_shared_model_lock = threading.Lock()
+
+
+def get_rate_model():
+    """Process-wide model stored at $ULTRAAUDIO_RATE_MODEL (default: the system temp dir)."""
+    global _shared_model
+    with _shared_model_lock:
+        if _shared_model is None:
+            _shared_model = SpeakingRateModel(os.getenv(RATE_MODEL_PATH_ENV))
+        return _shared_model
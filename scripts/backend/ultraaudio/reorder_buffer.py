@@ -0,0 +1,138 @@
+import time
+import heapq
+import threading
+
+DEFAULT_DEADLINE_SEC = 4.0
+
+
+class ReorderBuffer:
+    """
+    Jitter buffer that releases out-of-order results strictly by sequence id.
+
+    Producers ``put`` results (or ``skip`` ids that will never produce one) as they
+    finish, in any order; the consumer's ``get`` blocks on a condition variable
+    until the next id is ready. An id that has not arrived ``deadline_sec`` after it
+    was registered with ``expect`` (or after it became the head, if it never was) is
+    given up once later results are waiting behind it, so one lost or slow item
+    cannot hold back the rest. Results for ids already given up are dropped.
+
+    ``get_stats`` reports skips, late drops and head-of-line blocking: the time
+    buffered results spent waiting for a missing earlier id.
+    """
+
+    _SKIPPED = object()
+
+    def __init__(self, deadline_sec=DEFAULT_DEADLINE_SEC, first_id=0):
+        self.deadline_sec = deadline_sec
+        self.next_id = first_id
+        self._heap = []
+        self._expected = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._head_since = time.time()
+        self._blocked_since = None
+        self.delivered = 0
+        self.skipped = 0
+        self.deadline_skips = 0
+        self.late_drops = 0
+        self.hol_blocking_sec = 0.0
+        self.max_hol_blocking_sec = 0.0
+        self.max_depth = 0
+
+    def expect(self, seq_id):
+        """Start ``seq_id``'s deadline (call when the id is assigned)."""
+        with self._cond:
+            if seq_id >= self.next_id:
+                self._expected[seq_id] = time.time()
+
+    def put(self, seq_id, item):
+        self._push(seq_id, item)
+
+    def skip(self, seq_id):
+        """Mark ``seq_id`` as producing nothing, so playback moves past it at once."""
+        self._push(seq_id, self._SKIPPED)
+
+    def _push(self, seq_id, item):
+        with self._cond:
+            if seq_id < self.next_id:
+                if item is not self._SKIPPED:
+                    self.late_drops += 1
+                return
+            heapq.heappush(self._heap, (seq_id, item))
+            self.max_depth = max(self.max_depth, len(self._heap))
+            self._update_blocking(time.time())
+            self._cond.notify_all()
+
+    def close(self):
+        """Wake the consumer; ``get`` returns None from now on."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _update_blocking(self, now):
+        """Head-of-line blocking lasts while results are buffered but the next id is not."""
+        # Duplicates and ids given up on while their result was in flight
+        while self._heap and self._heap[0][0] < self.next_id:
+            heapq.heappop(self._heap)
+        blocked = bool(self._heap) and self._heap[0][0] != self.next_id
+        if blocked and self._blocked_since is None:
+            self._blocked_since = now
+        elif not blocked and self._blocked_since is not None:
+            waited = now - self._blocked_since
+            self.hol_blocking_sec += waited
+            self.max_hol_blocking_sec = max(self.max_hol_blocking_sec, waited)
+            self._blocked_since = None
+
+    def _advance(self, now):
+        self._expected.pop(self.next_id, None)
+        self.next_id += 1
+        self._head_since = now
+        self._update_blocking(now)
+
+    def get(self, timeout=None):
+        """
+        The next result in sequence order, or None if ``timeout`` passes first or
+        the buffer is closed. Skipped and expired ids are passed over.
+        """
+        wait_until = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self._closed:
+                now = time.time()
+                if self._heap and self._heap[0][0] == self.next_id:
+                    _, item = heapq.heappop(self._heap)
+                    self._advance(now)
+                    if item is self._SKIPPED:
+                        self.skipped += 1
+                        continue
+                    self.delivered += 1
+                    return item
+
+                deadline = self._expected.get(self.next_id, self._head_since) + self.deadline_sec
+                if self._heap and now >= deadline:
+                    # Later results are waiting behind an id that is overdue
+                    # (reported through get_stats, not logged per phrase)
+                    self.deadline_skips += 1
+                    self.skipped += 1
+                    self._advance(now)
+                    continue
+                wake = deadline if self._heap else None
+                if wait_until is not None:
+                    if now >= wait_until:
+                        return None
+                    wake = wait_until if wake is None else min(wake, wait_until)
+                self._cond.wait(None if wake is None else max(0.0, wake - now))
+        return None
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'delivered': self.delivered,
+                'skipped': self.skipped,
+                'deadline_skips': self.deadline_skips,
+                'late_drops': self.late_drops,
+                'buffered': len(self._heap),
+                'max_depth': self.max_depth,
+                'hol_blocking_sec': self.hol_blocking_sec,
+                'max_hol_blocking_sec': self.max_hol_blocking_sec,
+                'deadline_sec': self.deadline_sec
+            }
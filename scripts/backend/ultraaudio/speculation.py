@@ -0,0 +1,177 @@
+import threading
+
+from .backends import PcmChunkSplitter
+
+# A stable prefix is cut after the last word ending with one of these
+CLAUSE_END = (',', ';', ':', '.', '?', '!', '、', '，', '。', '？', '！')
+DEFAULT_STABILITY = 3
+DEFAULT_MIN_WORDS = 4
+
+
+def _common_prefix(word_lists):
+    prefix = []
+    for words in zip(*word_lists):
+        if any(w != words[0] for w in words[1:]):
+            break
+        prefix.append(words[0])
+    return prefix
+
+
+class PartialStabilizer:
+    """
+    Finds the part of a growing partial hypothesis that has stopped changing.
+
+    ``feed`` takes each partial (translated) hypothesis of the current utterance.
+    The words shared by the last ``stability`` hypotheses are stable; ``feed``
+    returns the next stable span not handed out yet, cut after its last clause
+    boundary (or, without one, once it has ``min_words`` words), else None.
+    ``reset`` starts the next utterance.
+    """
+
+    def __init__(self, stability=DEFAULT_STABILITY, min_words=DEFAULT_MIN_WORDS):
+        self.stability = max(1, stability)
+        self.min_words = max(1, min_words)
+        self.reset()
+
+    def reset(self):
+        self._recent = []
+        self._taken = 0
+
+    def feed(self, text):
+        self._recent = (self._recent + [text.split()])[-self.stability:]
+        if len(self._recent) < self.stability:
+            return None
+        span = _common_prefix(self._recent)[self._taken:]
+        cut = 0
+        for i, word in enumerate(span):
+            if word.endswith(CLAUSE_END):
+                cut = i + 1
+        if not cut and len(span) >= self.min_words:
+            cut = len(span)
+        if not cut:
+            return None
+        self._taken += cut
+        return " ".join(span[:cut])
+
+
+class SpeculativePiece:
+    """One stable span of an utterance, synthesized ahead of its final result."""
+
+    def __init__(self, text, future):
+        self.text = text
+        self.words = text.split()
+        self.future = future
+
+
+class Speculator:
+    """
+    Pre-synthesizes the stable leading clauses of an utterance from its partial results.
+
+    ``on_partial`` feeds a partial translation to a ``PartialStabilizer`` and submits
+    every newly stable span to ``executor``. When the utterance is final, ``take``
+    hands its pieces to the task that speaks it, which calls ``claim``: pieces that
+    open the final translation word for word are reused (their audio goes to
+    ``on_audio``) and only the rest of the text is left to synthesize; the others
+    are discarded and their synthesis time counted as wasted.
+    """
+
+    def __init__(self, executor, stability=DEFAULT_STABILITY, min_words=DEFAULT_MIN_WORDS):
+        self.executor = executor
+        self.stabilizer = PartialStabilizer(stability, min_words)
+        self._pieces = []
+        self._lock = threading.Lock()
+        self.utterances = 0
+        self.utterances_hit = 0
+        self.speculated = 0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.wasted_synthesis_ms = 0.0
+        self.wasted_chars = 0
+        self.saved_synthesis_ms = 0.0
+
+    def on_partial(self, text, synthesize):
+        """Called from the recognizer thread with each partial; ``synthesize(text)`` -> SynthesisResult."""
+        span = self.stabilizer.feed(text)
+        if not span:
+            return
+        try:
+            future = self.executor.submit(synthesize, span)
+        except RuntimeError:
+            # Executor shut down (pipeline stopping)
+            return
+        self._pieces.append(SpeculativePiece(span, future))
+        with self._lock:
+            self.speculated += 1
+
+    def take(self):
+        """The current utterance's pieces; the next partial starts a new utterance."""
+        pieces, self._pieces = self._pieces, []
+        self.stabilizer.reset()
+        return pieces
+
+    def _wasted(self, piece):
+        if piece.future.cancel():
+            return
+
+        def record(future):
+            try:
+                res = future.result()
+            except Exception:
+                return
+            with self._lock:
+                self.wasted_synthesis_ms += res.latency_ms
+                self.wasted_chars += len(piece.text)
+
+        piece.future.add_done_callback(record)
+
+    def discard(self, pieces):
+        with self._lock:
+            self.misses += len(pieces)
+        for piece in pieces:
+            self._wasted(piece)
+
+    def claim(self, pieces, final_text, on_audio):
+        """Feed the audio of matching pieces to ``on_audio`` (PCM); returns the text still to synthesize."""
+        words = final_text.split()
+        pos = 0
+        used = []
+        rest = list(pieces)
+        while rest and words[pos:pos + len(rest[0].words)] == rest[0].words:
+            piece = rest.pop(0)
+            # Submitted before this task, so already running or done
+            try:
+                res = piece.future.result()
+            except Exception as e:
+                print(f"DEBUG: Speculative synthesis error: {e}")
+                res = None
+            if res is None or not res.ok:
+                with self._lock:
+                    self.failures += 1
+                break
+            PcmChunkSplitter(on_audio).feed(res.audio_data)
+            used.append(res)
+            pos += len(piece.words)
+        with self._lock:
+            self.utterances += 1
+            if used:
+                self.utterances_hit += 1
+            self.hits += len(used)
+            self.saved_synthesis_ms += sum(res.latency_ms for res in used)
+        self.discard(rest)
+        return " ".join(words[pos:])
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'utterances': self.utterances,
+                'utterances_hit': self.utterances_hit,
+                'speculated': self.speculated,
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+                'hit_rate': self.hits / self.speculated if self.speculated else 0.0,
+                'wasted_synthesis_ms': self.wasted_synthesis_ms,
+                'wasted_chars': self.wasted_chars,
+                'saved_synthesis_ms': self.saved_synthesis_ms
+            }
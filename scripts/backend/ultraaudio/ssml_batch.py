@@ -0,0 +1,141 @@
+import io
+import time
+import html
+import wave
+
+from .utils import pcm_to_wav_bytes
+
+# Segments at most this long (source seconds) are worth batching; longer ones
+# already amortize the per-request overhead and go alone
+SHORT_SEGMENT_SEC = 2.5
+DEFAULT_MAX_BATCH_SEC = 6.0
+MAX_BATCH_SEGMENTS = 8
+
+
+def build_batch_ssml(voice_name, pitch, items):
+    """
+    One SSML document for several segments. ``items`` are (mark, text, rate); each
+    segment keeps its own prosody rate and is preceded by ``<bookmark mark=.../>``
+    so the audio can be cut back into per-segment clips (a None mark adds none).
+    """
+    body = "".join(
+        (f'<bookmark mark="{mark}"/>' if mark is not None else '') +
+        f'<prosody rate="{rate}" pitch="{pitch}">{html.escape(text, quote=False)}</prosody>'
+        for mark, text, rate in items
+    )
+    return f"""
+<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">
+<voice name="{voice_name}">
+{body}
+</voice>
+</speak>
+"""
+
+
+def split_wav(audio_data, offsets):
+    """
+    Cut RIFF/PCM audio at ``offsets`` (seconds, ascending; piece i runs from
+    offsets[i] to offsets[i + 1], the last one to the end). Returns one WAV per piece.
+    """
+    with wave.open(io.BytesIO(audio_data), 'rb') as wf:
+        sample_rate = wf.getframerate()
+        channels = wf.getnchannels()
+        sampwidth = wf.getsampwidth()
+        frames = wf.readframes(wf.getnframes())
+    frame_bytes = channels * sampwidth
+    n_frames = len(frames) // frame_bytes
+    bounds = [min(n_frames, max(0, int(round(offset * sample_rate)))) for offset in offsets] + [n_frames]
+    return [
+        pcm_to_wav_bytes(frames[a * frame_bytes:b * frame_bytes], sample_rate, channels, sampwidth)
+        for a, b in zip(bounds, bounds[1:])
+    ]
+
+
+def split_at_bookmarks(result, marks):
+    """
+    Per-mark clips from a batched SynthesisResult, in the order of ``marks``; None
+    when the engine did not report every bookmark in order (the caller falls back
+    to one request per segment).
+    """
+    offsets = dict(result.bookmarks)
+    if any(mark not in offsets for mark in marks):
+        return None
+    ordered = [offsets[mark] for mark in marks]
+    if ordered != sorted(ordered):
+        return None
+    # Audio before the first bookmark (leading silence) belongs to the first segment
+    ordered[0] = 0.0
+    return split_wav(result.audio_data, ordered)
+
+
+class SegmentBatcher:
+    """
+    Groups consecutive short segments into batches for one SSML request each.
+
+    ``add(item, duration)`` returns the batches that became ready: a segment longer
+    than ``short_sec`` flushes the pending batch and goes alone; short segments
+    accumulate until their source duration reaches ``max_batch_sec`` or the batch has
+    ``max_segments``. ``flush()`` returns what is still pending. Not thread-safe.
+    """
+
+    def __init__(self, max_batch_sec=DEFAULT_MAX_BATCH_SEC, short_sec=SHORT_SEGMENT_SEC,
+                 max_segments=MAX_BATCH_SEGMENTS):
+        self.max_batch_sec = max_batch_sec
+        self.short_sec = min(short_sec, max_batch_sec)
+        self.max_segments = max(1, max_segments)
+        self._pending = []
+        self._pending_sec = 0.0
+
+    def add(self, item, duration):
+        if duration > self.short_sec:
+            return self.flush() + [[item]]
+        ready = []
+        if self._pending and self._pending_sec + duration > self.max_batch_sec:
+            ready = self.flush()
+        self._pending.append(item)
+        self._pending_sec += duration
+        if len(self._pending) >= self.max_segments:
+            ready += self.flush()
+        return ready
+
+    def flush(self):
+        if not self._pending:
+            return []
+        batch = self._pending
+        self._pending = []
+        self._pending_sec = 0.0
+        return [batch]
+
+
+def benchmark_batching(synthesizer, voice_name, segments, pitch="+0Hz", max_batch_sec=DEFAULT_MAX_BATCH_SEC):
+    """
+    Synthesize the same segments one request each and batched by ``SegmentBatcher``.
+
+    ``segments`` are (text, rate, duration_sec). ``synthesizer`` is anything with
+    ``speak_ssml`` (a backend synthesizer or a SynthesizerPool). Returns
+    {'single': stats, 'batched': stats, 'requests_saved_per_min': ...} where stats has
+    requests, seconds and requests_per_min (per minute of source media).
+    """
+    media_min = sum(duration for _, _, duration in segments) / 60.0 or 1.0
+
+    def run(batches):
+        t_start = time.perf_counter()
+        requests = failures = 0
+        for batch in batches:
+            items = [(f"s{i}" if len(batch) > 1 else None, text, rate) for i, (text, rate, _) in enumerate(batch)]
+            requests += 1
+            res = synthesizer.speak_ssml(build_batch_ssml(voice_name, pitch, items))
+            if not res.ok or (len(items) > 1 and split_at_bookmarks(res, [m for m, _, _ in items]) is None):
+                failures += 1
+        return {'requests': requests, 'failures': failures, 'seconds': time.perf_counter() - t_start,
+                'requests_per_min': requests / media_min}
+
+    batcher = SegmentBatcher(max_batch_sec)
+    batches = []
+    for seg in segments:
+        batches += batcher.add(seg, seg[2])
+    batches += batcher.flush()
+    single = run([[seg] for seg in segments])
+    batched = run(batches)
+    return {'single': single, 'batched': batched,
+            'requests_saved_per_min': single['requests_per_min'] - batched['requests_per_min']}
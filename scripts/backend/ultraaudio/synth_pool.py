@@ -0,0 +1,266 @@
+import time
+import threading
+import collections
+
+import numpy as np
+
+from .backends import DEFAULT_OUTPUT_FORMAT, SynthesisResult
+
+# Synthesized by health checks and warm-up; short, so a probe costs little
+PROBE_TEXT = "Hello."
+
+
+class SynthesizerPool:
+    """
+    Bounded pool of long-lived, pre-connected synthesizers for one voice.
+
+    Each concurrent caller borrows its own synthesizer, so requests never share a
+    connection; a synthesizer that raises or returns an error is closed and replaced
+    ("recycled") before it goes back into the pool. ``check_health`` probes idle
+    synthesizers with a short request the same way (warm-up at start, then
+    periodically so dropped connections are replaced before a caller needs them).
+    """
+
+    def __init__(self, backend, voice_name, size=4, output_format=DEFAULT_OUTPUT_FORMAT, preconnect=True):
+        self.backend = backend
+        self.voice_name = voice_name
+        self.size = max(1, size)
+        self.output_format = output_format
+        self.preconnect = preconnect
+        # Idle synthesizers with the time they were last used; ``close`` wakes every waiter
+        self._idle = collections.deque()
+        self._idle_cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self.completed = 0
+        self.failures = 0
+        self.recycled = 0
+        self.probes = 0
+        self.probe_failures = 0
+        self.latencies = []
+        self.queue_waits = []
+        self.first_request_at = None
+        self.last_done_at = None
+
+        for _ in range(self.size):
+            self._idle.append((self._new_synthesizer(), time.time()))
+
+    def _new_synthesizer(self):
+        syn = self.backend.create_synthesizer(self.voice_name, output_format=self.output_format)
+        if self.preconnect:
+            try:
+                syn.open_connection()
+            except Exception as e:
+                print(f"DEBUG: Synthesizer pre-connect failed (will connect lazily): {e}")
+        return syn
+
+    def _recycle(self, syn):
+        try:
+            syn.close()
+        except Exception:
+            pass
+        with self._stats_lock:
+            self.recycled += 1
+        return self._new_synthesizer()
+
+    def _release(self, syn, healthy):
+        if not healthy and not self._closed:
+            try:
+                syn = self._recycle(syn)
+            except Exception as e:
+                print(f"DEBUG: Failed to recycle synthesizer: {e}")
+        with self._idle_cond:
+            if not self._closed:
+                self._idle.append((syn, time.time()))
+                self._idle_cond.notify()
+                return
+        # Closed while this request ran (job cancelled): release it instead of pooling it
+        try:
+            syn.close()
+        except Exception:
+            pass
+
+    def _acquire(self, timeout=None):
+        """An idle synthesizer, or None once the pool is closed or ``timeout`` passes."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._idle_cond:
+            while not self._idle and not self._closed:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._idle_cond.wait(remaining)
+            if self._closed:
+                return None
+            syn, _ = self._idle.popleft()
+            return syn
+
+    def _run(self, request, timeout=None):
+        if self._closed:
+            return SynthesisResult(error="Synthesizer pool is closed")
+        t_wait = time.time()
+        with self._stats_lock:
+            if self.first_request_at is None:
+                self.first_request_at = t_wait
+        syn = self._acquire(timeout)
+        if syn is None:
+            with self._stats_lock:
+                self.failures += 1
+            if self._closed:
+                return SynthesisResult(error="Synthesizer pool is closed")
+            return SynthesisResult(error=f"No synthesizer free within {timeout} s")
+        t_start = time.time()
+        healthy = True
+        try:
+            result = request(syn)
+            healthy = result.error is None
+        except Exception as e:
+            healthy = False
+            result = SynthesisResult(error=str(e))
+        finally:
+            self._release(syn, healthy)
+
+        t_end = time.time()
+        latency = (t_end - t_start) * 1000
+        with self._stats_lock:
+            self.last_done_at = t_end
+            self.queue_waits.append((t_start - t_wait) * 1000)
+            self.latencies.append(latency)
+            if result.ok:
+                self.completed += 1
+            else:
+                self.failures += 1
+        return result
+
+    def speak_ssml(self, ssml, timeout=None):
+        """
+        Synthesize on a pooled synthesizer; blocks while all of them are busy (at most
+        ``timeout`` seconds, if given). Returns an error result once the pool is closed.
+        """
+        return self._run(lambda syn: syn.speak_ssml(ssml), timeout)
+
+    def speak_ssml_stream(self, ssml, on_chunk, timeout=None):
+        """``speak_ssml`` delivering the audio to ``on_chunk`` as it is synthesized."""
+        return self._run(lambda syn: syn.speak_ssml_stream(ssml, on_chunk), timeout)
+
+    def _probe(self, syn):
+        ssml = (f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">'
+                f'<voice name="{self.voice_name}">{PROBE_TEXT}</voice></speak>')
+        try:
+            healthy = syn.speak_ssml(ssml).error is None
+        except Exception as e:
+            print(f"DEBUG: Synthesizer health probe failed: {e}")
+            healthy = False
+        with self._stats_lock:
+            self.probes += 1
+            if not healthy:
+                self.probe_failures += 1
+        self._release(syn, healthy)
+
+    def check_health(self, min_idle_sec=0.0):
+        """
+        Probe every idle synthesizer unused for ``min_idle_sec`` (all of them at start,
+        which also warms them up) and replace the ones that fail. Busy synthesizers
+        are left alone, so live requests never wait for a probe. Returns the probe count.
+        """
+        now = time.time()
+        to_probe = []
+        with self._idle_cond:
+            keep = collections.deque()
+            for syn, last_used in self._idle:
+                if now - last_used >= min_idle_sec:
+                    to_probe.append(syn)
+                else:
+                    keep.append((syn, last_used))
+            self._idle = keep
+        threads = [threading.Thread(target=self._probe, args=(syn,), daemon=True) for syn in to_probe]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return len(to_probe)
+
+    def get_stats(self):
+        """Throughput and per-segment latency, for tuning the pool size."""
+        with self._stats_lock:
+            elapsed = 0.0
+            if self.first_request_at is not None and self.last_done_at is not None:
+                elapsed = self.last_done_at - self.first_request_at
+            latencies = list(self.latencies)
+            waits = list(self.queue_waits)
+            stats = {
+                'workers': self.size,
+                'segments': self.completed,
+                'failures': self.failures,
+                'recycled': self.recycled,
+                'probes': self.probes,
+                'probe_failures': self.probe_failures,
+                'segments_per_sec': self.completed / elapsed if elapsed > 0 else 0.0
+            }
+        if latencies:
+            stats['latency_avg_ms'] = float(np.mean(latencies))
+            stats['latency_p95_ms'] = float(np.percentile(latencies, 95))
+            stats['queue_wait_avg_ms'] = float(np.mean(waits))
+        return stats
+
+    def close(self):
+        """Close the idle synthesizers; requests still waiting for one get an error result."""
+        with self._idle_cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._idle_cond.notify_all()
+        for syn, _ in idle:
+            try:
+                syn.close()
+            except Exception:
+                pass
+
+
+class VoiceSynthesizerPools:
+    """
+    One ``SynthesizerPool`` per voice, e.g. the primary voice of a live session.
+
+    ``sizes`` maps voice names to pool sizes; pools are opened (pre-connected) up
+    front, and a voice not in ``sizes`` gets a single-synthesizer pool on first use.
+    """
+
+    def __init__(self, backend, sizes, output_format=DEFAULT_OUTPUT_FORMAT):
+        self.backend = backend
+        self.output_format = output_format
+        self._lock = threading.Lock()
+        self._pools = {}
+        for voice_name, size in sizes.items():
+            self._pools[voice_name] = SynthesizerPool(backend, voice_name, size=size, output_format=output_format)
+
+    def get(self, voice_name):
+        with self._lock:
+            pool = self._pools.get(voice_name)
+            if pool is None:
+                pool = SynthesizerPool(self.backend, voice_name, size=1, output_format=self.output_format)
+                self._pools[voice_name] = pool
+            return pool
+
+    def check_health(self, min_idle_sec=0.0):
+        """``check_health`` on every pool at once; returns the probe count."""
+        with self._lock:
+            pools = list(self._pools.values())
+        counts = []
+        threads = [threading.Thread(target=lambda p=pool: counts.append(p.check_health(min_idle_sec)), daemon=True)
+                   for pool in pools]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return sum(counts)
+
+    def get_stats(self):
+        with self._lock:
+            return {voice_name: pool.get_stats() for voice_name, pool in self._pools.items()}
+
+    def close(self):
+        # The pools stay listed so their stats remain readable
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
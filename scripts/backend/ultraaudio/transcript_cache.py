@@ -0,0 +1,134 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+TRANSCRIPT_CACHE_DIR_ENV = "ULTRAAUDIO_TRANSCRIPT_CACHE_DIR"
+# Per-segment fields that come from recognition; everything else is per-target
+SOURCE_FIELDS = ('start', 'duration', 'original', 'confidence', 'input_time')
+
+
+class TranscriptCache:
+    """
+    On-disk cache of source transcripts, so re-dubbing known media skips recognition.
+
+    Entries are JSON files keyed by the SHA-256 of (media content hash, source
+    language, speech engine). An entry holds the recognized segments (timing and
+    ``original`` text) plus every translation produced so far, per target language.
+    Writes are atomic (temp file + rename) and safe across threads and processes.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(tempfile.gettempdir(), "ultraaudio_transcripts")
+        os.makedirs(self.root, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(media_sha256, source_lang, engine):
+        payload = json.dumps([media_sha256, source_lang, engine])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def get(self, key):
+        """The cached entry ({'segments': [...], 'translations': {lang: [text, ...]}}) or None."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"DEBUG: Transcript cache write failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def put(self, key, segments, translations=None, **info):
+        """
+        Store a complete transcript. ``segments`` are pipeline segments; only their
+        source fields are kept. ``translations`` is {lang: [text per segment]}.
+        """
+        entry = dict(info)
+        entry['created'] = datetime.now().isoformat()
+        entry['segments'] = [{k: seg[k] for k in SOURCE_FIELDS if k in seg} for seg in segments]
+        entry['translations'] = translations or {}
+        self._write(key, entry)
+
+    def add_translations(self, key, entry, translations):
+        """
+        Remember more languages' translations ({lang: texts}) of a cached transcript,
+        in one write. Merged into the entry as it is on disk now, so languages added
+        meanwhile by another job are kept. Returns the updated entry.
+        """
+        with self._lock:
+            current = None
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    current = json.load(f)
+            except (OSError, ValueError):
+                pass
+            if not current or current.get('segments') != entry.get('segments'):
+                current = entry
+            merged = dict(current)
+            merged['translations'] = dict(current.get('translations') or {})
+            merged['translations'].update({lang: list(texts) for lang, texts in translations.items()})
+            self._write(key, merged)
+        return merged
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """Process-wide cache under $ULTRAAUDIO_TRANSCRIPT_CACHE_DIR (default: the system temp dir)."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TranscriptCache(os.getenv(TRANSCRIPT_CACHE_DIR_ENV))
+        return _shared_cache
+
+
+def translate_transcript(backend, entry, source_lang, target_lang):
+    """
+    Target-language texts for every cached segment: the stored translation when there
+    is one, else one batched ``backend.translate`` call over the ``original`` texts.
+    Returns (texts, translated_now).
+    """
+    cached = (entry.get('translations') or {}).get(target_lang)
+    if cached is not None and len(cached) == len(entry['segments']):
+        return list(cached), False
+    originals = [seg.get('original', '') for seg in entry['segments']]
+    # Empty texts stay empty and are not sent
+    todo = [i for i, text in enumerate(originals) if text and not text.isspace()]
+    texts = [''] * len(originals)
+    if todo:
+        translated = backend.translate([originals[i] for i in todo], source_lang, target_lang)
+        for i, text in zip(todo, translated):
+            texts[i] = text
+    return texts, True
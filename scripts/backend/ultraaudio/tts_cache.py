@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import unicodedata
+
+from .backends import SynthesisResult
+
+TTS_CACHE_DIR_ENV = "ULTRAAUDIO_TTS_CACHE_DIR"
+TTS_CACHE_MB_ENV = "ULTRAAUDIO_TTS_CACHE_MB"
+DEFAULT_CACHE_MB = 512
+
+
+def normalize_text(text):
+    """Canonical form of the text so trivially different strings share one entry."""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache of synthesized audio.
+
+    Entries are the RIFF/PCM bytes returned by the synthesizer, stored under the
+    SHA-256 of (engine, voice, rate, pitch, style, output format, normalized text).
+    Writes go to a temp file and are renamed into place, so concurrent writers
+    (threads or processes) never expose a partial entry. When the directory grows
+    past ``max_bytes`` the least recently used entries (by mtime, bumped on every
+    hit) are evicted. ``max_bytes=0`` disables the cache.
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.root = root or os.path.join(tempfile.gettempdir(), "ultraaudio_tts_cache")
+        self.max_bytes = max_bytes
+        self.enabled = max_bytes > 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        if self.enabled:
+            os.makedirs(self.root, exist_ok=True)
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def make_key(engine, voice_name, rate, pitch, style, output_format, text):
+        payload = json.dumps(
+            [engine, voice_name, rate, pitch, style, output_format, normalize_text(text)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".wav")
+
+    def _entries(self):
+        """(path, size, mtime) of every cached entry."""
+        entries = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".wav"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, st.st_size, st.st_mtime))
+        return entries
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                audio = f.read()
+            # Bump recency for LRU eviction
+            os.utime(path, None)
+        except (FileNotFoundError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, key, audio_data):
+        if not self.enabled or not audio_data:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_data)
+            # Another writer may have stored the same key meanwhile; same content, count it once
+            replaced = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"DEBUG: TTS cache write failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if not replaced:
+                self._total_bytes += len(audio_data)
+            over_quota = self._total_bytes > self.max_bytes
+        if over_quota:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache is below 90% of its quota."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            for path, size, _ in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._total_bytes = total
+
+    def fetch_or_synthesize(self, key, synthesize):
+        """Return cached audio as a SynthesisResult, or call ``synthesize()`` and store its audio."""
+        audio = self.get(key)
+        if audio is not None:
+            return SynthesisResult(audio)
+        result = synthesize()
+        if result.ok:
+            self.put(key, result.audio_data)
+        return result
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_tts_cache():
+    """Process-wide cache configured by $ULTRAAUDIO_TTS_CACHE_DIR / $ULTRAAUDIO_TTS_CACHE_MB."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            max_mb = float(os.getenv(TTS_CACHE_MB_ENV, DEFAULT_CACHE_MB))
+            _shared_cache = TTSCache(os.getenv(TTS_CACHE_DIR_ENV), int(max_mb * 1024 * 1024))
+        return _shared_cache
@@ -19,3 +19,28 @@ def synthesize_stub(segments, azure_key, azure_region):
     sine.writeframes(silence)
     sine.close()
     return out
+
+def pcm_to_wav_bytes(pcm_bytes, sample_rate=16000, channels=1, sampwidth=2):
+    # Wrap raw PCM in a RIFF header (same layout as Riff16Khz16BitMonoPcm)
+    import io
+    buf = io.BytesIO()
+    wf = wave.open(buf, 'wb')
+    wf.setnchannels(channels)
+    wf.setsampwidth(sampwidth)
+    wf.setframerate(sample_rate)
+    wf.writeframes(pcm_bytes)
+    wf.close()
+    return buf.getvalue()
+
+def generate_tone_pcm(duration_s, sample_rate=16000, freq=220.0, kind='tone', amplitude=0.3, seed=0):
+    # Deterministic int16 placeholder audio: sine tone, seeded noise or silence
+    import numpy as np
+    nframes = max(0, int(round(sample_rate * duration_s)))
+    if kind == 'silence' or nframes == 0:
+        samples = np.zeros(nframes, dtype=np.float32)
+    elif kind == 'noise':
+        samples = np.random.default_rng(seed).uniform(-1.0, 1.0, nframes).astype(np.float32)
+    else:
+        t = np.arange(nframes, dtype=np.float32) / sample_rate
+        samples = np.sin(2 * np.pi * freq * t)
+    return (samples * amplitude * 32767).astype('<i2').tobytes()
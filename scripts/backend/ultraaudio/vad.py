@@ -0,0 +1,219 @@
+import wave
+
+import numpy as np
+
+
+def frame_features(samples, sr, frame_ms=30):
+    """
+    Per-frame log energy (dBFS) and zero-crossing rate for a mono float signal.
+
+    Frames are non-overlapping ``frame_ms`` windows; a trailing partial frame is dropped.
+    """
+    frame_len = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+    frames = np.asarray(samples[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-9)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frame_len)
+    return energy_db.astype(np.float32), zcr.astype(np.float32)
+
+
+def wav_frame_features(wav_path, frame_ms=30, block_sec=30.0):
+    """Frame features of a 16-bit PCM WAV, read block by block so memory stays flat."""
+    energies = []
+    zcrs = []
+    with wave.open(wav_path, 'rb') as wf:
+        sr = wf.getframerate()
+        channels = wf.getnchannels()
+        total_duration = wf.getnframes() / float(sr)
+        frame_len = max(1, int(sr * frame_ms / 1000))
+        # Whole frames per block so no analysis frame straddles two blocks
+        block_frames = max(1, int(block_sec * sr) // frame_len) * frame_len
+        while True:
+            raw = wf.readframes(block_frames)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            energy_db, zcr = frame_features(samples, sr, frame_ms)
+            energies.append(energy_db)
+            zcrs.append(zcr)
+    if not energies:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32), total_duration
+    return np.concatenate(energies), np.concatenate(zcrs), total_duration
+
+
+class VadAccumulator:
+    """
+    Block sink that computes frame features while audio streams past (see media_io).
+
+    Blocks are int16 or float arrays of mono audio; samples that do not fill a whole
+    frame are carried over to the next block.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        self.n_samples = 0
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._energies = []
+        self._zcrs = []
+
+    def __call__(self, block):
+        samples = np.asarray(block)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        self.n_samples += len(samples)
+        samples = np.concatenate((self._carry, samples.astype(np.float32, copy=False)))
+        usable = len(samples) // self.frame_len * self.frame_len
+        self._carry = samples[usable:]
+        if usable:
+            energy_db, zcr = frame_features(samples[:usable], self.sample_rate, self.frame_ms)
+            self._energies.append(energy_db)
+            self._zcrs.append(zcr)
+
+    def features(self):
+        """(energy_db, zcr, total_duration) of everything seen so far."""
+        total_duration = self.n_samples / float(self.sample_rate)
+        if not self._energies:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32), total_duration
+        return np.concatenate(self._energies), np.concatenate(self._zcrs), total_duration
+
+    def speech_regions(self, pad_sec=0.15, **classify_kwargs):
+        """Same result as ``detect_speech_regions`` on a WAV of the streamed audio."""
+        energy_db, zcr, total_duration = self.features()
+        regions = regions_from_features(energy_db, zcr, total_duration, self.frame_ms, pad_sec, **classify_kwargs)
+        return regions, total_duration
+
+
+def _runs(mask):
+    """(start, end) frame index pairs of consecutive True runs."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def classify_frames(energy_db, zcr, energy_margin_db=12.0, zcr_max=0.35, frame_ms=30,
+                    min_speech_sec=0.2, min_silence_sec=0.3):
+    """
+    Boolean speech mask from frame features.
+
+    The threshold adapts to the file: noise floor (10th energy percentile) plus
+    ``energy_margin_db``. Frames above it count as speech unless they look like
+    broadband noise (high ZCR with only marginal energy). Short silences inside
+    speech are bridged and short speech blips are dropped.
+    """
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = noise_floor + energy_margin_db
+    speech = (energy_db > threshold) & ((zcr < zcr_max) | (energy_db > threshold + 10.0))
+
+    min_silence = max(1, int(round(min_silence_sec * 1000 / frame_ms)))
+    starts, ends = _runs(~speech)
+    for s, e in zip(starts, ends):
+        if e - s < min_silence and s > 0 and e < len(speech):
+            speech[s:e] = True
+
+    min_speech = max(1, int(round(min_speech_sec * 1000 / frame_ms)))
+    starts, ends = _runs(speech)
+    for s, e in zip(starts, ends):
+        if e - s < min_speech:
+            speech[s:e] = False
+    return speech
+
+
+def detect_speech_regions(wav_path, frame_ms=30, pad_sec=0.15, **classify_kwargs):
+    """
+    Voice-activity detection over a WAV file.
+
+    Returns (speech_regions, total_duration) with regions as [(start_sec, end_sec), ...],
+    padded by ``pad_sec`` so word onsets and tails are not clipped.
+    """
+    energy_db, zcr, total_duration = wav_frame_features(wav_path, frame_ms)
+    regions = regions_from_features(energy_db, zcr, total_duration, frame_ms, pad_sec, **classify_kwargs)
+    return regions, total_duration
+
+
+def regions_from_features(energy_db, zcr, total_duration, frame_ms=30, pad_sec=0.15, **classify_kwargs):
+    """Padded, merged speech regions [(start_sec, end_sec), ...] from frame features."""
+    speech = classify_frames(energy_db, zcr, frame_ms=frame_ms, **classify_kwargs)
+    frame_sec = frame_ms / 1000.0
+    regions = []
+    starts, ends = _runs(speech)
+    for s, e in zip(starts, ends):
+        start = max(0.0, float(s) * frame_sec - pad_sec)
+        end = min(total_duration, float(e) * frame_sec + pad_sec)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def silence_regions(speech_regions, total_duration):
+    """Complement of ``speech_regions`` within [0, total_duration]."""
+    gaps = []
+    cursor = 0.0
+    for start, end in speech_regions:
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < total_duration:
+        gaps.append((cursor, total_duration))
+    return gaps
+
+
+def plan_vad_chunks(speech_regions, target_sec, search_sec=None, skip_silence_sec=2.0):
+    """
+    Chunk cores [(core_start, core_end), ...] cut inside silence gaps.
+
+    Regions separated by less than ``skip_silence_sec`` form one speech island;
+    silence between islands is never sent to the recognizer. Islands longer than
+    ``target_sec`` are cut at the silence gap whose midpoint lies nearest to each
+    target boundary (within ``search_sec``, default a third of the target), and
+    only fall back to a hard cut when no gap is in reach.
+    """
+    if search_sec is None:
+        search_sec = target_sec / 3.0
+
+    islands = []
+    for start, end in speech_regions:
+        if islands and start - islands[-1][-1][1] < skip_silence_sec:
+            islands[-1].append((start, end))
+        else:
+            islands.append([(start, end)])
+
+    plan = []
+    for regions in islands:
+        island_end = regions[-1][1]
+        # Midpoints of the pauses inside this island are the candidate cut points
+        cuts = np.array([(regions[i][1] + regions[i + 1][0]) / 2.0 for i in range(len(regions) - 1)])
+        cursor = regions[0][0]
+        while island_end - cursor > target_sec + search_sec:
+            target = cursor + target_sec
+            cut = target
+            if len(cuts):
+                in_reach = cuts[(cuts > cursor) & (np.abs(cuts - target) <= search_sec)]
+                if len(in_reach):
+                    cut = float(in_reach[np.argmin(np.abs(in_reach - target))])
+            plan.append((cursor, cut))
+            cursor = cut
+        plan.append((cursor, island_end))
+    return plan
+
+
+def speech_coverage(plan, total_duration):
+    """Seconds of audio the plan sends to the recognizer vs. the full file."""
+    covered = sum(end - start for start, end in plan)
+    return {
+        'total_sec': total_duration,
+        'recognized_sec': covered,
+        'skipped_sec': max(0.0, total_duration - covered),
+        'chunks': len(plan)
+    }
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import shutil
+import threading
+
+from .jobs import jobs_root, MANIFEST_NAME, MANIFEST_KEEPALIVE_SEC
+
+WORKSPACE_MB_ENV = "ULTRAAUDIO_WORKSPACE_MB"
+OUTPUT_RETENTION_DAYS_ENV = "ULTRAAUDIO_OUTPUT_RETENTION_DAYS"
+DEFAULT_WORKSPACE_MB = 10240
+DEFAULT_RETENTION_DAYS = 30
+SESSIONS_DIR = "sessions"
+# Files a finished job keeps: what the history and the video library point at
+FINAL_PREFIXES = ("final_output_", "final_video_")
+# A 'running' job whose manifest has not been touched for this long is treated as dead;
+# a live job touches it every MANIFEST_KEEPALIVE_SEC even during one long stage
+ACTIVE_STALE_SEC = 10 * MANIFEST_KEEPALIVE_SEC
+# Uploads younger than this may be about to be queued; quota eviction leaves them alone
+SESSION_GRACE_SEC = 900
+
+
+def is_final_output(name):
+    return name.startswith(FINAL_PREFIXES)
+
+
+def _tree_files(path):
+    """(path, size, mtime) of every file under ``path``."""
+    files = []
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            files.append((file_path, st.st_size, st.st_mtime))
+    return files
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+class WorkspaceManager:
+    """
+    Disk lifecycle of job working directories and per-session upload directories.
+
+    Everything lives under ``root`` (``jobs_root()``): one directory per job and
+    ``sessions/<session_id>`` for each UI session's downloads and recordings.
+
+    - ``release_job`` deletes a finished job's intermediates (extracted and denoised
+      audio, segment clips), keeping its final outputs and manifest.
+    - ``sweep`` deletes final outputs and session files older than the retention, then,
+      while the workspace is over ``quota_bytes``, evicts least recently used
+      unreferenced files: intermediates of idle jobs first, then unreferenced outputs
+      and session uploads. Files referenced by the dubbing history, the video library
+      or a queued/running job (``referenced()``) are only removed by retention.
+
+    Running jobs (and the jobs they adopted recognition from) are never touched.
+    """
+
+    def __init__(self, root=None, quota_bytes=DEFAULT_WORKSPACE_MB * 1024 * 1024,
+                 retention_sec=DEFAULT_RETENTION_DAYS * 86400, referenced=None):
+        self.root = root or jobs_root()
+        self.quota_bytes = quota_bytes
+        self.retention_sec = retention_sec
+        self.referenced = referenced
+        self._lock = threading.Lock()
+
+    def session_dir(self, session_id):
+        path = os.path.join(self.root, SESSIONS_DIR, str(session_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _jobs(self):
+        """{job_dir: (status, last_used, source_job)} for every directory with a manifest."""
+        jobs = {}
+        for entry in os.scandir(self.root):
+            manifest_path = os.path.join(entry.path, MANIFEST_NAME)
+            if not entry.is_dir() or not os.path.exists(manifest_path):
+                continue
+            try:
+                last_used = max(os.path.getmtime(manifest_path), entry.stat().st_mtime)
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            jobs[entry.path] = (data.get('status'), last_used, data.get('source_job'))
+        return jobs
+
+    def _active_jobs(self, jobs):
+        now = time.time()
+        active = set()
+        for job_dir, (status, last_used, source_job) in jobs.items():
+            if status in ('pending', 'running') and now - last_used < ACTIVE_STALE_SEC:
+                active.add(job_dir)
+                if source_job:
+                    # A follower still reads the extracted audio of the job it adopted
+                    active.add(os.path.join(self.root, source_job))
+        return active
+
+    def release_job(self, job_dir):
+        """Delete everything in a finished job's directory except its final outputs and manifest."""
+        freed = 0
+        for entry in os.scandir(job_dir):
+            if entry.is_dir() or entry.name == MANIFEST_NAME or is_final_output(entry.name):
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if _remove(entry.path):
+                freed += size
+        print(f"DEBUG: Workspace: released {freed / 1e6:.1f} MB of intermediates in {job_dir}")
+        return freed
+
+    def _references(self):
+        """Referenced paths, or None if they cannot be read (then nothing referenced-looking is evicted)."""
+        if self.referenced is None:
+            return None
+        try:
+            return {os.path.abspath(p) for p in self.referenced() if p}
+        except Exception as e:
+            print(f"DEBUG: Workspace: could not read references: {e}")
+            return None
+
+    def usage(self):
+        return sum(size for _, size, _ in _tree_files(self.root))
+
+    def sweep(self):
+        """Apply retention, then evict down to 90% of the quota. Returns stats."""
+        with self._lock:
+            return self._sweep()
+
+    def _sweep(self):
+        now = time.time()
+        jobs = self._jobs()
+        active = self._active_jobs(jobs)
+        references = self._references()
+        stats = {'expired_files': 0, 'evicted_files': 0, 'freed_bytes': 0}
+
+        # Candidates: (tier, last_used, path, size). Tier 0 goes first.
+        candidates = []
+        expired = []
+        total = 0
+        for job_dir, (_, last_used, _) in jobs.items():
+            files = _tree_files(job_dir)
+            total += sum(size for _, size, _ in files)
+            if job_dir in active:
+                continue
+            for path, size, mtime in files:
+                name = os.path.basename(path)
+                if name == MANIFEST_NAME:
+                    continue
+                if not is_final_output(name):
+                    candidates.append((0, last_used, path, size))
+                elif self.retention_sec and now - mtime > self.retention_sec:
+                    expired.append((path, size))
+                elif references is not None and os.path.abspath(path) not in references:
+                    candidates.append((1, mtime, path, size))
+
+        sessions_root = os.path.join(self.root, SESSIONS_DIR)
+        for path, size, mtime in _tree_files(sessions_root) if os.path.isdir(sessions_root) else []:
+            total += size
+            if references is None or os.path.abspath(path) in references:
+                continue
+            if self.retention_sec and now - mtime > self.retention_sec:
+                expired.append((path, size))
+            elif now - mtime > SESSION_GRACE_SEC:
+                candidates.append((1, mtime, path, size))
+
+        for path, size in expired:
+            if _remove(path):
+                stats['expired_files'] += 1
+                stats['freed_bytes'] += size
+                total -= size
+
+        target = self.quota_bytes * 0.9
+        if self.quota_bytes and total > self.quota_bytes:
+            for _, _, path, size in sorted(candidates):
+                if total <= target:
+                    break
+                if _remove(path):
+                    stats['evicted_files'] += 1
+                    stats['freed_bytes'] += size
+                    total -= size
+            if total > self.quota_bytes:
+                print(f"DEBUG: Workspace still over quota ({total / 1e6:.0f} MB): "
+                      f"the rest is referenced outputs or running jobs")
+
+        self._prune_empty(jobs, active)
+        stats['total_bytes'] = total
+        stats['quota_bytes'] = self.quota_bytes
+        if stats['freed_bytes']:
+            print(f"DEBUG: Workspace sweep: {stats}")
+        return stats
+
+    def _prune_empty(self, jobs, active):
+        """Remove job dirs with nothing but a manifest left, and empty session dirs."""
+        for job_dir in jobs:
+            if job_dir in active:
+                continue
+            try:
+                if os.listdir(job_dir) == [MANIFEST_NAME]:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+            except OSError:
+                pass
+        sessions_root = os.path.join(self.root, SESSIONS_DIR)
+        if os.path.isdir(sessions_root):
+            for entry in os.scandir(sessions_root):
+                try:
+                    if entry.is_dir() and not os.listdir(entry.path):
+                        os.rmdir(entry.path)
+                except OSError:
+                    pass
+
+
+def _db_references():
+    from scripts.backend.db import DatabaseManager
+    return DatabaseManager().referenced_paths()
+
+
+_shared_workspace = None
+_shared_workspace_lock = threading.Lock()
+
+
+def get_workspace():
+    """Process-wide manager configured by $ULTRAAUDIO_WORKSPACE_MB / $ULTRAAUDIO_OUTPUT_RETENTION_DAYS."""
+    global _shared_workspace
+    with _shared_workspace_lock:
+        if _shared_workspace is None:
+            quota_mb = float(os.getenv(WORKSPACE_MB_ENV, DEFAULT_WORKSPACE_MB))
+            retention_days = float(os.getenv(OUTPUT_RETENTION_DAYS_ENV, DEFAULT_RETENTION_DAYS))
+            _shared_workspace = WorkspaceManager(
+                quota_bytes=int(quota_mb * 1024 * 1024), retention_sec=retention_days * 86400,
+                referenced=_db_references
+            )
+        return _shared_workspace
@@ -28,14 +28,14 @@ def render_analytics():
         st.info("Start a live session in the 'Live Stream' tab to generate real-time performance data.")
     else:
         orch = st.session_state.orchestrator
-        p95, p99, bleu, pgram = orch.get_stats()
+        p95, p99, bleu, pgram, first_p95, first_p99 = orch.get_stats()
 
         # Key Performance Indicators
         kpi1, kpi2, kpi3, kpi4 = st.columns(4)
         kpi1.metric("Quality Est.", f"{bleu:.1f}", delta=f"{len(orch.confidence_scores)} Segments")
         kpi2.metric("Confidence", f"{pgram:.1f}%", delta="System Confidence")
-        kpi3.metric("Latency (P95)", f"{p95:.0f} ms", delta_color="inverse")
-        kpi4.metric("Latency (P99)", f"{p99:.0f} ms", delta_color="inverse")
+        kpi3.metric("Latency (P95)", f"{p95:.0f} ms", delta=f"First audio {first_p95:.0f} ms", delta_color="off")
+        kpi4.metric("Latency (P99)", f"{p99:.0f} ms", delta=f"First audio {first_p99:.0f} ms", delta_color="off")
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -2,8 +2,58 @@ import os
 import streamlit as st
 import yt_dlp
 import uuid
-from scripts.backend.ultraaudio.pipeline import run_pipeline
 from scripts.backend.ultraaudio.config import TTS_VOICE_MAP_MALE, TTS_VOICE_MAP_FEMALE
+from scripts.backend.job_worker import ensure_worker_pool
+
+
+@st.fragment(run_every=2)
+def render_job_queue(session_id):
+    """Live view of this session's background dubbing jobs, polled from the queue table."""
+    from scripts.backend.db import DatabaseManager
+    try:
+        db = DatabaseManager()
+        jobs = db.get_jobs(session_id, limit=5)
+    except Exception as e:
+        print(f"Failed to poll job queue: {e}")
+        return
+    if not jobs:
+        return
+
+    st.markdown("#### ⏳ Dubbing Queue")
+    for job in jobs:
+        params = job['params']
+        label = f"#{job['id']} · {os.path.basename(params.get('input_path', ''))} → {params.get('target_lang_name', '')}"
+        if job['status'] == 'running':
+            c_label, c_cancel = st.columns([4, 1])
+            c_label.progress(min(job['progress'], 1.0), text=f"{label} — {job['message']}")
+            if c_cancel.button("Stop", key=f"cancel_job_{job['id']}"):
+                db.cancel_job(job['id'])
+        elif job['status'] == 'canceling':
+            st.caption(f"⏹️ {label} — stopping...")
+        elif job['status'] == 'queued':
+            c_label, c_cancel = st.columns([4, 1])
+            c_label.caption(f"🕒 {label} — {job['message']}")
+            if c_cancel.button("Cancel", key=f"cancel_job_{job['id']}"):
+                db.cancel_job(job['id'])
+        elif job['status'] == 'done':
+            st.caption(f"✅ {label} — completed")
+        elif job['status'] == 'failed':
+            st.caption(f"❌ {label} — {job['error']}")
+        else:
+            st.caption(f"⏹️ {label} — {job['status']}")
+
+    if any(job['status'] == 'queued' for job in jobs):
+        # Restart the pool if it died while jobs are waiting
+        ensure_worker_pool()
+
+    # A job finished since the last poll: rerun the page so history and player pick it up
+    finished = {job['id'] for job in jobs if job['status'] == 'done'}
+    seen = st.session_state.get('seen_finished_jobs')
+    st.session_state['seen_finished_jobs'] = finished
+    if seen is not None and finished - seen:
+        st.session_state.pop('active_video_idx', None)
+        st.toast("Dubbing completed successfully!")
+        st.rerun(scope="app")
 
 def render_batch_studio(
     temp_dir,
@@ -258,6 +308,12 @@ def render_batch_studio(
         if mix_original:
             original_vol = st.slider("Ambience Volume", 0.05, 0.4, 0.15, 0.05, format="%0.2f")
 
+        # Parallel chunked recognition for long media
+        recognition_workers = st.slider("Parallel Recognition Workers", 1, 8, 1, help="Recognize long media as overlapping chunks in parallel. 1 = single continuous session.")
+        vad_chunking = st.checkbox("Silence-Aware Chunking (VAD)", value=False, help="Cut chunks in pauses and skip long silent stretches instead of fixed-length splitting.")
+        chunk_strategy = "vad" if vad_chunking else "fixed"
+        tts_workers = st.slider("TTS Concurrency", 1, 8, 4, help="Number of pooled synthesizers working on segments at the same time.")
+
     
     # Action Button
     st.markdown("<hr style='border: 1px solid #3A3F50;'>", unsafe_allow_html=True)
@@ -273,80 +329,42 @@ def render_batch_studio(
             selected_voice_map = TTS_VOICE_MAP_MALE if gender == "Male" else TTS_VOICE_MAP_FEMALE
             target_voice = selected_voice_map.get(target_lang_code, tts_voice_map.get(target_lang_code))
 
-            with st.status(f"Processing in {mode} Mode...", expanded=True) as status:
-                st.write(f"Source: {source_lang_name} to Target: {target_lang_name} ({gender})")
-                
-                # Progress Bar
-                progress_bar = st.progress(0, text="Starting pipeline...")
-                
-                success = False
-                # Pass new args to run_pipeline: target_voice, mix_original, original_vol, progress_bar
-                if mode.startswith("A"):
-                    st.warning("Full Ultra mode features are simulated in this UI example. Running default pipeline.")
-                    success = run_pipeline(final_input, is_vid, source_lang_code, target_lang_code, target_voice, chunk_duration_sec, base_voice_rate, base_voice_pitch, source_lang_name, target_lang_name, mode, mix_original, original_vol, progress_bar, status)
-                elif mode.startswith("B"):
-                    st.info("Executing Balanced pipeline...")
-                    success = run_pipeline(final_input, is_vid, source_lang_code, target_lang_code, target_voice, chunk_duration_sec, base_voice_rate, base_voice_pitch, source_lang_name, target_lang_name, mode, mix_original, original_vol, progress_bar, status)
-                else:
-                    st.info("Executing Basic pipeline (fastest)...")
-                    basic_chunk = max(15, chunk_duration_sec // 2)
-                    success = run_pipeline(final_input, is_vid, source_lang_code, target_lang_code, target_voice, basic_chunk, base_voice_rate, base_voice_pitch, source_lang_name, target_lang_name, mode, mix_original, original_vol, progress_bar, status)
-            
-                if success:
-                    progress_bar.progress(100, text="Completed!")
-                    status.update(label="Dubbing Complete!", state="complete", expanded=False)
-                    st.toast("Dubbing completed successfully!")
-                    
-                    # Save to database
-                    try:
-                        # Get the latest history item (just created)
-                        latest_item = st.session_state['history'][-1] if st.session_state['history'] else None
-                        if latest_item:
-                            # Extract video info
-                            video_file = os.path.basename(latest_item.get('video_path', ''))
-                            title = f"Dubbed Video - {target_lang_name}"
-                            description = f"Dubbed from {source_lang_name} to {target_lang_name} using {mode} mode"
-                            
-                            # Calculate file size and duration if available
-                            file_size = 0
-                            duration = 0.0
-                            if latest_item.get('video_path') and os.path.exists(latest_item['video_path']):
-                                file_size = os.path.getsize(latest_item['video_path'])
-                                # Try to get duration from video
-                                try:
-                                    import cv2
-                                    cap = cv2.VideoCapture(latest_item['video_path'])
-                                    fps = cap.get(cv2.CAP_PROP_FPS)
-                                    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-                                    if fps > 0:
-                                        duration = frame_count / fps
-                                    cap.release()
-                                except:
-                                    pass
-
-                            # Save to DB
-                            db.add_video_output(
-                                session_id=session_id,
-                                title=title,
-                                description=description,
-                                video_path=latest_item.get('video_path'),
-                                audio_path=latest_item.get('audio_path'),
-                                source_lang=source_lang_name,
-                                target_lang=target_lang_name,
-                                quality_mode=mode,
-                                duration=duration,
-                                file_size=file_size,
-                                output_type='batch_studio'
-                            )
-                            print(f"[BatchStudio] Saved video output to database")
-                    except Exception as e:
-                        print(f"[BatchStudio] Failed to save video to database: {e}")
-                        
-                else:
-                    status.update(label="Dubbing Failed", state="error", expanded=True)
-                    st.toast("Dubbing failed. Check logs.", icon="❌")
+            job_chunk = chunk_duration_sec
+            if mode.startswith("A"):
+                st.warning("Full Ultra mode features are simulated in this UI example. Running default pipeline.")
+            elif mode.startswith("B"):
+                st.info("Executing Balanced pipeline...")
+            else:
+                st.info("Executing Basic pipeline (fastest)...")
+                job_chunk = max(15, chunk_duration_sec // 2)
 
+            # The dub runs in a background worker process; this page only enqueues and polls
+            job_params = {
+                'input_path': final_input,
+                'is_video': is_vid,
+                'source_lang_code': source_lang_code,
+                'target_lang_code': target_lang_code,
+                'voice_name': target_voice,
+                'chunk_duration': job_chunk,
+                'voice_rate': base_voice_rate,
+                'voice_pitch': base_voice_pitch,
+                'source_lang_name': source_lang_name,
+                'target_lang_name': target_lang_name,
+                'mode': mode,
+                'mix_original': mix_original,
+                'original_vol': original_vol,
+                'recognition_workers': recognition_workers,
+                'chunk_strategy': chunk_strategy,
+                'tts_workers': tts_workers
+            }
+            try:
+                job_id = db.enqueue_job(session_id, job_params)
+                ensure_worker_pool()
+                st.toast(f"Dubbing job #{job_id} queued ({source_lang_name} to {target_lang_name}, {gender}).")
+            except Exception as e:
+                st.error(f"Failed to queue dubbing job: {e}")
 
+    render_job_queue(st.session_state.get('session_id'))
 
     if st.session_state['history']:
         st.divider()
@@ -374,7 +392,8 @@ def render_batch_studio(
             </div>
         """, unsafe_allow_html=True)
 
-        if active_item.get('video_path'):
+        # Outputs past the workspace retention are deleted while their history entry stays
+        if active_item.get('video_path') and os.path.exists(active_item['video_path']):
             import base64
             import re
             import streamlit.components.v1 as components
@@ -503,11 +522,14 @@ def render_batch_studio(
                 if active_item.get('srt'):
                     st.download_button("📄 Download Subtitles", active_item['srt'], file_name="subtitles.srt", mime="text/srt", width='stretch')
 
-        elif active_item.get('audio_path'):
+        elif active_item.get('audio_path') and os.path.exists(active_item['audio_path']):
             st.audio(active_item['audio_path'])
             with open(active_item['audio_path'], "rb") as f:
                 st.download_button("⬇️ Download Audio", f, file_name="dubbed_audio.wav", mime="audio/wav")
 
+        elif active_item.get('video_path') or active_item.get('audio_path'):
+            st.warning("This output has expired and was removed from the workspace. Dub the file again to regenerate it.")
+
         # --- Playlist Section ---
         st.markdown("""
             <div style="margin-top: 3rem; margin-bottom: 1rem; border-bottom: 1px solid rgba(91, 86, 233, 0.2); padding-bottom: 0.5rem;">
@@ -61,7 +61,11 @@ def render_record_dub(
         if st.session_state['history'] and st.session_state['history'][-1].get('audio_path'):
             latest = st.session_state['history'][-1]
             if not latest.get('video_path'): 
-                st.audio(latest['audio_path'])
-                st.download_button("Download Dubbed Audio 🎧", open(latest['audio_path'], "rb"), file_name="instant_dubbed_audio.wav", type="secondary", width='stretch')
+                if os.path.exists(latest['audio_path']):
+                    st.audio(latest['audio_path'])
+                    with open(latest['audio_path'], "rb") as f:
+                        st.download_button("Download Dubbed Audio 🎧", f, file_name="instant_dubbed_audio.wav", type="secondary", width='stretch')
+                else:
+                    st.warning("This output has expired and was removed from the workspace. Record and dub again to regenerate it.")
         else:
             st.info("The translated audio will appear here.")
@@ -5,10 +5,10 @@ import threading
 import queue
 import time
 import base64
-import os
 import numpy as np
-import azure.cognitiveservices.speech as speechsdk
-from scripts.backend.ultraaudio.config import get_azure_configs, TTS_VOICE_MAP_FEMALE, TTS_VOICE_MAP_MALE
+from scripts.backend.ultraaudio.config import TTS_VOICE_MAP_FEMALE, TTS_VOICE_MAP_MALE
+from scripts.backend.ultraaudio.backends import get_speech_backend, DEFAULT_OUTPUT_FORMAT
+from scripts.backend.ultraaudio.tts_cache import get_tts_cache
 from scripts.backend.db import DatabaseManager
 
 # --- Audio Processor ---
@@ -61,79 +61,67 @@ class VideoProcessor(VideoProcessorBase):
         return frame
 
 # --- Helper: Synthesize Speech ---
-def synthesize_speech(text, target_lang, voice_name):
-    """Synthesize text to speech using Azure and return base64 audio."""
+def synthesize_speech(text, target_lang, voice_name, backend=None):
+    """Synthesize text to speech using the speech backend and return base64 audio."""
     try:
-        speech_key, service_region = get_azure_configs()
-        speech_config = speechsdk.SpeechConfig(subscription=speech_key, region=service_region)
-        speech_config.speech_synthesis_voice_name = voice_name
-        
-        # Use null output to prevent server-side playback, we just want the bytes
-        null_audio_config = speechsdk.audio.AudioConfig(filename=os.devnull)
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=null_audio_config)
-        
-        result = synthesizer.speak_text_async(text).get()
+        backend = backend or get_speech_backend()
+        tts_cache = get_tts_cache()
+
+        def synthesize():
+            synthesizer = backend.create_synthesizer(voice_name)
+            try:
+                return synthesizer.speak_text(text)
+            finally:
+                synthesizer.close()
+
+        cache_key = tts_cache.make_key(backend.name, voice_name, None, None, None, DEFAULT_OUTPUT_FORMAT, text)
+        result = tts_cache.fetch_or_synthesize(cache_key, synthesize)
         
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+        if result.ok:
             return base64.b64encode(result.audio_data).decode('utf-8')
         else:
-            print(f"TTS Error: {result.reason}")
+            print(f"TTS Error: {result.error}")
             return None
     except Exception as e:
         print(f"TTS Exception: {e}")
         return None
 
 # --- Azure Thread ---
-def start_azure_recognition(processor, source_lang, target_lang, result_queue, stop_event, room_id, username, target_voice):
-    speech_key, service_region = get_azure_configs()
-    
-    # Translation Config
-    translation_config = speechsdk.translation.SpeechTranslationConfig(
-        subscription=speech_key, 
-        region=service_region,
-        speech_recognition_language=source_lang,
-        target_languages=[target_lang]
-    )
+def start_azure_recognition(processor, source_lang, target_lang, result_queue, stop_event, room_id, username, target_voice, backend=None):
+    backend = backend or get_speech_backend()
     
-    # Push Stream
-    push_stream = speechsdk.audio.PushAudioInputStream()
-    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
-    
-    recognizer = speechsdk.translation.TranslationRecognizer(
-        translation_config=translation_config, 
-        audio_config=audio_config
-    )
+    # Push-stream recognition session
+    session = backend.open_recognition(source_lang, [target_lang])
     
     db = DatabaseManager()
 
-    def result_callback(evt):
-        if evt.result.reason == speechsdk.ResultReason.TranslatedSpeech:
-            original = evt.result.text
-            translated = evt.result.translations[target_lang]
+    def result_callback(result):
+        original = result.text
+        translated = result.translations.get(target_lang, '')
+        
+        if original.strip():
+            # 1. Synthesize the translated text to audio
+            audio_b64 = synthesize_speech(translated, target_lang, target_voice, backend)
             
-            if original.strip():
-                # 1. Synthesize the translated text to audio
-                audio_b64 = synthesize_speech(translated, target_lang, target_voice)
-                
-                # 2. Save to DB with audio
-                db.add_message(room_id, username, original, translated, target_lang, audio_b64)
-                
-                # 3. Put in queue for local UI update
-                result_queue.put({
-                    "user": username,
-                    "original": original,
-                    "translated": translated,
-                    "audio": audio_b64
-                })
+            # 2. Save to DB with audio
+            db.add_message(room_id, username, original, translated, target_lang, audio_b64)
+            
+            # 3. Put in queue for local UI update
+            result_queue.put({
+                "user": username,
+                "original": original,
+                "translated": translated,
+                "audio": audio_b64
+            })
 
-    recognizer.recognized.connect(result_callback)
-    recognizer.start_continuous_recognition()
+    session.connect(on_recognized=result_callback)
+    session.start()
 
     try:
         while not stop_event.is_set():
             try:
                 chunk = processor.audio_queue.get(timeout=0.5)
-                push_stream.write(chunk)
+                session.write(chunk)
             except queue.Empty:
                 continue
             
@@ -141,8 +129,8 @@ def start_azure_recognition(processor, source_lang, target_lang, result_queue, s
             db.update_heartbeat(room_id, username)
             
     finally:
-        recognizer.stop_continuous_recognition()
-        push_stream.close()
+        session.stop()
+        session.close_stream()
 
 
 def render_remote_meeting(
@@ -1,9 +1,9 @@
 import os
-import tempfile
 import streamlit as st
 from scripts.backend.ultraaudio.config import (
     LANG_OPTIONS, TRANSLATE_OPTIONS, TTS_VOICE_MAP, LANG_CODE_NAME_MAP
 )
+from scripts.backend.ultraaudio.workspace import get_workspace
 from scripts.frontend.tabs.batch_studio import render_batch_studio
 from scripts.frontend.tabs.live_stream import render_live_stream
 from scripts.frontend.tabs.record_dub import render_record_dub
@@ -22,14 +22,20 @@ def run_app():
     # Session state initialization
     if 'history' not in st.session_state:
         st.session_state['history'] = []
-    if 'temp_dir' not in st.session_state:
-        st.session_state['temp_dir'] = tempfile.mkdtemp()
     if 'live_logs' not in st.session_state:
         st.session_state['live_logs'] = []
     
     import uuid
     if 'session_id' not in st.session_state:
         st.session_state['session_id'] = str(uuid.uuid4())
+    if 'temp_dir' not in st.session_state:
+        # Uploads and recordings live in the managed workspace, which enforces quota and retention
+        workspace = get_workspace()
+        st.session_state['temp_dir'] = workspace.session_dir(st.session_state['session_id'])
+        try:
+            workspace.sweep()
+        except Exception as e:
+            print(f"DEBUG: Workspace sweep failed: {e}")
 
     # Enhanced Premium Styling
     st.markdown("""